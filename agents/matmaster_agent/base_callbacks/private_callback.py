@@ -6,7 +6,6 @@ import traceback
 from functools import wraps
 from typing import Optional, Union
 
-import tiktoken
 from deepdiff import DeepDiff
 from dp.agent.adapter.adk import CalculationMCPTool
 from google.adk.agents.callback_context import CallbackContext
@@ -34,8 +33,8 @@ from agents.matmaster_agent.constant import (
 )
 from agents.matmaster_agent.logger import PrefixFilter
 from agents.matmaster_agent.model import CostFuncType
+from agents.matmaster_agent.services.identity import identity_resolver
 from agents.matmaster_agent.services.job import check_job_create_service
-from agents.matmaster_agent.utils.auth import ak_to_ticket, ak_to_username
 from agents.matmaster_agent.utils.callback_utils import _get_ak, _get_projectId
 from agents.matmaster_agent.utils.finance import get_user_photon_balance
 from agents.matmaster_agent.utils.helper_func import (
@@ -46,8 +45,16 @@ from agents.matmaster_agent.utils.helper_func import (
     get_unique_function_call,
     manual_build_current_function_call,
     update_llm_response,
+    wallet_no_fee_error,
 )
 from agents.matmaster_agent.utils.io_oss import update_tgz_dict
+from agents.matmaster_agent.utils.state_utils import step_state_key
+from agents.matmaster_agent.utils.token_utils import (
+    count_payload_tokens,
+    payload_bytes,
+    prepare_content,
+    token_cache_stats,
+)
 from agents.matmaster_agent.utils.tool_response_utils import check_valid_tool_response
 
 logger = logging.getLogger(__name__)
@@ -74,32 +81,32 @@ def filter_safety_content(func: BeforeModelCallback) -> BeforeModelCallback:
         contents = []
         index = 0
         record_tokens = 0
-        encoding = tiktoken.encoding_for_model('gpt-4')
         logger.info(
             f'{callback_context.session.id} {callback_context.agent_name} Prepare Filter Content, len = {len(llm_request.contents)}'
         )
-        for index, content in enumerate(llm_request.contents[::-1]):
-            current_tokens = 0
-            for part in content.parts:
-                if part.text:
-                    current_tokens += len(encoding.encode(part.text))
-                elif part.function_call:
-                    current_tokens += len(encoding.encode(str(part.function_call.args)))
-                elif part.function_response:
-                    current_tokens += len(
-                        encoding.encode(str(part.function_response.response))
+        payloads = [prepare_content(content) for content in llm_request.contents]
+        total_bytes = sum(payload_bytes(item) for item in payloads)
+        if total_bytes < MAX_TOKENS_LIMIT:
+            # 字节数是 token 数的上界，未超限时无需分词
+            contents = list(llm_request.contents)
+            index = len(contents) - 1
+            record_tokens = total_bytes
+        else:
+            for index, (content, content_payloads) in enumerate(
+                zip(llm_request.contents[::-1], payloads[::-1])
+            ):
+                current_tokens = count_payload_tokens(content_payloads)
+                if record_tokens + current_tokens < MAX_TOKENS_LIMIT:
+                    record_tokens += current_tokens
+                    contents.insert(0, content)
+                else:
+                    logger.warning(
+                        f'{callback_context.session.id} {callback_context.agent_name} Content too long, use latest {index+1} part'
                     )
-            if record_tokens + current_tokens < MAX_TOKENS_LIMIT:
-                record_tokens += current_tokens
-                contents.insert(0, content)
-            else:
-                logger.warning(
-                    f'{callback_context.session.id} {callback_context.agent_name} Content too long, use latest {index+1} part'
-                )
-                break
+                    break
 
         logger.info(
-            f'{callback_context.session.id} {callback_context.agent_name} index={index}, record_tokens = {record_tokens}'
+            f'{callback_context.session.id} {callback_context.agent_name} index={index}, record_tokens = {record_tokens}, total_bytes = {total_bytes}, token_cache = {token_cache_stats()}'
         )
 
         if not contents:
@@ -115,15 +122,6 @@ def filter_safety_content(func: BeforeModelCallback) -> BeforeModelCallback:
     return wrapper
 
 
-async def inject_function_declarations(
-    callback_context: CallbackContext, llm_request: LlmRequest
-) -> Optional[LlmResponse]:
-    callback_context.state['function_declarations'] = [
-        item.to_json_dict()
-        for item in llm_request.config.tools[0].function_declarations
-    ]
-
-
 # after_model_callback
 async def default_after_model_callback(
     callback_context: CallbackContext, llm_response: LlmResponse
@@ -284,7 +282,9 @@ def update_tool_args(func: AfterModelCallback) -> AfterModelCallback:
             if part.function_call:
                 function_call_name = part.function_call.name
                 function_call_args = part.function_call.args
-                tool_call_info = callback_context.state['tool_call_info']
+                tool_call_info = callback_context.state.get(
+                    step_state_key('tool_call_info')
+                )
                 if not tool_call_info:
                     logger.warning(
                         f'{callback_context.session.id} empty, tool_call_info = {tool_call_info}'
@@ -465,9 +465,9 @@ async def _inject_projectId(
     return project_id, executor, storage
 
 
-def _inject_username(ctx: Union[InvocationContext, ToolContext], executor):
+async def _inject_username(ctx: Union[InvocationContext, ToolContext], executor):
     access_key = _get_ak(ctx)
-    username = ak_to_username(access_key=access_key)
+    username = await identity_resolver.get_username(access_key)
     if username:
         if executor is not None:
             if executor['type'] == 'dispatcher':  # BohriumExecutor
@@ -484,9 +484,9 @@ def _inject_username(ctx: Union[InvocationContext, ToolContext], executor):
         raise RuntimeError('Failed to get username')
 
 
-def _inject_ticket(ctx: Union[InvocationContext, ToolContext], executor):
+async def _inject_ticket(ctx: Union[InvocationContext, ToolContext], executor):
     access_key = _get_ak(ctx)
-    ticket = ak_to_ticket(access_key=access_key)
+    ticket = await identity_resolver.get_ticket(access_key)
     if ticket:
         if executor is not None:
             if executor['type'] == 'dispatcher':  # BohriumExecutor
@@ -500,6 +500,8 @@ def _inject_ticket(ctx: Union[InvocationContext, ToolContext], executor):
                 executor['env']['BOHRIUM_TICKET'] = str(ticket)
         return ticket, executor
     else:
+        # 不缓存失败的结果，下次重新向服务端申请
+        identity_resolver.invalidate(access_key)
         raise RuntimeError('Failed to get ticket')
 
 
@@ -590,11 +592,9 @@ def inject_username_ticket(func: BeforeToolCallback) -> BeforeToolCallback:
             return before_tool_result
 
         if isinstance(tool, CalculationMCPTool):
-            # 注入 username
-            _, tool.executor = _inject_username(tool_context, tool.executor)
-
-            # 注入 ticket
-            _, tool.executor = _inject_ticket(tool_context, tool.executor)
+            # 注入 username / ticket（均走身份缓存，命中时无网络请求）
+            _, tool.executor = await _inject_username(tool_context, tool.executor)
+            _, tool.executor = await _inject_ticket(tool_context, tool.executor)
 
     return wrapper
 
@@ -654,8 +654,12 @@ def check_job_create(func: BeforeToolCallback) -> BeforeToolCallback:
 
         if tool.executor is not None and tool.executor.get('type') != 'local':
             access_key = _get_ak(tool_context)
-            project_id = _get_projectId(tool_context)
-            return await check_job_create_service(access_key, project_id)
+            project_id = await _get_projectId(tool_context)
+            result = await check_job_create_service(access_key, project_id)
+            if result is not None and not wallet_no_fee_error(result):
+                # AK/项目被拒绝：缓存的 ticket、项目列表可能已失效，下次重新获取
+                identity_resolver.invalidate(access_key)
+            return result
 
     return wrapper
 
@@ -1,23 +1,84 @@
+import hashlib
 import json
 import logging
+import time
 import uuid
 from enum import Enum
 from typing import Optional, Type
+from urllib.parse import urlparse
 
 import litellm
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.agents.llm_agent import AfterModelCallback
+from google.adk.agents.llm_agent import AfterModelCallback, BeforeToolCallback
 from google.adk.models import LlmResponse
+from google.adk.tools import ToolContext
 from google.genai.types import FunctionCall, Part
 
+from agents.matmaster_agent.config import TRANSFER_CHECK_CACHE_TTL
 from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.services.session_files import (
+    SessionFiles,
+    session_file_index,
+)
+from agents.matmaster_agent.utils.cache_utils import TTLCache
 from agents.matmaster_agent.utils.llm_response_utils import has_function_call
 from agents.matmaster_agent.utils.model_utils import create_transfer_check_model
+from agents.matmaster_agent.utils.transfer_utils import (
+    agent_name_patterns,
+    classify_transfer,
+    transfer_check_metrics,
+)
 
 logger = logging.getLogger(__name__)
 
+TRANSFER_CHECK_CACHE_SIZE = 1024
+
+# (prompt+枚举摘要, 回复文本摘要) -> 判定结果
+_transfer_decisions = TTLCache(TRANSFER_CHECK_CACHE_SIZE, TRANSFER_CHECK_CACHE_TTL)
+
+
+async def _check_transfer_by_llm(
+    llm_prompt: str, target_agent_enum: Type[Enum]
+) -> Optional[dict]:
+    start = time.perf_counter()
+    try:
+        response = await litellm.acompletion(
+            model='azure/gpt-4o',
+            messages=[{'role': 'user', 'content': llm_prompt}],
+            response_format=create_transfer_check_model(target_agent_enum),
+        )
+    except Exception as err:
+        transfer_check_metrics.llm_errors += 1
+        logger.warning(
+            f'[{MATMASTER_AGENT_NAME}]:[check_transfer] LLM completion error, err = {err!r}'
+        )
+        return None
+    finally:
+        transfer_check_metrics.llm_calls += 1
+        transfer_check_metrics.llm_latency_sum += time.perf_counter() - start
+
+    if (
+        response
+        and response.choices
+        and response.choices[0]
+        and response.choices[0].message
+        and response.choices[0].message.content
+    ):
+        return json.loads(response.choices[0].message.content)
+
+    transfer_check_metrics.llm_errors += 1
+    logger.warning(
+        f'[{MATMASTER_AGENT_NAME}]:[check_transfer] LLM completion error, response = {response}'
+    )
+    return None
+
 
 def check_transfer(prompt: str, target_agent_enum: Type[Enum]) -> AfterModelCallback:
+    patterns = agent_name_patterns(target_agent_enum)
+    prompt_key = hashlib.blake2b(
+        f'{target_agent_enum.__name__}:{prompt}'.encode('utf-8'), digest_size=8
+    ).digest()
+
     async def wrapper(
         callback_context: CallbackContext, llm_response: LlmResponse
     ) -> Optional[LlmResponse]:
@@ -32,26 +93,26 @@ def check_transfer(prompt: str, target_agent_enum: Type[Enum]) -> AfterModelCall
         ):
             return None
 
-        llm_prompt = prompt.format(response_text=llm_response.content.parts[0].text)
-        response = litellm.completion(
-            model='azure/gpt-4o',
-            messages=[{'role': 'user', 'content': llm_prompt}],
-            response_format=create_transfer_check_model(target_agent_enum),
+        response_text = llm_response.content.parts[0].text
+        transfer_check_metrics.checks += 1
+        cache_key = (
+            prompt_key,
+            hashlib.blake2b(response_text.encode('utf-8'), digest_size=16).digest(),
         )
-
-        if (
-            response
-            and response.choices
-            and response.choices[0]
-            and response.choices[0].message
-            and response.choices[0].message.content
-        ):
-            result: dict = json.loads(response.choices[0].message.content)
+        if (result := _transfer_decisions.get(cache_key)) is not None:
+            source = 'cache'
+            transfer_check_metrics.cache_hits += 1
+        elif (result := classify_transfer(response_text, patterns)) is not None:
+            source = 'rule'
+            transfer_check_metrics.rule_decisions += 1
         else:
-            logger.warning(
-                f'[{MATMASTER_AGENT_NAME}]:[check_transfer] LLM completion error, response = {response}'
+            source = 'llm'
+            result = await _check_transfer_by_llm(
+                prompt.format(response_text=response_text), target_agent_enum
             )
-            return
+            if result is None:
+                return
+        _transfer_decisions.set(cache_key, result)
 
         is_transfer = bool(result.get('is_transfer', False))
         target_agent = str(result.get('target_agent', ''))
@@ -61,7 +122,8 @@ def check_transfer(prompt: str, target_agent_enum: Type[Enum]) -> AfterModelCall
         )
         logger.info(
             f"[{MATMASTER_AGENT_NAME}]:[check_transfer] {symbol_name} target_agent = {target_agent}, is_transfer = {is_transfer}, "
-            f"response_text = {llm_response.content.parts[0].text}, reason = {reason}"
+            f"response_text = {response_text}, reason = {reason}, source = {source}, "
+            f"metrics = {transfer_check_metrics.snapshot()}"
         )
         if is_transfer and not has_function_call(llm_response):
             logger.warning(
@@ -83,3 +145,85 @@ def check_transfer(prompt: str, target_agent_enum: Type[Enum]) -> AfterModelCall
         return None
 
     return wrapper
+
+
+async def _replace_if_not_oss_url(
+    file_path,
+    session_files: SessionFiles,
+    session_id: str,
+    tool_name: str,
+    arg_name: str,
+):
+    """
+    Checks if the file_path is an OSS URL, if not, tries to match it with actual files
+    and returns the matched OSS URL or the original file_path.
+    """
+    if not file_path or not isinstance(file_path, str):
+        return file_path  # Return as is if it's not a string or None
+
+    if urlparse(file_path).scheme in ['http', 'https']:
+        if file_path in session_files.urls:
+            logger.info(
+                f"[validate_file_urls] Found real file URL: {file_path} for {tool_name}.{arg_name}"
+            )
+        else:
+            logger.info(
+                f"[validate_file_urls] LLM generated URL: {file_path} for {tool_name}.{arg_name}"
+            )
+        return file_path  # URL 不在会话中时原样返回（可能是外部链接）
+
+    if (
+        actual_file_url := await session_file_index.resolve(session_id, file_path)
+    ) is not None:
+        logger.info(
+            f"[validate_file_urls] Found real file match: {file_path} -> {actual_file_url} for {tool_name}.{arg_name}"
+        )
+        return actual_file_url
+
+    logger.info(
+        f"[validate_file_urls] No real file match for: {file_path} in {tool_name}.{arg_name}"
+    )
+    return file_path
+
+
+def validate_session_file_urls(
+    file_path_args: dict[str, list[str]],
+) -> BeforeToolCallback:
+    """
+    Validates file URLs from session to ensure they are actual session files (not hallucinated by LLM).
+    If not an OSS URL, tries to match the filename against session files.
+
+    file_path_args: tool_name -> 需要校验的文件参数名（参数值可以是列表）
+    """
+
+    async def wrapper(tool, args, tool_context: ToolContext):
+        args_to_check = [
+            arg_name
+            for arg_name in file_path_args.get(tool.name, [])
+            if arg_name in args
+        ]
+        if not args_to_check:
+            return
+
+        try:
+            session_files = await session_file_index.get(tool_context.session.id)
+        except Exception as e:
+            logger.error(f"Failed to retrieve session files: {e}")
+            return
+
+        session_id = tool_context.session.id
+        for arg_name in args_to_check:
+            value = args[arg_name]
+            if isinstance(value, list):
+                args[arg_name] = [
+                    await _replace_if_not_oss_url(
+                        item, session_files, session_id, tool.name, arg_name
+                    )
+                    for item in value
+                ]
+            else:
+                args[arg_name] = await _replace_if_not_oss_url(
+                    value, session_files, session_id, tool.name, arg_name
+                )
+
+    return wrapper
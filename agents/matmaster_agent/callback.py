@@ -19,6 +19,7 @@ from agents.matmaster_agent.prompt import get_user_content_lang
 from agents.matmaster_agent.services.quota import check_quota_service, use_quota_service
 from agents.matmaster_agent.state import ERROR_DETAIL, ERROR_OCCURRED, PLAN, UPLOAD_FILE
 from agents.matmaster_agent.utils.helper_func import get_user_id
+from agents.matmaster_agent.utils.lang_utils import ZH_LANGUAGES, detect_language
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -56,12 +57,6 @@ async def matmaster_prepare_state(
     callback_context.state['long_running_jobs'] = callback_context.state.get(
         'long_running_jobs', {}
     )
-    callback_context.state['long_running_jobs_count'] = callback_context.state.get(
-        'long_running_jobs_count', 0
-    )
-    callback_context.state['long_running_jobs_count_ori'] = callback_context.state.get(
-        'long_running_jobs_count_ori', 0
-    )
     callback_context.state['render_job_list'] = callback_context.state.get(
         'render_job_list', False
     )
@@ -92,13 +87,6 @@ async def matmaster_prepare_state(
     callback_context.state['hallucination_agent'] = callback_context.state.get(
         'hallucination_agent', None
     )
-    callback_context.state['tools_count'] = callback_context.state.get('tools_count', 0)
-    callback_context.state['tools_count_ori'] = callback_context.state.get(
-        'tools_count_ori', 0
-    )
-    callback_context.state['tool_hallucination'] = callback_context.state.get(
-        'tool_hallucination', False
-    )
     callback_context.state['tool_hallucination_agent'] = callback_context.state.get(
         'tool_hallucination_agent', None
     )
@@ -106,19 +94,12 @@ async def matmaster_prepare_state(
     callback_context.state['plan_index'] = callback_context.state.get(
         'plan_index', None
     )
-    callback_context.state['tool_call_info'] = callback_context.state.get(
-        'tool_call_info', {}
-    )
     # 用户是否确认计划方案
     callback_context.state['plan_confirm'] = callback_context.state.get(
         'plan_confirm', {}
     )
     # 用户意图
     callback_context.state['intent'] = callback_context.state.get('intent', {})
-    # 函数签名 From Server
-    callback_context.state['function_declarations'] = callback_context.state.get(
-        'function_declarations', {}
-    )
     # 单次计划涉及的所有场景
     callback_context.state['scenes'] = callback_context.state.get('scenes', [])
     # 单次计划涉及的所有场景
@@ -127,40 +108,40 @@ async def matmaster_prepare_state(
     callback_context.state['quota_remaining'] = callback_context.state.get(
         'quota_remaining', None
     )
-    # 重试步骤或者是继续步骤
-    callback_context.state['separate_card_info'] = callback_context.state.get(
-        'separate_card_info', ''
-    )
 
 
-async def matmaster_set_lang(
-    callback_context: CallbackContext,
-) -> Optional[types.Content]:
-    user_content = callback_context.user_content.parts[0].text
+async def _detect_language_by_llm(user_content: str) -> str:
     prompt = get_user_content_lang().format(user_content=user_content)
-    response = litellm.completion(
-        model='azure/gpt-4o',
-        messages=[{'role': 'user', 'content': prompt}],
-        response_format=UserContent,
-    )
     try:
+        response = await litellm.acompletion(
+            model='azure/gpt-4o',
+            messages=[{'role': 'user', 'content': prompt}],
+            response_format=UserContent,
+        )
         result: dict = json.loads(response.choices[0].message.content)
-    except BaseException:
+    except Exception:
         result = {}
     logger.info(
         f"[{MATMASTER_AGENT_NAME}]:[{inspect.currentframe().f_code.co_name}] result = {result}"
     )
-    language = str(result.get('language', 'zh'))
+    return str(result.get('language', 'zh'))
+
+
+async def matmaster_set_lang(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    user_content = callback_context.user_content.parts[0].text
+    # 1. 本地按字符集识别；2. 无法判断时沿用本会话已识别的语言；3. 仍没有再调用 LLM
+    language = detect_language(user_content)
+    if language is None:
+        language = callback_context.state.get('target_language')
+    if language is None:
+        language = await _detect_language_by_llm(user_content)
+    logger.info(f'{callback_context.session.id} target_language = {language}')
+
     callback_context.state['target_language'] = language
-    if callback_context.state['target_language'] in [
-        'Chinese',
-        'zh-CN',
-        '简体中文',
-        'Chinese (Simplified)',
-    ]:
-        i18n.language = 'zh'
-    else:
-        i18n.language = 'en'
+    # i18n.language 基于 ContextVar，仅对当前 invocation 生效
+    i18n.language = 'zh' if language in ZH_LANGUAGES else 'en'
 
 
 async def matmaster_check_quota(
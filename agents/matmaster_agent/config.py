@@ -1,4 +1,33 @@
 USE_PHOTON = False
 USER_DIRECT_CONSUME = False
 MAX_TOKENS_LIMIT = 128000
+MAX_PART_BYTES = 256 * 1024  # 单个工具返回超过该字节数时在分词前截断
 MAX_TOOL_RETRIES = 2
+PIPELINE_PRE_PLANNING = True
+JOB_POLL_CONCURRENCY = 8  # 任务状态查询与结果收集的最大并发数
+JOB_STATUS_CACHE_TTL = 5  # 任务状态缓存时间（秒）
+HARVEST_CONCURRENCY = 4  # 单个任务内结果文件并发转存数
+OSS_UPLOAD_CONCURRENCY = 8  # 进程内 OSS 并发上传数
+TOOL_REGISTRY_TTL = 600  # MCP 工具声明缓存时间（秒）
+IDENTITY_CACHE_TTL = 600  # AK -> username/ticket/项目列表 缓存时间（秒）
+TRANSFER_CHECK_CACHE_TTL = 3600  # 相同回复文本的转移判定缓存时间（秒）
+SESSION_FILES_CACHE_TTL = 600  # 会话文件索引缓存时间（秒）
+SESSION_FILES_BATCH_SIZE = 50  # 会话文件批量写入的单批上限，积压达到该数量时立即写入
+SESSION_FILES_FLUSH_INTERVAL = 1.0  # 会话文件攒批的最长等待时间（秒）
+STATE_DEBUG = False  # 打开后 update_state_event 记录完整调用栈与 state_delta 取值
+STEP_CONCURRENCY = 3  # 计划中互不依赖的步骤最多同时执行的数量
+EXECUTION_AGENT_POOL_MAX_KEYS = 64  # 执行 agent 池最多缓存的子 agent 组合数
+ERROR_EXPLAIN_CACHE_TTL = 1800  # 同类错误的分析结果缓存时间（秒）
+ERROR_EXPLAIN_RATE = 0.2  # 错误分析 LLM 调用的平均速率（次/秒），超出后降级为模板说明
+ERROR_EXPLAIN_BURST = 5  # 错误分析 LLM 调用允许的突发次数
+STRUCTURE_INFO_URL_TTL = (
+    600  # 结构文件 URL -> 结构信息 缓存时间（秒），命中时不再下载文件
+)
+STRUCTURE_INFO_CACHE_TTL = (
+    604800  # 按文件内容哈希缓存的结构信息有效期（秒），同样用于 SQLite 持久缓存
+)
+COMMON_DB_SCHEMA_TTL = 600  # common_db 表结构（字段列表与字段说明）缓存时间（秒）
+PAPER_CONTENT_CACHE_TTL = 3600  # 按 DOI 缓存的论文全文与图片有效期（秒）
+PAPER_AGENT_CONCURRENCY = 4  # deep research 中同时精读的论文数
+PAPER_AGENT_TIMEOUT = 300  # 单篇论文精读的超时时间（秒），超时的论文不计入报告
+PAPER_AGENT_MAX_OUTPUT_TOKENS = 8192  # 单篇论文精读结果的最大输出 token 数
@@ -1,7 +1,7 @@
 """
 Ops ENV: MATERIALS_ACCESS_KEY, MATERIALS_PROJECT_ID, MATMASTER_SKU_ID, DEFAULT_MODEL
 DEBUG ENV: OPIK_PROJECT_NAME, BOHRIUM_ACCESS_KEY, BOHRIUM_PROJECT_ID, BOHRIUM_USER_ID
-Other ENV: MATERIALS_USER_ID, MATERIALS_ORG_ID, SESSION_API_URL
+Other ENV: MATERIALS_USER_ID, MATERIALS_ORG_ID, SESSION_API_URL, STRUCTURE_INFO_CACHE_DB
 """
 
 import os
@@ -35,6 +35,8 @@ MATERIALS_TOOL_CALL_INFO = 'materials_tool_call_info'
 
 # DB
 DBUrl = os.getenv('SESSION_API_URL')
+# 结构信息的 SQLite 持久缓存路径，未设置时只使用内存缓存
+STRUCTURE_INFO_CACHE_DB = os.getenv('STRUCTURE_INFO_CACHE_DB', '')
 
 # HOST URL
 DFLOW_HOST = ''
@@ -1,4 +1,3 @@
-import copy
 import logging
 from typing import Any, AsyncGenerator, Optional, cast
 
@@ -63,6 +62,11 @@ from agents.matmaster_agent.utils.helper_func import (
 from agents.matmaster_agent.utils.result_parse_utils import (
     parse_result,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    get_plan_index,
+    step_state_key,
+    update_plan_step,
+)
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -167,7 +171,10 @@ class MCPRunEventsMixin(BaseMixin):
                     yield update_state_event(
                         ctx,
                         state_delta={
-                            'tools_count': ctx.session.state['tools_count'] + 1,
+                            step_state_key('tools_count'): ctx.session.state.get(
+                                step_state_key('tools_count'), 0
+                            )
+                            + 1,
                         },
                         event=event,
                     )
@@ -249,7 +256,7 @@ class MCPRunEventsMixin(BaseMixin):
                         and event.content.parts[0].text
                         == 'All Function Calls Are Occurred Before, Continue'
                         and ctx.session.state[PLAN]['steps'][
-                            ctx.session.state['plan_index']
+                            get_plan_index(ctx.session.state)
                         ]['status']
                         == PlanStepStatusEnum.PROCESS
                     ):
@@ -257,10 +264,11 @@ class MCPRunEventsMixin(BaseMixin):
                             ctx, self.name, '工具参数无变化，本次跳过执行', ModelRole
                         ):
                             yield _info_event
-                        update_plan = copy.deepcopy(ctx.session.state['plan'])
-                        update_plan['steps'][ctx.session.state['plan_index']][
-                            'status'
-                        ] = PlanStepStatusEnum.FAILED
+                        update_plan = update_plan_step(
+                            ctx.session.state['plan'],
+                            get_plan_index(ctx.session.state),
+                            status=PlanStepStatusEnum.FAILED,
+                        )
                         yield update_state_event(ctx, state_delta={'plan': update_plan})
                 else:
                     yield event
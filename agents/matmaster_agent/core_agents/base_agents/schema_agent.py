@@ -20,6 +20,10 @@ from agents.matmaster_agent.utils.event_utils import (
     update_state_event,
 )
 from agents.matmaster_agent.utils.helper_func import extract_json_from_string
+from agents.matmaster_agent.utils.instruction_utils import (
+    apply_invocation_output_schema,
+)
+from agents.matmaster_agent.utils.state_utils import step_state_key
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,15 @@ logger = logging.getLogger(__name__)
 class SchemaAgent(ErrorHandleLlmAgent):
     state_key: Optional[str] = None  # Direct supervisor agent in the hierarchy
 
+    @property
+    @override
+    def canonical_before_model_callbacks(self) -> list:
+        # 本次调用通过 invocation_args 指定的 output_schema 优先于 agent 上的静态 schema
+        return [
+            apply_invocation_output_schema,
+            *super().canonical_before_model_callbacks,
+        ]
+
     @override
     async def _run_events(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         event_exist = False
@@ -60,7 +73,9 @@ class SchemaAgent(ErrorHandleLlmAgent):
                         if self.state_key:
                             yield update_state_event(
                                 ctx,
-                                state_delta={self.state_key: schema_info},
+                                state_delta={
+                                    step_state_key(self.state_key): schema_info
+                                },
                                 event=event,
                             )
                     # 置空 text 消息
@@ -1,6 +1,6 @@
 import copy
 import logging
-from typing import AsyncGenerator, List, Optional, Union, override
+from typing import AsyncGenerator, Optional, Union, override
 
 from google.adk.agents import InvocationContext
 from google.adk.agents.llm_agent import (
@@ -8,13 +8,12 @@ from google.adk.agents.llm_agent import (
     AfterToolCallback,
     BeforeToolCallback,
 )
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.events import Event
 from google.adk.models import BaseLlm
-from google.genai.types import FunctionDeclaration
 from pydantic import computed_field
 
 from agents.matmaster_agent.base_callbacks.private_callback import (
-    inject_function_declarations,
     remove_function_call,
 )
 from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME, ModelRole
@@ -50,9 +49,6 @@ from agents.matmaster_agent.core_agents.comp_agents.recommend_summary_agent.tool
     update_tool_call_info_with_function_declarations,
     update_tool_call_info_with_recommend_params,
 )
-from agents.matmaster_agent.core_agents.comp_agents.tool_connect_agent import (
-    ToolConnectAgent,
-)
 from agents.matmaster_agent.flow_agents.model import PlanStepStatusEnum
 from agents.matmaster_agent.llm_config import MatMasterLlmConfig
 from agents.matmaster_agent.locales import i18n
@@ -63,18 +59,46 @@ from agents.matmaster_agent.prompt import (
     GLOBAL_SCHEMA_INSTRUCTION,
     get_vocabulary_enforce_prompt,
 )
+from agents.matmaster_agent.services.tool_registry import tool_registry
 from agents.matmaster_agent.state import RECOMMEND_PARAMS
 from agents.matmaster_agent.sub_agents.tools import ALL_TOOLS
 from agents.matmaster_agent.utils.event_utils import (
     context_function_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.instruction_utils import (
+    instruction_provider,
+    invocation_args,
+)
+from agents.matmaster_agent.utils.state_utils import get_plan_index, step_state_key
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
 logger.setLevel(logging.INFO)
 
 
+def _render_tool_call_info_instruction(ctx: ReadonlyContext, **kwargs) -> str:
+    return gen_tool_call_info_instruction(**kwargs)
+
+
+def _render_recommend_params_schema_instruction(
+    ctx: ReadonlyContext, tool_doc: str = '', tool_args_recommend_prompt: str = ''
+) -> str:
+    return tool_doc + '\n' + tool_args_recommend_prompt
+
+
+def _summary_instruction_provider(default_instruction: str):
+    # 工具自定义的总结 prompt 优先
+    def render(ctx: ReadonlyContext) -> str:
+        current_step = ctx.state['plan']['steps'][get_plan_index(ctx.state)]
+        custom_prompt = ALL_TOOLS[current_step['tool_name']].get('summary_prompt')
+        if custom_prompt is None:
+            return default_instruction
+        return f"{custom_prompt}\n\n{get_vocabulary_enforce_prompt()}"
+
+    return instruction_provider(render)
+
+
 class BaseAgentWithRecAndSum(
     SubordinateFeaturesMixin, MCPInitMixin, ErrorHandleBaseAgent
 ):
@@ -89,17 +113,10 @@ class BaseAgentWithRecAndSum(
     def _after_init(self):
         agent_prefix = self.name.replace('_agent', '')
 
-        self._tool_connect_agent = ToolConnectAgent(
-            model=self.model,
-            name=f"{agent_prefix}_tool_connect_agent",
-            tools=self.tools,
-            before_model_callback=inject_function_declarations,
-            after_model_callback=remove_function_call,
-        )
-
         self._tool_call_info_agent = DisallowTransferAndContentLimitSchemaAgent(
             model=MatMasterLlmConfig.tool_schema_model,
             name=f"{agent_prefix}_tool_call_info_agent",
+            instruction=instruction_provider(_render_tool_call_info_instruction),
             output_schema=ToolCallInfoSchema,
             state_key='tool_call_info',
         )
@@ -117,6 +134,9 @@ class BaseAgentWithRecAndSum(
                 model=MatMasterLlmConfig.tool_schema_model,
                 name=f"{agent_prefix}_recommend_params_schema_agent",
                 global_instruction=GLOBAL_SCHEMA_INSTRUCTION,
+                instruction=instruction_provider(
+                    _render_recommend_params_schema_instruction
+                ),
                 state_key=RECOMMEND_PARAMS,
             )
         )
@@ -126,7 +146,7 @@ class BaseAgentWithRecAndSum(
                 name=f"{agent_prefix}_summary_agent",
                 description=self.description,
                 global_instruction=GLOBAL_INSTRUCTION,
-                instruction=self.instruction,
+                instruction=_summary_instruction_provider(self.instruction),
                 before_model_callback=filter_summary_llm_contents,
             )
         else:
@@ -135,11 +155,12 @@ class BaseAgentWithRecAndSum(
                 name=f"{agent_prefix}_summary_agent",
                 description='You are an assistant to summarize the task to aware the user.',
                 global_instruction=GLOBAL_INSTRUCTION,
-                instruction=get_subagent_summary_prompt(),
+                instruction=_summary_instruction_provider(
+                    get_subagent_summary_prompt()
+                ),
             )
 
         self.sub_agents = [
-            self.tool_connect_agent,
             self.tool_call_info_agent,
             self.recommend_params_agent,
             self.recommend_params_schema_agent,
@@ -148,11 +169,6 @@ class BaseAgentWithRecAndSum(
 
         return self
 
-    @computed_field
-    @property
-    def tool_connect_agent(self) -> ToolConnectAgent:
-        return self._tool_connect_agent
-
     @computed_field
     @property
     def tool_call_info_agent(self) -> DisallowTransferAndContentLimitSchemaAgent:
@@ -179,26 +195,25 @@ class BaseAgentWithRecAndSum(
     async def _run_events(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         # 根据计划来
         current_step = ctx.session.state['plan']['steps'][
-            ctx.session.state['plan_index']
+            get_plan_index(ctx.session.state)
         ]
         current_step_tool_name = current_step['tool_name']
 
-        # 连接 tool-server，获取doc和函数声明
-        async for tool_connect_evenet in self.tool_connect_agent.run_async(ctx):
-            yield tool_connect_evenet
-
-        # 根据用户问题先推荐一轮
-        function_declarations: List[FunctionDeclaration] = ctx.session.state[
-            'function_declarations'
-        ]
+        # 从共享的声明缓存中获取 doc 和函数声明（首次使用时连接 tool-server）
+        function_declaration = await tool_registry.get(
+            ctx, self.tools, current_step_tool_name
+        )
         logger.info(
-            f'{ctx.session.id} function_declarations = {function_declarations}, current_step_tool_name = {current_step_tool_name}'
+            f'{ctx.session.id} current_step_tool_name = {current_step_tool_name}, found = {function_declaration is not None}'
         )
-        current_function_declaration = [
-            item
-            for item in function_declarations
-            if item['name'] == current_step_tool_name
-        ]
+        if function_declaration is None:
+            # 刷新后仍找不到：工具已下线或 tool-server 不可用，本步骤按失败处理
+            raise RuntimeError(
+                f'Function declaration of `{current_step_tool_name}` not found in {self.name} toolsets'
+            )
+        current_function_declaration = [function_declaration]
+
+        # 根据用户问题先推荐一轮
 
         tool_doc = current_function_declaration[0]['description']
         tool_schema = current_function_declaration[0]['parameters']
@@ -213,27 +228,31 @@ class BaseAgentWithRecAndSum(
             'args_setting', ''
         )
 
-        self.tool_call_info_agent.instruction = gen_tool_call_info_instruction(
-            user_prompt=current_step['description'],
-            agent_prompt=self.instruction,
-            tool_doc=tool_doc,
-            tool_schema=tool_schema,
-            tool_args_recommend_prompt=tool_args_recommend_prompt,
-        )
         logger.info(
             f'{ctx.session.id} current_function_declaration = {current_function_declaration}'
         )
         current_function_declaration[0]['parameters']['required'] = (
             current_function_declaration[0]['parameters'].get('required', [])
         )
-        _, self.tool_call_info_agent.output_schema = create_tool_args_schema(
+        _, tool_call_info_schema = create_tool_args_schema(
             current_function_declaration[0]['parameters']['required'],
             current_function_declaration,
         )
-        async for tool_call_info_event in self.tool_call_info_agent.run_async(ctx):
-            yield tool_call_info_event
+        with invocation_args(
+            self.tool_call_info_agent.name,
+            output_schema=tool_call_info_schema,
+            user_prompt=current_step['description'],
+            agent_prompt=self.instruction,
+            tool_doc=tool_doc,
+            tool_schema=tool_schema,
+            tool_args_recommend_prompt=tool_args_recommend_prompt,
+        ):
+            async for tool_call_info_event in self.tool_call_info_agent.run_async(ctx):
+                yield tool_call_info_event
 
-        update_tool_call_info = copy.deepcopy(ctx.session.state['tool_call_info'])
+        update_tool_call_info = copy.deepcopy(
+            ctx.session.state[step_state_key('tool_call_info')]
+        )
         update_tool_call_info['tool_name'] = update_tool_call_info.get('tool_name', '')
         update_tool_call_info['tool_args'] = update_tool_call_info.get('tool_args', {})
         update_tool_call_info['missing_tool_args'] = update_tool_call_info.get(
@@ -242,25 +261,27 @@ class BaseAgentWithRecAndSum(
 
         # modify tool_name
         if (
-            ctx.session.state['tool_call_info']['tool_name']
+            ctx.session.state[step_state_key('tool_call_info')]['tool_name']
             != current_step['tool_name']
         ):
             update_tool_call_info['tool_name'] = current_step_tool_name
 
         # remove functions. prefix
-        if ctx.session.state['tool_call_info']['tool_name'].startswith('functions.'):
+        if ctx.session.state[step_state_key('tool_call_info')]['tool_name'].startswith(
+            'functions.'
+        ):
             logger.warning(
-                f'{ctx.session.id} Detect wrong tool_name: {ctx.session.state['tool_call_info']['tool_name']}'
+                f'{ctx.session.id} Detect wrong tool_name: {ctx.session.state[step_state_key('tool_call_info')]['tool_name']}'
             )
             update_tool_call_info['tool_name'] = update_tool_call_info[
                 'tool_name'
             ].replace('functions.', '')
 
         yield update_state_event(
-            ctx, state_delta={'tool_call_info': update_tool_call_info}
+            ctx, state_delta={step_state_key('tool_call_info'): update_tool_call_info}
         )
 
-        tool_call_info = ctx.session.state['tool_call_info']
+        tool_call_info = ctx.session.state[step_state_key('tool_call_info')]
         logger.info(
             f'{ctx.session.id} tool_call_info = {tool_call_info}, '
             f'current_function_declaration = {current_function_declaration}'
@@ -268,7 +289,9 @@ class BaseAgentWithRecAndSum(
         tool_call_info = update_tool_call_info_with_function_declarations(
             tool_call_info, current_function_declaration
         )
-        yield update_state_event(ctx, state_delta={'tool_call_info': tool_call_info})
+        yield update_state_event(
+            ctx, state_delta={step_state_key('tool_call_info'): tool_call_info}
+        )
 
         logger.info(
             f'{ctx.session.id} tool_call_info_with_function_declarations = {tool_call_info}'
@@ -285,40 +308,45 @@ class BaseAgentWithRecAndSum(
             ):
                 yield recommend_params_event
 
-            self.recommend_params_schema_agent.instruction = (
-                tool_doc + '\n' + tool_args_recommend_prompt
-            )
-            self.recommend_params_schema_agent.output_schema, _ = (
-                create_tool_args_schema(missing_tool_args, current_function_declaration)
+            recommend_params_schema, _ = create_tool_args_schema(
+                missing_tool_args, current_function_declaration
             )
-            async for (
-                recommend_params_schema_event
-            ) in self.recommend_params_schema_agent.run_async(ctx):
-                yield recommend_params_schema_event
+            with invocation_args(
+                self.recommend_params_schema_agent.name,
+                output_schema=recommend_params_schema,
+                tool_doc=tool_doc,
+                tool_args_recommend_prompt=tool_args_recommend_prompt,
+            ):
+                async for (
+                    recommend_params_schema_event
+                ) in self.recommend_params_schema_agent.run_async(ctx):
+                    yield recommend_params_schema_event
 
-            recommend_params = ctx.session.state[RECOMMEND_PARAMS]
+            recommend_params = ctx.session.state[step_state_key(RECOMMEND_PARAMS)]
             tool_call_info = update_tool_call_info_with_recommend_params(
                 tool_call_info, recommend_params
             )
             yield update_state_event(
-                ctx, state_delta={'tool_call_info': tool_call_info}
+                ctx, state_delta={step_state_key('tool_call_info'): tool_call_info}
             )
             logger.info(
-                f'{ctx.session.id} tool_call_info_with_recommend_params = {ctx.session.state['tool_call_info']}'
+                f'{ctx.session.id} tool_call_info_with_recommend_params = {ctx.session.state[step_state_key('tool_call_info')]}'
             )
 
         # 前置 tool_hallucination 为 False
-        yield update_state_event(ctx, state_delta={'tool_hallucination': False})
+        yield update_state_event(
+            ctx, state_delta={step_state_key('tool_hallucination'): False}
+        )
         for _ in range(2):
             async for submit_event in self.submit_agent.run_async(ctx):
                 yield submit_event
 
-            if not ctx.session.state['tool_hallucination']:
+            if not ctx.session.state[step_state_key('tool_hallucination')]:
                 break
 
-        step_title = ctx.session.state.get('step_title', {}).get(
+        step_title = ctx.session.state.get(step_state_key('step_title'), {}).get(
             'title',
-            f"{i18n.t(ctx.session.state['separate_card_info'])} {ctx.session.state['plan_index'] + 1}: {current_step_tool_name}",
+            f"{i18n.t(ctx.session.state.get(step_state_key('separate_card_info'), ''))} {get_plan_index(ctx.session.state) + 1}: {current_step_tool_name}",
         )
         for matmaster_flow_event in context_function_event(
             ctx,
@@ -337,13 +365,6 @@ class BaseAgentWithRecAndSum(
             yield matmaster_flow_event
         yield update_state_event(ctx, state_delta={'matmaster_flow_active': None})
 
-        # TODO: needs a better way to handle customized summary prompt
-        if ALL_TOOLS[current_step_tool_name].get('summary_prompt') is not None:
-            custom_prompt = ALL_TOOLS[current_step_tool_name].get('summary_prompt')
-            self.summary_agent.instruction = (
-                f"{custom_prompt}\n\n{get_vocabulary_enforce_prompt()}"
-            )
-
         if current_step['status'] != PlanStepStatusEnum.SUBMITTED:
             async for summary_event in self.summary_agent.run_async(ctx):
                 yield summary_event
@@ -10,12 +10,14 @@ from agents.matmaster_agent.core_agents.base_agents.error_agent import (
 )
 from agents.matmaster_agent.locales import i18n
 from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.state import ERROR_OCCURRED
 from agents.matmaster_agent.style import tool_retry_failed_card
 from agents.matmaster_agent.utils.event_utils import (
     all_text_event,
     context_function_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.state_utils import step_state_key
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -27,23 +29,23 @@ class ValidatorAgent(ErrorHandleBaseAgent):
 
     @override
     async def _run_events(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        if ctx.session.state['error_occurred']:
+        if ctx.session.state.get(step_state_key(ERROR_OCCURRED)):
             return
 
-        if (
-            ctx.session.state[self.validator_key]
-            > ctx.session.state[f'{self.validator_key}_ori']
-        ):
+        count_key = step_state_key(self.validator_key)
+        ori_key = step_state_key(f'{self.validator_key}_ori')
+        hallucination_key = step_state_key('tool_hallucination')
+        if ctx.session.state.get(count_key, 0) > ctx.session.state.get(ori_key, 0):
             yield update_state_event(
                 ctx,
                 state_delta={
-                    f'{self.validator_key}_ori': ctx.session.state[self.validator_key],
-                    'tool_hallucination': False,
+                    ori_key: ctx.session.state.get(count_key, 0),
+                    hallucination_key: False,
                 },
             )
             yield Event(author=self.name)
         else:
-            if not ctx.session.state['tool_hallucination']:  # 第一次重试
+            if not ctx.session.state.get(hallucination_key):  # 第一次重试
                 message = i18n.t('ToolInvocateHallucinationAction')
                 for tool_hallucination_event in context_function_event(
                     ctx,
@@ -58,7 +60,7 @@ class ValidatorAgent(ErrorHandleBaseAgent):
                 yield update_state_event(
                     ctx,
                     state_delta={
-                        'tool_hallucination': True,
+                        hallucination_key: True,
                     },
                 )
             else:  # 第二次重试
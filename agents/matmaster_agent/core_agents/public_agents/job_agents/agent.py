@@ -32,6 +32,7 @@ from agents.matmaster_agent.utils.event_utils import (
     context_function_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.state_utils import get_plan_index, step_state_key
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -133,7 +134,7 @@ class BaseAsyncJobAgent(BaseAgentWithRecAndSum):
             yield result_event
 
         current_step = ctx.session.state['plan']['steps'][
-            ctx.session.state['plan_index']
+            get_plan_index(ctx.session.state)
         ]
         current_step_tool_name = current_step['tool_name']
         current_step_status = current_step['status']
@@ -142,9 +143,9 @@ class BaseAsyncJobAgent(BaseAgentWithRecAndSum):
             PlanStepStatusEnum.FAILED,
         ]:
             # Only Query Job Result
-            step_title = ctx.session.state.get('step_title', {}).get(
+            step_title = ctx.session.state.get(step_state_key('step_title'), {}).get(
                 'title',
-                f"{i18n.t(ctx.session.state['separate_card_info'])} {ctx.session.state['plan_index'] + 1}: {current_step_tool_name}",
+                f"{i18n.t(ctx.session.state.get(step_state_key('separate_card_info'), ''))} {get_plan_index(ctx.session.state) + 1}: {current_step_tool_name}",
             )
             for matmaster_flow_event in context_function_event(
                 ctx,
@@ -1,4 +1,4 @@
-import copy
+import asyncio
 import json
 import logging
 import os
@@ -12,6 +12,7 @@ from agents.matmaster_agent.base_callbacks.private_callback import (
     _inject_ak,
     _inject_projectId,
 )
+from agents.matmaster_agent.config import JOB_POLL_CONCURRENCY
 from agents.matmaster_agent.constant import (
     FRONTEND_STATE_KEY,
     JOB_RESULT_KEY,
@@ -27,7 +28,7 @@ from agents.matmaster_agent.core_agents.public_agents.job_agents.result_core_age
 )
 from agents.matmaster_agent.logger import PrefixFilter
 from agents.matmaster_agent.services.job import (
-    get_job_detail,
+    get_job_details,
     parse_and_prepare_err,
     parse_and_prepare_results,
 )
@@ -48,6 +49,11 @@ from agents.matmaster_agent.utils.result_parse_utils import (
     matrix_to_markdown_table,
     parse_result,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    get_plan_index,
+    update_job,
+    update_plan_step,
+)
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -66,6 +72,33 @@ class ResultMCPAgent(MCPAgent):
 
         return data
 
+    async def _prepare_job_result(
+        self,
+        ctx: InvocationContext,
+        job_id: str,
+        status: str,
+        access_key: str,
+        semaphore: asyncio.Semaphore,
+    ):
+        async with semaphore:
+            if status == 'Failed':  # Job Failed
+                dict_result = await parse_and_prepare_err(
+                    job_id=job_id, access_key=access_key, session_id=ctx.session.id
+                )
+            else:  # Job Success
+                dict_result = await parse_and_prepare_results(
+                    job_id=job_id, access_key=access_key, session_id=ctx.session.id
+                )
+        logger.info(f"{ctx.session.id} dict_result = {dict_result}")
+
+        if self.enable_tgz_unpack:
+            tgz_flag, new_tool_result = await update_tgz_dict(
+                dict_result, session_id=ctx.session.id
+            )
+        else:
+            new_tool_result = dict_result
+        return await parse_result(ctx, new_tool_result)
+
     @override
     async def _run_events(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         logger.info(f"{ctx.session.id} state: {ctx.session.state}")
@@ -80,10 +113,11 @@ class ResultMCPAgent(MCPAgent):
             access_key, Executor, BohriumStorge = _inject_ak(
                 ctx, get_DFlowExecutor(), get_BohriumStorage()
             )
-            project_id, Executor, BohriumStorge = _inject_projectId(
+            project_id, Executor, BohriumStorge = await _inject_projectId(
                 ctx, Executor, BohriumStorge
             )
 
+        pending_jobs = []
         for origin_job_id in list(ctx.session.state['long_running_jobs'].keys()):
             # 检查是否需要跳过当前长运行任务的处理
             if ctx.session.state['long_running_jobs'][origin_job_id]['job_in_ctx']:
@@ -105,9 +139,46 @@ class ResultMCPAgent(MCPAgent):
                 ):
                     continue
 
-            job_id = ctx.session.state['long_running_jobs'][origin_job_id]['job_id']
-            query_res = await get_job_detail(job_id=job_id, access_key=access_key)
-            status = mapping_status(query_res.get('data', {}).get('status', -999))
+            pending_jobs.append(
+                (
+                    origin_job_id,
+                    ctx.session.state['long_running_jobs'][origin_job_id]['job_id'],
+                )
+            )
+
+        # 并发查询所有任务状态，已结束任务的结果收集在后台并行进行
+        job_details = await get_job_details(
+            [job_id for _, job_id in pending_jobs], access_key
+        )
+        job_statuses = {
+            job_id: mapping_status(
+                job_details[job_id].get('data', {}).get('status', -999)
+            )
+            for _, job_id in pending_jobs
+        }
+        semaphore = asyncio.Semaphore(JOB_POLL_CONCURRENCY)
+        prepare_tasks = {
+            job_id: asyncio.create_task(
+                self._prepare_job_result(ctx, job_id, status, access_key, semaphore)
+            )
+            for job_id, status in job_statuses.items()
+            if status != 'Running'
+        }
+        try:
+            async for event in self._emit_job_events(
+                ctx, pending_jobs, job_statuses, prepare_tasks, Executor
+            ):
+                yield event
+        finally:
+            for task in prepare_tasks.values():
+                task.cancel()
+        yield Event(author=self.name, invocation_id=ctx.invocation_id)
+
+    async def _emit_job_events(
+        self, ctx, pending_jobs, job_statuses, prepare_tasks, Executor
+    ) -> AsyncGenerator[Event, None]:
+        for origin_job_id, job_id in pending_jobs:
+            status = job_statuses[job_id]
             logger.info(
                 f'{ctx.session.id} origin_job_id = {origin_job_id}, executor = {Executor}, '
                 f'status = {status}'
@@ -115,18 +186,19 @@ class ResultMCPAgent(MCPAgent):
             if status != 'Running':
                 # 更新状态
                 plan_status = 'success' if status == 'Finished' else 'failed'
-                update_plan = copy.deepcopy(ctx.session.state['plan'])
                 logger.info(
-                    f'{ctx.session.id} plan_index = {ctx.session.state['plan_index']}'
+                    f'{ctx.session.id} plan_index = {get_plan_index(ctx.session.state)}'
                 )
-                update_plan['steps'][ctx.session.state['plan_index']][
-                    'status'
-                ] = plan_status
-
-                update_long_running_jobs = copy.deepcopy(
-                    ctx.session.state['long_running_jobs']
+                update_plan = update_plan_step(
+                    ctx.session.state['plan'],
+                    get_plan_index(ctx.session.state),
+                    status=plan_status,
+                )
+                update_long_running_jobs = update_job(
+                    ctx.session.state['long_running_jobs'],
+                    origin_job_id,
+                    job_status=status,
                 )
-                update_long_running_jobs[origin_job_id]['job_status'] = status
                 yield update_state_event(
                     ctx,
                     state_delta={
@@ -136,33 +208,16 @@ class ResultMCPAgent(MCPAgent):
                 )
 
                 # 获取任务结果
-                if status == 'Failed':  # Job Failed
-                    dict_result = await parse_and_prepare_err(
-                        job_id=job_id, access_key=access_key
-                    )
-                else:  # Job Success
-                    dict_result = await parse_and_prepare_results(
-                        job_id=job_id, access_key=access_key
-                    )
-                logger.info(f"{ctx.session.id} dict_result = {dict_result}")
-
-                if self.enable_tgz_unpack:
-                    tgz_flag, new_tool_result = await update_tgz_dict(
-                        dict_result, session_id=ctx.session.id
-                    )
-                else:
-                    new_tool_result = dict_result
-                parsed_tool_result = await parse_result(ctx, new_tool_result)
+                parsed_tool_result = await prepare_tasks[job_id]
                 logger.info(
                     f'{ctx.session.id} parsed_tool_result = {parsed_tool_result}'
                 )
 
-                update_long_running_jobs = copy.deepcopy(
-                    ctx.session.state['long_running_jobs']
+                update_long_running_jobs = update_job(
+                    ctx.session.state['long_running_jobs'],
+                    origin_job_id,
+                    job_result=parsed_tool_result,
                 )
-                update_long_running_jobs[origin_job_id][
-                    'job_result'
-                ] = parsed_tool_result
                 yield update_state_event(
                     ctx,
                     state_delta={'long_running_jobs': update_long_running_jobs},
@@ -257,13 +312,12 @@ class ResultMCPAgent(MCPAgent):
                 ):
                     yield event
 
-                update_long_running_jobs = copy.deepcopy(
-                    ctx.session.state['long_running_jobs']
+                update_long_running_jobs = update_job(
+                    ctx.session.state['long_running_jobs'],
+                    origin_job_id,
+                    job_in_ctx=True,
+                    last_invocation_id=ctx.invocation_id,
                 )
-                update_long_running_jobs[origin_job_id]['job_in_ctx'] = True
-                update_long_running_jobs[origin_job_id][
-                    'last_invocation_id'
-                ] = ctx.invocation_id
                 yield update_state_event(
                     ctx,
                     state_delta={'long_running_jobs': update_long_running_jobs},
@@ -277,4 +331,3 @@ class ResultMCPAgent(MCPAgent):
                 ModelRole,
             ):
                 yield event
-        yield Event(author=self.name, invocation_id=ctx.invocation_id)
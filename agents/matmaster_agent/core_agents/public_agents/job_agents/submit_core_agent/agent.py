@@ -1,4 +1,3 @@
-import copy
 import logging
 from typing import AsyncGenerator, override
 
@@ -40,6 +39,12 @@ from agents.matmaster_agent.utils.io_oss import update_tgz_dict
 from agents.matmaster_agent.utils.result_parse_utils import (
     parse_result,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    get_plan_index,
+    set_job,
+    step_state_key,
+    update_plan_step,
+)
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -63,9 +68,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                 yield update_state_event(
                     ctx,
                     state_delta={
-                        'long_running_jobs_count': ctx.session.state[
+                        step_state_key(
                             'long_running_jobs_count'
-                        ]
+                        ): ctx.session.state.get(
+                            step_state_key('long_running_jobs_count'), 0
+                        )
                         + 1
                     },
                     event=event,
@@ -99,10 +106,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                             yield tool_response_failed_event
 
                         # 更新 plan 为失败
-                        update_plan = copy.deepcopy(ctx.session.state['plan'])
-                        update_plan['steps'][ctx.session.state['plan_index']][
-                            'status'
-                        ] = 'failed'
+                        update_plan = update_plan_step(
+                            ctx.session.state['plan'],
+                            get_plan_index(ctx.session.state),
+                            status='failed',
+                        )
                         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
                         raise RuntimeError('Tool Execution Failed')
@@ -168,9 +176,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                         yield update_state_event(
                             ctx,
                             state_delta={
-                                'long_running_jobs_count': ctx.session.state[
+                                step_state_key(
                                     'long_running_jobs_count'
-                                ]
+                                ): ctx.session.state.get(
+                                    step_state_key('long_running_jobs_count'), 0
+                                )
                                 + 1,
                             },
                         )
@@ -189,10 +199,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                                     yield tool_response_failed_event
 
                                 # 更新 plan 为失败
-                                update_plan = copy.deepcopy(ctx.session.state['plan'])
-                                update_plan['steps'][ctx.session.state['plan_index']][
-                                    'status'
-                                ] = 'failed'
+                                update_plan = update_plan_step(
+                                    ctx.session.state['plan'],
+                                    get_plan_index(ctx.session.state),
+                                    status='failed',
+                                )
                                 yield update_state_event(
                                     ctx, state_delta={'plan': update_plan}
                                 )
@@ -236,10 +247,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                                 workflow_url=workflow_url,
                             ).model_dump(mode='json')
 
-                        update_long_running_jobs = copy.deepcopy(
-                            ctx.session.state['long_running_jobs']
+                        update_long_running_jobs = set_job(
+                            ctx.session.state['long_running_jobs'],
+                            origin_job_id,
+                            frontend_result,
                         )
-                        update_long_running_jobs[origin_job_id] = frontend_result
                         yield update_state_event(
                             ctx,
                             state_delta={
@@ -264,7 +276,7 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                     and event.content.parts[0].text
                     == 'All Function Calls Are Occurred Before, Continue'
                     and ctx.session.state[PLAN]['steps'][
-                        ctx.session.state['plan_index']
+                        get_plan_index(ctx.session.state)
                     ]['status']
                     == PlanStepStatusEnum.PROCESS
                 ):
@@ -272,10 +284,11 @@ class SubmitCoreMCPAgent(DisallowTransferAndContentLimitMCPAgent):
                         ctx, self.name, '工具参数无变化，本次跳过执行', ModelRole
                     ):
                         yield _info_event
-                    update_plan = copy.deepcopy(ctx.session.state['plan'])
-                    update_plan['steps'][ctx.session.state['plan_index']][
-                        'status'
-                    ] = PlanStepStatusEnum.FAILED
+                    update_plan = update_plan_step(
+                        ctx.session.state['plan'],
+                        get_plan_index(ctx.session.state),
+                        status=PlanStepStatusEnum.FAILED,
+                    )
                     yield update_state_event(ctx, state_delta={'plan': update_plan})
             else:
                 yield event
@@ -1,11 +1,13 @@
+import asyncio
 import copy
 import json
 import logging
 import re
 from asyncio import CancelledError
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from google.adk.agents import InvocationContext, LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.events import Event
 from opik.integrations.adk import track_adk_agent_recursive
 from pydantic import computed_field, model_validator
@@ -13,6 +15,10 @@ from pydantic import computed_field, model_validator
 from agents.matmaster_agent.base_callbacks.private_callback import (
     remove_function_call,
 )
+from agents.matmaster_agent.config import (
+    EXECUTION_AGENT_POOL_MAX_KEYS,
+    PIPELINE_PRE_PLANNING,
+)
 from agents.matmaster_agent.constant import CURRENT_ENV, MATMASTER_AGENT_NAME, ModelRole
 from agents.matmaster_agent.core_agents.base_agents.error_agent import (
     ErrorHandleBaseAgent,
@@ -41,6 +47,10 @@ from agents.matmaster_agent.flow_agents.constant import (
 )
 from agents.matmaster_agent.flow_agents.execution_agent.agent import (
     MatMasterSupervisorAgent,
+    render_step_validation_instruction,
+)
+from agents.matmaster_agent.flow_agents.execution_agent.pool import (
+    ExecutionAgentPool,
 )
 from agents.matmaster_agent.flow_agents.expand_agent.agent import ExpandAgent
 from agents.matmaster_agent.flow_agents.expand_agent.constant import EXPAND_AGENT
@@ -53,6 +63,11 @@ from agents.matmaster_agent.flow_agents.intent_agent.constant import INTENT_AGEN
 from agents.matmaster_agent.flow_agents.intent_agent.model import IntentEnum
 from agents.matmaster_agent.flow_agents.intent_agent.prompt import INTENT_INSTRUCTION
 from agents.matmaster_agent.flow_agents.intent_agent.schema import IntentSchema
+from agents.matmaster_agent.flow_agents.pipeline import (
+    SpeculativeStage,
+    StageTimer,
+    snapshot_ctx,
+)
 from agents.matmaster_agent.flow_agents.plan_confirm_agent.constant import (
     PLAN_CONFIRM_AGENT,
 )
@@ -88,16 +103,6 @@ from agents.matmaster_agent.flow_agents.scene_agent.constant import SCENE_AGENT
 from agents.matmaster_agent.flow_agents.scene_agent.prompt import SCENE_INSTRUCTION
 from agents.matmaster_agent.flow_agents.scene_agent.schema import SceneSchema
 from agents.matmaster_agent.flow_agents.schema import FlowStatusEnum
-from agents.matmaster_agent.flow_agents.step_title_agent.callback import (
-    filter_llm_contents,
-)
-from agents.matmaster_agent.flow_agents.step_title_agent.prompt import (
-    STEP_TITLE_INSTRUCTION,
-)
-from agents.matmaster_agent.flow_agents.step_title_agent.schema import StepTitleSchema
-from agents.matmaster_agent.flow_agents.step_validation_agent.prompt import (
-    STEP_VALIDATION_INSTRUCTION,
-)
 from agents.matmaster_agent.flow_agents.step_validation_agent.schema import (
     StepValidationSchema,
 )
@@ -105,6 +110,7 @@ from agents.matmaster_agent.flow_agents.utils import (
     check_plan,
     get_tools_list,
     should_bypass_confirmation,
+    tools_info_prompt,
 )
 from agents.matmaster_agent.llm_config import MatMasterLlmConfig
 from agents.matmaster_agent.locales import i18n
@@ -134,16 +140,85 @@ from agents.matmaster_agent.utils.event_utils import (
     send_error_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.instruction_utils import (
+    instruction_provider,
+    invocation_args,
+)
 from agents.matmaster_agent.utils.io_oss import (
     ReportUploadParams,
     upload_report_md_to_oss,
 )
+from agents.matmaster_agent.utils.state_utils import clear_step_state
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
 logger.setLevel(logging.INFO)
 
 
+def _render_expand_instruction(ctx: ReadonlyContext, examples_prompt: str = '') -> str:
+    return EXPAND_INSTRUCTION + examples_prompt
+
+
+def _render_scene_instruction(
+    ctx: ReadonlyContext, update_user_content: str = '', examples_prompt: str = ''
+) -> str:
+    return SCENE_INSTRUCTION + update_user_content + examples_prompt
+
+
+def _render_plan_make_instruction(
+    ctx: ReadonlyContext,
+    available_tools: tuple[str, ...] = (),
+    update_user_content: str = '',
+    toolchain_examples_prompt: str = '',
+) -> str:
+    return get_plan_make_instruction(
+        tools_info_prompt(available_tools)
+        + update_user_content
+        + toolchain_examples_prompt
+    )
+
+
+def _render_analysis_instruction(ctx: ReadonlyContext) -> str:
+    return get_analysis_instruction(ctx.state['plan'])
+
+
+def _render_report_instruction(ctx: ReadonlyContext) -> str:
+    return get_report_instruction(ctx.state.get('plan', {}))
+
+
+def build_execution_agent(agent_names: tuple[str, ...]) -> MatMasterSupervisorAgent:
+    step_validation_agent = DisallowTransferAndContentLimitSchemaAgent(
+        name='step_validation_agent',
+        model=MatMasterLlmConfig.tool_schema_model,
+        description='校验步骤执行结果是否合理',
+        instruction=instruction_provider(render_step_validation_instruction),
+        output_schema=StepValidationSchema,
+        state_key='step_validation',
+        after_model_callback=MatMasterLlmConfig.opik_tracer.after_model_callback,
+    )
+    sub_agents = [
+        AGENT_CLASS_MAPPING[agent_name](MatMasterLlmConfig)
+        for agent_name in agent_names
+        if agent_name in AGENT_CLASS_MAPPING
+    ]
+
+    execution_agent = MatMasterSupervisorAgent(
+        name='execution_agent',
+        model=MatMasterLlmConfig.default_litellm_model,
+        description='根据 materials_plan 返回的计划进行总结',
+        instruction='',
+        sub_agents=sub_agents + [step_validation_agent],
+    )
+    # 实例入池复用，追踪回调只在构建时挂载一次
+    track_adk_agent_recursive(execution_agent, MatMasterLlmConfig.opik_tracer)
+    return execution_agent
+
+
+execution_agent_pool = ExecutionAgentPool(
+    build_execution_agent, max_keys=EXECUTION_AGENT_POOL_MAX_KEYS
+)
+
+
 class MatMasterFlowAgent(LlmAgent):
     @model_validator(mode='after')
     def after_init(self):
@@ -173,7 +248,7 @@ class MatMasterFlowAgent(LlmAgent):
             name=EXPAND_AGENT,
             model=MatMasterLlmConfig.tool_schema_model,
             description='扩写用户的问题',
-            instruction=EXPAND_INSTRUCTION,
+            instruction=instruction_provider(_render_expand_instruction),
             output_schema=ExpandSchema,
             state_key=EXPAND,
         )
@@ -182,7 +257,7 @@ class MatMasterFlowAgent(LlmAgent):
             name=SCENE_AGENT,
             model=MatMasterLlmConfig.tool_schema_model,
             description='把用户的问题划分到特定的场景',
-            instruction=SCENE_INSTRUCTION,
+            instruction=instruction_provider(_render_scene_instruction),
             output_schema=SceneSchema,
             state_key='single_scenes',
         )
@@ -191,6 +266,7 @@ class MatMasterFlowAgent(LlmAgent):
             name=PLAN_MAKE_AGENT,
             model=MatMasterLlmConfig.tool_schema_model,
             description='根据用户的问题依据现有工具执行计划，如果没有工具可用，告知用户，不要自己制造工具或幻想',
+            instruction=instruction_provider(_render_plan_make_instruction),
             state_key=MULTI_PLANS,
             before_model_callback=filter_plan_make_llm_contents,
         )
@@ -215,14 +291,12 @@ class MatMasterFlowAgent(LlmAgent):
             before_model_callback=filter_plan_info_llm_contents,
         )
 
-        self._execution_agent = None
-
         self._analysis_agent = DisallowTransferAndContentLimitLlmAgent(
             name='execution_summary_agent',
             model=MatMasterLlmConfig.default_litellm_model,
             global_instruction='使用 {target_language} 回答',
             description=f'总结本轮的计划执行情况\n格式要求: \n{HUMAN_FRIENDLY_FORMAT_REQUIREMENT}',
-            instruction='',
+            instruction=instruction_provider(_render_analysis_instruction),
         )
 
         self._report_agent = DisallowTransferAndContentLimitLlmAgent(
@@ -230,7 +304,7 @@ class MatMasterFlowAgent(LlmAgent):
             model=MatMasterLlmConfig.default_litellm_model,
             global_instruction=ChatAgentGlobalInstruction,
             description='根据完整的上下文，生成markdown总结文档',
-            instruction='',
+            instruction=instruction_provider(_render_report_instruction),
         )
 
         self.sub_agents = [
@@ -288,11 +362,6 @@ class MatMasterFlowAgent(LlmAgent):
     def plan_confirm_agent(self) -> LlmAgent:
         return self._plan_confirm_agent
 
-    @computed_field
-    @property
-    def execution_agent(self) -> LlmAgent:
-        return self._execution_agent
-
     @computed_field
     @property
     def analysis_agent(self) -> LlmAgent:
@@ -303,29 +372,7 @@ class MatMasterFlowAgent(LlmAgent):
     def report_agent(self) -> LlmAgent:
         return self._report_agent
 
-    def _build_execution_agent_for_plan(
-        self, ctx: InvocationContext
-    ) -> MatMasterSupervisorAgent:
-        step_validation_agent = DisallowTransferAndContentLimitSchemaAgent(
-            name='step_validation_agent',
-            model=MatMasterLlmConfig.tool_schema_model,
-            description='校验步骤执行结果是否合理',
-            instruction=STEP_VALIDATION_INSTRUCTION,
-            output_schema=StepValidationSchema,
-            state_key='step_validation',
-            after_model_callback=MatMasterLlmConfig.opik_tracer.after_model_callback,
-        )
-        step_title_agent = DisallowTransferAndContentLimitSchemaAgent(
-            name='step_title_agent',
-            model=MatMasterLlmConfig.tool_schema_model,
-            global_instruction=GLOBAL_INSTRUCTION,
-            description='给出每一步的标题',
-            instruction=STEP_TITLE_INSTRUCTION,
-            output_schema=StepTitleSchema,
-            state_key='step_title',
-            before_model_callback=filter_llm_contents,
-            after_model_callback=MatMasterLlmConfig.opik_tracer.after_model_callback,
-        )
+    def _plan_agent_names(self, ctx: InvocationContext) -> list[str]:
         plan_steps = ctx.session.state.get('plan', {}).get('steps', [])
         agent_names = []
         for step in plan_steps:
@@ -335,28 +382,13 @@ class MatMasterFlowAgent(LlmAgent):
             belonging_agent = ALL_TOOLS.get(tool_name, {}).get('belonging_agent')
             if belonging_agent and belonging_agent not in agent_names:
                 agent_names.append(belonging_agent)
-
-        sub_agents = [
-            AGENT_CLASS_MAPPING[agent_name](MatMasterLlmConfig)
-            for agent_name in agent_names
-            if agent_name in AGENT_CLASS_MAPPING
-        ]
-
-        execution_agent = MatMasterSupervisorAgent(
-            name='execution_agent',
-            model=MatMasterLlmConfig.default_litellm_model,
-            description='根据 materials_plan 返回的计划进行总结',
-            instruction='',
-            sub_agents=sub_agents + [step_title_agent] + [step_validation_agent],
-        )
-        track_adk_agent_recursive(execution_agent, MatMasterLlmConfig.opik_tracer)
-        return execution_agent
+        return agent_names
 
     async def _run_expand_agent(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         # 1. 检索 ICL 示例
-        icl_examples = select_examples(
+        icl_examples = await select_examples(
             ctx.user_content.parts[0].text,
             ctx.session.id,
             CURRENT_ENV,
@@ -364,25 +396,27 @@ class MatMasterFlowAgent(LlmAgent):
         )
         EXPAND_INPUT_EXAMPLES_PROMPT = expand_input_examples(icl_examples)
         logger.info(f'{ctx.session.id} {EXPAND_INPUT_EXAMPLES_PROMPT}')
-        # 2. 动态构造 instruction
-        self.expand_agent.instruction = (
-            EXPAND_INSTRUCTION + EXPAND_INPUT_EXAMPLES_PROMPT
-        )
-        # 3. 运行 Agent
-        async for expand_event in self.expand_agent.run_async(ctx):
-            yield expand_event
+        # 2. 运行 Agent，instruction 在调用 LLM 时按本次的示例渲染
+        with invocation_args(
+            self.expand_agent.name, examples_prompt=EXPAND_INPUT_EXAMPLES_PROMPT
+        ):
+            async for expand_event in self.expand_agent.run_async(ctx):
+                yield expand_event
 
-    async def _build_icl_prompt(self, ctx: InvocationContext):
+    async def _build_icl_prompt(
+        self, ctx: InvocationContext, icl_update_examples: Optional[list] = None
+    ):
         UPDATE_USER_CONTENT = (
             '\nUSER INPUT FOR THIS TASK:\n'
             + ctx.session.state['expand']['update_user_content']
         )
-        icl_update_examples = select_update_examples(
-            ctx.session.state['expand']['update_user_content'],
-            ctx.session.id,
-            CURRENT_ENV,
-            logger,
-        )
+        if icl_update_examples is None:
+            icl_update_examples = await select_update_examples(
+                ctx.session.state['expand']['update_user_content'],
+                ctx.session.id,
+                CURRENT_ENV,
+                logger,
+            )
         SCENE_EXAMPLES_PROMPT = scene_tags_from_examples(icl_update_examples)
         TOOLCHAIN_EXAMPLES_PROMPT = toolchain_from_examples(icl_update_examples)
         logger.info(f'{ctx.session.id} {SCENE_EXAMPLES_PROMPT}')
@@ -393,15 +427,16 @@ class MatMasterFlowAgent(LlmAgent):
     async def _run_scene_agent(
         self, ctx: InvocationContext, UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT
     ) -> AsyncGenerator[Event, None]:
-        # 2. 动态构造 instruction
-        self.scene_agent.instruction = (
-            SCENE_INSTRUCTION + UPDATE_USER_CONTENT + SCENE_EXAMPLES_PROMPT
-        )
-        # 3. 运行 Agent
-        async for scene_event in self.scene_agent.run_async(ctx):
-            yield scene_event
+        # 2. 运行 Agent，instruction 在调用 LLM 时按本次的输入渲染
+        with invocation_args(
+            self.scene_agent.name,
+            update_user_content=UPDATE_USER_CONTENT,
+            examples_prompt=SCENE_EXAMPLES_PROMPT,
+        ):
+            async for scene_event in self.scene_agent.run_async(ctx):
+                yield scene_event
 
-        # 4. 将之前的场景带到后面的会话中去
+        # 3. 将之前的场景带到后面的会话中去
         before_scenes = ctx.session.state['scenes']
         single_scene = ctx.session.state['single_scenes']['type']
         scenes = list(set(before_scenes + single_scene + ['universal']))
@@ -409,10 +444,21 @@ class MatMasterFlowAgent(LlmAgent):
         yield update_state_event(ctx, state_delta={'scenes': copy.deepcopy(scenes)})
 
     async def _run_plan_confirm_agent(
-        self, ctx: InvocationContext
+        self,
+        ctx: InvocationContext,
+        speculative: Optional[SpeculativeStage] = None,
+        agent_ctx: Optional[InvocationContext] = None,
     ) -> AsyncGenerator[Event, None]:
-        async for plan_confirm_event in self.plan_confirm_agent.run_async(ctx):
-            yield plan_confirm_event
+        # 优先使用提前并行跑完的结果，推测失败时用同样的输入（agent_ctx）顺序执行
+        speculative_events = await speculative.result() if speculative else None
+        if speculative_events is not None:
+            for plan_confirm_event in speculative_events:
+                yield plan_confirm_event
+        else:
+            async for plan_confirm_event in self.plan_confirm_agent.run_async(
+                agent_ctx or ctx
+            ):
+                yield plan_confirm_event
 
         # 用户说确认计划，但 plan_confirm 误判为 False
         if ctx.user_content.parts[0].text == '确认计划' and not ctx.session.state[
@@ -444,29 +490,16 @@ class MatMasterFlowAgent(LlmAgent):
         available_tools = get_tools_list(ctx, scenes)
         if not available_tools:
             available_tools = ALL_AGENT_TOOLS_LIST
-        available_tools_with_info = {
-            item: {
-                'scene': ALL_TOOLS[item]['scene'],
-                'description': ALL_TOOLS[item]['description'],
-            }
-            for item in available_tools
-        }
-        available_tools_with_info_str = '\n'.join(
-            [
-                f"{key}\n    scene: {', '.join(value['scene'])}\n    description: {value['description']}"
-                for key, value in available_tools_with_info.items()
-            ]
-        )
-        self.plan_make_agent.instruction = get_plan_make_instruction(
-            available_tools_with_info_str
-            + UPDATE_USER_CONTENT
-            + TOOLCHAIN_EXAMPLES_PROMPT
-        )
-        self.plan_make_agent.output_schema = create_dynamic_multi_plans_schema(
-            available_tools
-        )
-        async for plan_event in self.plan_make_agent.run_async(ctx):
-            yield plan_event
+        available_tools = tuple(available_tools)
+        with invocation_args(
+            self.plan_make_agent.name,
+            output_schema=create_dynamic_multi_plans_schema(available_tools),
+            available_tools=available_tools,
+            update_user_content=UPDATE_USER_CONTENT,
+            toolchain_examples_prompt=TOOLCHAIN_EXAMPLES_PROMPT,
+        ):
+            async for plan_event in self.plan_make_agent.run_async(ctx):
+                yield plan_event
 
         # 总结计划
         yield update_state_event(
@@ -590,16 +623,10 @@ class MatMasterFlowAgent(LlmAgent):
         yield update_state_event(ctx, state_delta={'scenes': []})
         # 执行计划
         if ctx.session.state['plan']['feasibility'] in ['full', 'part']:
-            self._execution_agent = self._build_execution_agent_for_plan(ctx)
-            if self._execution_agent:
-                # 使用 name 属性来检查，避免 Pydantic __eq__ 的循环引用问题
-                if not any(
-                    agent.name == self._execution_agent.name
-                    for agent in self.sub_agents
-                ):
-                    self.sub_agents.append(self._execution_agent)
-                async for execution_event in self._execution_agent.run_async(ctx):
-                    yield execution_event
+            # 执行 agent 树按计划涉及的子 agent 共享，不挂到 flow agent 上
+            execution_agent = execution_agent_pool.get(self._plan_agent_names(ctx))
+            async for execution_event in execution_agent.run_async(ctx):
+                yield execution_event
 
         # 全部执行完毕，总结执行情况
         if (
@@ -646,14 +673,8 @@ class MatMasterFlowAgent(LlmAgent):
                     },
                 ):
                     yield matmaster_flow_event
-                self._analysis_agent.instruction = get_analysis_instruction(
-                    ctx.session.state['plan']
-                )
                 async for analysis_event in self.analysis_agent.run_async(ctx):
                     yield analysis_event
-                self._report_agent.instruction = get_report_instruction(
-                    ctx.session.state.get('plan', {})
-                )
 
                 # Collect report Markdown
                 report_markdown = ''
@@ -720,23 +741,28 @@ class MatMasterFlowAgent(LlmAgent):
             ):
                 yield generate_follow_up_event
 
-    async def _run_research_flow(
-        self, ctx: InvocationContext
+    async def _run_sequential_pre_planning(
+        self, ctx: InvocationContext, timer: StageTimer, icl_prompts: dict
     ) -> AsyncGenerator[Event, None]:
         # 扩写用户问题
-        async for _expand_event in self._run_expand_agent(ctx):
-            yield _expand_event
+        with timer.stage(EXPAND_AGENT):
+            async for _expand_event in self._run_expand_agent(ctx):
+                yield _expand_event
 
         # 构造 UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT, TOOLCHAIN_EXAMPLES_PROMPT
-        UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT, TOOLCHAIN_EXAMPLES_PROMPT = (
-            await self._build_icl_prompt(ctx)
-        )
+        with timer.stage('icl'):
+            UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT, TOOLCHAIN_EXAMPLES_PROMPT = (
+                await self._build_icl_prompt(ctx)
+            )
+        icl_prompts['UPDATE_USER_CONTENT'] = UPDATE_USER_CONTENT
+        icl_prompts['TOOLCHAIN_EXAMPLES_PROMPT'] = TOOLCHAIN_EXAMPLES_PROMPT
 
         # 划分问题场景
-        async for _scene_event in self._run_scene_agent(
-            ctx, UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT
-        ):
-            yield _scene_event
+        with timer.stage(SCENE_AGENT):
+            async for _scene_event in self._run_scene_agent(
+                ctx, UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT
+            ):
+                yield _scene_event
 
         # 判断计划是否确认（1. 上一步计划完成；2. 用户未确认计划）
         if check_plan(ctx) == FlowStatusEnum.COMPLETE or not ctx.session.state[
@@ -744,10 +770,111 @@ class MatMasterFlowAgent(LlmAgent):
         ].get('flag', False):
             # 清空 Plan 和 MULTI_PLANS
             if check_plan(ctx) == FlowStatusEnum.COMPLETE:
-                yield update_state_event(ctx, state_delta={PLAN: {}, MULTI_PLANS: {}})
+                yield update_state_event(
+                    ctx,
+                    state_delta={
+                        PLAN: {},
+                        MULTI_PLANS: {},
+                        **clear_step_state(ctx.session.state),
+                    },
+                )
+
+            with timer.stage(PLAN_CONFIRM_AGENT):
+                async for _plan_confirm_event in self._run_plan_confirm_agent(ctx):
+                    yield _plan_confirm_event
+
+    async def _run_pipelined_pre_planning(
+        self, ctx: InvocationContext, timer: StageTimer, icl_prompts: dict
+    ) -> AsyncGenerator[Event, None]:
+        """
+        与顺序模式下发的事件一致（清空计划提前到最前），但：
+        1. plan_confirm 只依赖用户本轮输入与上一轮的计划，使用本轮开始时的会话事件快照，
+           与 expand/scene 并行执行（输入不受二者进度影响），其事件缓存到 scene 结束后按原顺序下发；
+        2. expand 写入 update_user_content 后立即开始检索 ICL 示例，不等 expand 结束。
+        """
+        speculative_plan_confirm = None
+        plan_confirm_ctx = None
+        # 判断计划是否确认（1. 上一步计划完成；2. 用户未确认计划），输入在本轮开始时已知
+        if check_plan(ctx) == FlowStatusEnum.COMPLETE or not ctx.session.state[
+            'plan_confirm'
+        ].get('flag', False):
+            # 清空 Plan 和 MULTI_PLANS（expand/scene 不读取这两个字段，可提前）
+            if check_plan(ctx) == FlowStatusEnum.COMPLETE:
+                yield update_state_event(
+                    ctx,
+                    state_delta={
+                        PLAN: {},
+                        MULTI_PLANS: {},
+                        **clear_step_state(ctx.session.state),
+                    },
+                )
+            plan_confirm_ctx = snapshot_ctx(ctx)
+            speculative_plan_confirm = SpeculativeStage(
+                PLAN_CONFIRM_AGENT,
+                self.plan_confirm_agent.run_async(plan_confirm_ctx),
+                timer=timer,
+            )
+
+        icl_task: Optional[asyncio.Task] = None
+        icl_query = None
+        try:
+            # 扩写用户问题，update_user_content 一旦落盘就开始检索 ICL 示例
+            with timer.stage(EXPAND_AGENT):
+                async for _expand_event in self._run_expand_agent(ctx):
+                    yield _expand_event
+                    update_user_content = ctx.session.state.get(EXPAND, {}).get(
+                        'update_user_content'
+                    )
+                    if update_user_content and update_user_content != icl_query:
+                        if icl_task:  # expand 兜底改写了 query，之前的检索作废
+                            icl_task.cancel()
+                        icl_query = update_user_content
+                        timer.start('icl')
+                        icl_task = asyncio.create_task(
+                            select_update_examples(
+                                icl_query, ctx.session.id, CURRENT_ENV, logger
+                            )
+                        )
+
+            icl_update_examples = await icl_task if icl_task else None
+            timer.stop('icl')
+            UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT, TOOLCHAIN_EXAMPLES_PROMPT = (
+                await self._build_icl_prompt(ctx, icl_update_examples)
+            )
+            icl_prompts['UPDATE_USER_CONTENT'] = UPDATE_USER_CONTENT
+            icl_prompts['TOOLCHAIN_EXAMPLES_PROMPT'] = TOOLCHAIN_EXAMPLES_PROMPT
+
+            # 划分问题场景
+            with timer.stage(SCENE_AGENT):
+                async for _scene_event in self._run_scene_agent(
+                    ctx, UPDATE_USER_CONTENT, SCENE_EXAMPLES_PROMPT
+                ):
+                    yield _scene_event
+
+            if speculative_plan_confirm:
+                async for _plan_confirm_event in self._run_plan_confirm_agent(
+                    ctx, speculative_plan_confirm, plan_confirm_ctx
+                ):
+                    yield _plan_confirm_event
+        finally:
+            if icl_task and not icl_task.done():
+                icl_task.cancel()
+            if speculative_plan_confirm:
+                speculative_plan_confirm.cancel()
 
-            async for _plan_confirm_event in self._run_plan_confirm_agent(ctx):
-                yield _plan_confirm_event
+    async def _run_research_flow(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        timer = StageTimer(ctx.session.id)
+        icl_prompts = {}
+        if PIPELINE_PRE_PLANNING:
+            pre_planning = self._run_pipelined_pre_planning(ctx, timer, icl_prompts)
+        else:
+            pre_planning = self._run_sequential_pre_planning(ctx, timer, icl_prompts)
+        async for _pre_planning_event in pre_planning:
+            yield _pre_planning_event
+        UPDATE_USER_CONTENT = icl_prompts['UPDATE_USER_CONTENT']
+        TOOLCHAIN_EXAMPLES_PROMPT = icl_prompts['TOOLCHAIN_EXAMPLES_PROMPT']
 
         # 制定计划（1. 无计划；2. 计划已完成；3. 计划失败；4. 用户未确认计划）
         if check_plan(ctx) in [
@@ -755,10 +882,12 @@ class MatMasterFlowAgent(LlmAgent):
             FlowStatusEnum.COMPLETE,
             FlowStatusEnum.FAILED,
         ] or not ctx.session.state['plan_confirm'].get('flag', False):
-            async for _plan_make_event in self._run_plan_make_agent(
-                ctx, UPDATE_USER_CONTENT, TOOLCHAIN_EXAMPLES_PROMPT
-            ):
-                yield _plan_make_event
+            with timer.stage(PLAN_MAKE_AGENT):
+                async for _plan_make_event in self._run_plan_make_agent(
+                    ctx, UPDATE_USER_CONTENT, TOOLCHAIN_EXAMPLES_PROMPT
+                ):
+                    yield _plan_make_event
+        timer.log_summary('pre-planning')
 
         # 从 MultiPlans 中选择某个计划
         logger.info(f'{ctx.session.id} check_plan = {check_plan(ctx)}')
@@ -1,22 +1,32 @@
-import copy
+import asyncio
 import logging
-from typing import AsyncGenerator, override
+from typing import AsyncGenerator, List, Optional, override
 
 from google.adk.agents import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.events import Event
 from pydantic import model_validator
 
 from agents.matmaster_agent.base_callbacks.public_callback import check_transfer
-from agents.matmaster_agent.config import MAX_TOOL_RETRIES
+from agents.matmaster_agent.config import MAX_TOOL_RETRIES, STEP_CONCURRENCY
 from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME, ModelRole
 from agents.matmaster_agent.core_agents.comp_agents.dntransfer_climit_agent import (
     DisallowTransferAndContentLimitLlmAgent,
 )
 from agents.matmaster_agent.flow_agents.constant import MATMASTER_SUPERVISOR_AGENT
+from agents.matmaster_agent.flow_agents.execution_agent.scheduler import (
+    ConcurrentStepRunner,
+    step_branch_ctx,
+    step_dependencies,
+)
 from agents.matmaster_agent.flow_agents.execution_agent.utils import (
     should_exit_retryLoop,
 )
 from agents.matmaster_agent.flow_agents.model import PlanStepStatusEnum
+from agents.matmaster_agent.flow_agents.step_title_agent.utils import (
+    generate_step_titles,
+    template_step_title,
+)
 from agents.matmaster_agent.flow_agents.step_validation_agent.prompt import (
     STEP_VALIDATION_INSTRUCTION,
 )
@@ -40,12 +50,30 @@ from agents.matmaster_agent.utils.event_utils import (
     context_function_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    clear_step_state,
+    get_plan_index,
+    step_state_key,
+    update_plan_step,
+    update_plan_steps,
+)
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
 logger.setLevel(logging.INFO)
 
 
+def render_step_validation_instruction(ctx: ReadonlyContext) -> str:
+    current_step = ctx.state[PLAN]['steps'][get_plan_index(ctx.state)]
+    lines = (
+        f"用户原始请求: {ctx.user_content.parts[0].text}",
+        f"当前步骤描述: {current_step['description']}",
+        f"工具名称: {current_step['tool_name']}",
+        '请根据以上信息判断，工具的参数配置及对应的执行结果是否严格满足用户原始需求。',
+    )
+    return STEP_VALIDATION_INSTRUCTION + '\n'.join(lines)
+
+
 class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
     @model_validator(mode='after')
     def after_init(self):
@@ -68,29 +96,24 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
     def validation_agent(self):
         return self.sub_agents[-1]
 
-    @property
-    def title_agent(self):
-        return self.sub_agents[-2]
-
     async def _update_retry_count(
         self, ctx: InvocationContext, index, count
     ) -> AsyncGenerator[Event, None]:
-        update_plan = copy.deepcopy(ctx.session.state[PLAN])
+        plan = ctx.session.state[PLAN]
         if not count:
-            update_plan['steps'][index]['retry_count'] = update_plan['steps'][
-                index
-            ].get('retry_count', count)
-        else:
-            update_plan['steps'][index]['retry_count'] = count
+            count = plan['steps'][index].get('retry_count', count)
+        update_plan = update_plan_step(plan, index, retry_count=count)
         yield update_state_event(ctx, state_delta={PLAN: update_plan})
 
     async def _construct_function_call_ctx(
         self, ctx: InvocationContext, index
     ) -> AsyncGenerator[Event, None]:
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
-        current_tool_name = update_plan['steps'][index]['tool_name']
-        current_tool_description = update_plan['steps'][index]['description']
-        update_plan['steps'][index]['status'] = PlanStepStatusEnum.PROCESS
+        current_step = ctx.session.state[PLAN]['steps'][index]
+        current_tool_name = current_step['tool_name']
+        current_tool_description = current_step['description']
+        update_plan = update_plan_step(
+            ctx.session.state[PLAN], index, status=PlanStepStatusEnum.PROCESS
+        )
         yield update_state_event(
             ctx,
             state_delta={
@@ -109,11 +132,55 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
         ):
             yield materials_plan_function_call_event
 
+    def _start_step_titles(
+        self, ctx: InvocationContext
+    ) -> Optional[asyncio.Task[Optional[List[str]]]]:
+        """计划确认后，在后台一次性为所有步骤生成标题；已有标题（如异步任务恢复执行）时跳过"""
+        steps = ctx.session.state[PLAN]['steps']
+        if all(step.get('title') for step in steps):
+            return None
+        return asyncio.create_task(
+            generate_step_titles(
+                ctx, steps, ctx.session.state.get('target_language', 'zh')
+            )
+        )
+
+    async def _resolve_step_title(
+        self,
+        ctx: InvocationContext,
+        index,
+        titles_task: Optional[asyncio.Task[Optional[List[str]]]],
+    ) -> AsyncGenerator[Event, None]:
+        """不阻塞工具调用：批量标题已返回则写入计划缓存，否则使用模板标题"""
+        if (
+            titles_task is not None
+            and titles_task.done()
+            and not titles_task.cancelled()
+            and (titles := titles_task.result())
+            and not ctx.session.state[PLAN]['steps'][index].get('title')
+        ):
+            update_plan = update_plan_steps(ctx.session.state[PLAN], 'title', titles)
+            yield update_state_event(ctx, state_delta={PLAN: update_plan})
+
+        current_step = ctx.session.state[PLAN]['steps'][index]
+        yield update_state_event(
+            ctx,
+            state_delta={
+                step_state_key('step_title'): {
+                    'title': current_step.get('title')
+                    or template_step_title(current_step)
+                }
+            },
+        )
+
     async def _core_execution_agent(
-        self, ctx: InvocationContext, index
+        self,
+        ctx: InvocationContext,
+        index,
+        titles_task: Optional[asyncio.Task[Optional[List[str]]]],
     ) -> AsyncGenerator[Event, None]:
         logger.info(
-            f'{ctx.session.id} Before Run: plan_index = {ctx.session.state["plan_index"]}, plan = {ctx.session.state['plan']}'
+            f'{ctx.session.id} Before Run: plan_index = {index}, plan = {ctx.session.state['plan']}'
         )
         if ctx.session.state[PLAN]['steps'][index]['retry_count']:
             separate_card_info = 'ReExecuteStep'
@@ -125,22 +192,26 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
         yield update_state_event(
             ctx,
             state_delta={
-                'separate_card_info': separate_card_info,
+                step_state_key('separate_card_info'): separate_card_info,
             },
         )
 
         # 引导标题
-        async for title_event in self.title_agent.run_async(ctx):
+        async for title_event in self._resolve_step_title(ctx, index, titles_task):
             yield title_event
         if ctx.session.state[PLAN]['steps'][index]['retry_count']:
             step_title = (
                 i18n.t(separate_card_info)
                 + f'{retry_info}'
                 + ': '
-                + ctx.session.state.get('step_title', {}).get('title', '')
+                + ctx.session.state.get(step_state_key('step_title'), {}).get(
+                    'title', ''
+                )
             )
         else:
-            step_title = ctx.session.state.get('step_title', {}).get('title', '')
+            step_title = ctx.session.state.get(step_state_key('step_title'), {}).get(
+                'title', ''
+            )
         if (
             ctx.session.state[PLAN]['steps'][index]['status']
             == PlanStepStatusEnum.SUBMITTED
@@ -187,23 +258,9 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
         )
 
     async def _tool_result_validation(
-        self, ctx: InvocationContext, index
+        self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
-        current_tool_name = ctx.session.state[PLAN]['steps'][index]['tool_name']
-        current_tool_description = ctx.session.state[PLAN]['steps'][index][
-            'description'
-        ]
-        lines = (
-            f"用户原始请求: {ctx.user_content.parts[0].text}",
-            f"当前步骤描述: {current_tool_description}",
-            f"工具名称: {current_tool_name}",
-            '请根据以上信息判断，工具的参数配置及对应的执行结果是否严格满足用户原始需求。',
-        )
-        validation_instruction = '\n'.join(lines)
-        self.validation_agent.instruction = (
-            STEP_VALIDATION_INSTRUCTION + validation_instruction
-        )
-
+        # instruction 由 render_step_validation_instruction 按当前步骤渲染
         async for validation_event in self.validation_agent.run_async(ctx):
             yield validation_event
 
@@ -237,13 +294,14 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
             yield validation_failed_event
 
         # 重新标记为进行中状态，准备重试
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
-        update_plan['steps'][index]['status'] = PlanStepStatusEnum.PROCESS
-        update_plan['steps'][index]['validation_failure_reason'] = validation_reason
         original_description = ctx.session.state[PLAN]['steps'][index]['description']
-        update_plan['steps'][index][
-            'description'
-        ] = f"{original_description}\n\n注意：上次执行因以下原因校验失败，请改进：{validation_reason}"
+        update_plan = update_plan_step(
+            ctx.session.state[PLAN],
+            index,
+            status=PlanStepStatusEnum.PROCESS,
+            validation_failure_reason=validation_reason,
+            description=f"{original_description}\n\n注意：上次执行因以下原因校验失败，请改进：{validation_reason}",
+        )
         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
     async def _prepare_retry_failed_result(
@@ -254,8 +312,7 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
             ctx, index, ctx.session.state[PLAN]['steps'][index]['retry_count'] + 1
         ):
             yield _update_retry_event
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
-        update_plan['steps'][index]['status'] = PlanStepStatusEnum.PROCESS
+        step_changes = {'status': PlanStepStatusEnum.PROCESS}
         retry_count = ctx.session.state[PLAN]['steps'][index]['retry_count']
         if validation_reason:
             logger.info(
@@ -265,13 +322,14 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
             original_description = ctx.session.state[PLAN]['steps'][index][
                 'description'
             ]
-            update_plan['steps'][index][
-                'description'
-            ] = f"{original_description}\n\n注意：上次执行因以下原因校验失败，请改进：{validation_reason}"
+            step_changes['description'] = (
+                f"{original_description}\n\n注意：上次执行因以下原因校验失败，请改进：{validation_reason}"
+            )
         else:
             logger.info(
                 f'{ctx.session.id} Step {index + 1} execution failed, retrying {retry_count}/{MAX_TOOL_RETRIES}'
             )
+        update_plan = update_plan_step(ctx.session.state[PLAN], index, **step_changes)
         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
     async def _prepare_retry_other_tool(
@@ -282,15 +340,18 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
         )
 
         # 更新plan中的tool_name和status
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
-        update_plan['steps'][index]['tool_name'] = next_tool
-        update_plan['steps'][index]['status'] = PlanStepStatusEnum.PROCESS
         original_description = ctx.session.state[PLAN]['steps'][index][
             'description'
         ].split('\n\n注意：')[
             0
         ]  # 移除之前的失败原因
-        update_plan['steps'][index]['description'] = original_description
+        update_plan = update_plan_step(
+            ctx.session.state[PLAN],
+            index,
+            tool_name=next_tool,
+            status=PlanStepStatusEnum.PROCESS,
+            description=original_description,
+        )
         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
     @override
@@ -298,137 +359,212 @@ class MatMasterSupervisorAgent(DisallowTransferAndContentLimitLlmAgent):
         plan = ctx.session.state['plan']
         logger.info(f'{ctx.session.id} plan = {plan}')
 
-        for index, initial_step in enumerate(plan['steps']):
-            initial_current_tool_name = initial_step['tool_name']
-            tried_tools = [initial_current_tool_name]
-            alternatives = find_alternative_tool(initial_current_tool_name)
+        titles_task = self._start_step_titles(ctx)
+        try:
+            async for event in self._run_plan_steps(ctx, plan, titles_task):
+                yield event
+            # 计划结束（完成或失败）后清理各步骤私有的 state；提交了异步任务的计划稍后继续执行，保留
+            if not any(
+                step['status'] == PlanStepStatusEnum.SUBMITTED
+                for step in ctx.session.state[PLAN]['steps']
+            ):
+                if state_delta := clear_step_state(ctx.session.state):
+                    yield update_state_event(ctx, state_delta=state_delta)
+        finally:
+            if titles_task is not None:
+                titles_task.cancel()
+
+    async def _run_plan_steps(
+        self,
+        ctx: InvocationContext,
+        plan: dict,
+        titles_task: Optional[asyncio.Task[Optional[List[str]]]],
+    ) -> AsyncGenerator[Event, None]:
+        """
+        按 depends_on 调度步骤：只有一个可执行步骤时与原先一样在当前 branch 中顺序执行；
+        多个步骤同时就绪时，最多 STEP_CONCURRENCY 个步骤在各自的 branch 中并发执行。
+        任一步骤未成功（失败或提交了异步任务）后不再启动新步骤，等待已启动的步骤结束后返回。
+        """
+        total = len(plan['steps'])
+        dependencies = step_dependencies(plan['steps'])
+        started = set()
+
+        def ready_steps() -> List[int]:
+            steps = ctx.session.state[PLAN]['steps']
+            done = {
+                index
+                for index, step in enumerate(steps)
+                if step['status'] == PlanStepStatusEnum.SUCCESS
+            }
+            return [
+                index
+                for index in range(total)
+                if index not in done
+                and index not in started
+                and dependencies[index] <= done
+            ]
 
-            tool_attempt_success = False
-            while not tool_attempt_success:
+        def step_succeeded(index) -> bool:
+            status = ctx.session.state[PLAN]['steps'][index]['status']
+            if status == PlanStepStatusEnum.SUBMITTED:
+                logger.info(f'{ctx.session.id} Step {index + 1} submitted, pause plan')
+            elif status != PlanStepStatusEnum.SUCCESS:
+                logger.warning(f'{ctx.session.id} Step {index + 1} failed, abort plan')
+            return status == PlanStepStatusEnum.SUCCESS
+
+        while ready := ready_steps():
+            if len(ready) == 1:
+                # 同样在独立 task 中执行，current_plan_index 只在该 task 内生效
+                index = ready[0]
+                started.add(index)
+                runner = ConcurrentStepRunner(ctx)
+                runner.start(index, self._run_step(ctx, index, titles_task))
+                async for _, event in runner.events():
+                    if event is not None:
+                        yield event
+                if not step_succeeded(index):
+                    return
+                continue
+
+            runner = ConcurrentStepRunner(ctx)
+            stopped = False
+
+            def start_ready_steps():
+                for index in ready_steps()[: STEP_CONCURRENCY - runner.running]:
+                    logger.info(f'{ctx.session.id} Step {index + 1} start concurrently')
+                    started.add(index)
+                    branch_ctx = step_branch_ctx(ctx, self.name, index, total)
+                    runner.start(
+                        index,
+                        self._run_step(branch_ctx, index, titles_task),
+                    )
+
+            start_ready_steps()
+            async for index, event in runner.events():
+                if event is not None:
+                    yield event
+                elif not step_succeeded(index):
+                    stopped = True
+                elif not stopped:
+                    start_ready_steps()
+            if stopped:
+                return
+
+    async def _run_step(
+        self,
+        ctx: InvocationContext,
+        index: int,
+        titles_task: Optional[asyncio.Task[Optional[List[str]]]],
+    ) -> AsyncGenerator[Event, None]:
+        """执行单个步骤：同一工具重试、校验“假成功”、更换替代工具；结果写入 plan 中该步骤的 status"""
+        initial_current_tool_name = ctx.session.state[PLAN]['steps'][index]['tool_name']
+        tried_tools = [initial_current_tool_name]
+        alternatives = find_alternative_tool(initial_current_tool_name)
+
+        while True:
+            if (
+                ctx.session.state[PLAN]['steps'][index]['status']
+                == PlanStepStatusEnum.SUCCESS
+            ):
+                return
+
+            # 初始化 retry_count
+            async for _update_retry_event in self._update_retry_count(ctx, index, 0):
+                yield _update_retry_event
+
+            # 同一工具重试
+            while (
+                ctx.session.state[PLAN]['steps'][index]['retry_count']
+                <= MAX_TOOL_RETRIES
+            ):
+                # 制造工具调用上下文，已提交的任务跳过该步骤
                 if (
                     ctx.session.state[PLAN]['steps'][index]['status']
-                    == PlanStepStatusEnum.SUCCESS
+                    != PlanStepStatusEnum.SUBMITTED
                 ):
-                    tool_attempt_success = True
-                    break
-                else:
-                    # 初始化 retry_count
-                    async for _update_retry_event in self._update_retry_count(
-                        ctx, index, 0
+                    async for (
+                        _construct_function_call_event
+                    ) in self._construct_function_call_ctx(ctx, index):
+                        yield _construct_function_call_event
+
+                # 核心工具调用
+                async for _core_execution_event in self._core_execution_agent(
+                    ctx, index, titles_task
+                ):
+                    yield _core_execution_event
+
+                current_steps = ctx.session.state['plan']['steps']
+                # 工具调用结果返回【成功】
+                if current_steps[index]['status'] == PlanStepStatusEnum.SUCCESS:
+                    # 无需校验，步骤完成
+                    if not has_self_check(current_steps[index]['tool_name']):
+                        return
+
+                    # 校验工具结果
+                    async for (
+                        _tool_result_validation_event
+                    ) in self._tool_result_validation(ctx):
+                        yield _tool_result_validation_event
+                    validation_result = ctx.session.state.get(
+                        step_state_key('step_validation'), {}
+                    )
+                    is_valid = validation_result.get('is_valid', True)
+                    validation_reason = validation_result.get('reason', '')
+
+                    # 校验成功，或已无重试机会，步骤完成
+                    if (
+                        is_valid
+                        or ctx.session.state[PLAN]['steps'][index]['retry_count']
+                        >= MAX_TOOL_RETRIES
                     ):
-                        yield _update_retry_event
+                        return
 
-                    # 同一工具重试
-                    while (
-                        ctx.session.state[PLAN]['steps'][index]['retry_count']
-                        <= MAX_TOOL_RETRIES
+                    # “假成功”结果，计划重试
+                    async for (
+                        _prepare_retry_fake_success_event
+                    ) in self._prepare_retry_fake_success(
+                        ctx, index, validation_reason
                     ):
-                        # 制造工具调用上下文，已提交的任务跳过该步骤
-                        if (
-                            ctx.session.state[PLAN]['steps'][index]['status']
-                            != PlanStepStatusEnum.SUBMITTED
-                        ):
-                            async for (
-                                _construct_function_call_event
-                            ) in self._construct_function_call_ctx(ctx, index):
-                                yield _construct_function_call_event
-
-                        # 核心工具调用
-                        async for _core_execution_event in self._core_execution_agent(
-                            ctx, index
-                        ):
-                            yield _core_execution_event
-
-                        current_steps = ctx.session.state['plan']['steps']
-                        # 工具调用结果返回【成功】
-                        if current_steps[index]['status'] == PlanStepStatusEnum.SUCCESS:
-                            # 对成功的工具调用结果进行校验
-                            if has_self_check(
-                                ctx.session.state[PLAN]['steps'][index]['tool_name']
-                            ):
-                                # 校验工具结果
-                                async for (
-                                    _tool_result_validation_event
-                                ) in self._tool_result_validation(ctx, index):
-                                    yield _tool_result_validation_event
-
-                                validation_result = ctx.session.state.get(
-                                    'step_validation', {}
-                                )
-                                is_valid = validation_result.get('is_valid', True)
-                                validation_reason = validation_result.get('reason', '')
-
-                                # “假成功”结果，计划重试
-                                if (not is_valid) and ctx.session.state[PLAN]['steps'][
-                                    index
-                                ]['retry_count'] < MAX_TOOL_RETRIES:
-                                    async for (
-                                        _prepare_retry_fake_success_event
-                                    ) in self._prepare_retry_fake_success(
-                                        ctx, index, validation_reason
-                                    ):
-                                        yield _prepare_retry_fake_success_event
-                                else:
-                                    # 校验成功，步骤完成
-                                    tool_attempt_success = True
-                                    break
-                            else:
-                                # 无需校验，步骤完成
-                                tool_attempt_success = True
-                                break
-                        # 工具调用失败，且符合重试条件
-                        elif (
-                            current_steps[index]['status'] == PlanStepStatusEnum.FAILED
-                            and ctx.session.state[PLAN]['steps'][index]['retry_count']
-                            < MAX_TOOL_RETRIES
-                        ):
-                            # 对于某些错误，重试没有必要，直接退出
-                            if should_exit_retryLoop(ctx):
-                                break
-
-                            validation_result = ctx.session.state.get(
-                                'step_validation', {}
-                            )
-                            validation_reason = validation_result.get('reason', '')
-                            async for (
-                                _prepare_retry_failed_result_event
-                            ) in self._prepare_retry_failed_result(
-                                ctx, index, validation_reason
-                            ):
-                                yield _prepare_retry_failed_result_event
-                        # 异步任务，直接退出当前函数
-                        elif (
-                            current_steps[index]['status']
-                            == PlanStepStatusEnum.SUBMITTED
-                        ):
-                            return
-                        else:
-                            # 其他状态（SUBMITTED等），退出循环
-                            break
-
-                    # 更换其他工具重试
-                    if (
-                        not tool_attempt_success
-                        and ctx.session.state['plan']['steps'][index]['status']
-                        != PlanStepStatusEnum.SUBMITTED
+                        yield _prepare_retry_fake_success_event
+                # 工具调用失败，且符合重试条件
+                elif (
+                    current_steps[index]['status'] == PlanStepStatusEnum.FAILED
+                    and ctx.session.state[PLAN]['steps'][index]['retry_count']
+                    < MAX_TOOL_RETRIES
+                ):
+                    # 对于某些错误，重试没有必要，直接退出
+                    if should_exit_retryLoop(ctx):
+                        break
+
+                    validation_result = ctx.session.state.get(
+                        step_state_key('step_validation'), {}
+                    )
+                    validation_reason = validation_result.get('reason', '')
+                    async for (
+                        _prepare_retry_failed_result_event
+                    ) in self._prepare_retry_failed_result(
+                        ctx, index, validation_reason
                     ):
-                        available_alts = [
-                            alt for alt in alternatives if alt not in tried_tools
-                        ]
-                        if available_alts:
-                            # 尝试替换工具
-                            next_tool = available_alts[0]
-                            tried_tools.append(next_tool)
-                            async for (
-                                _prepare_retry_other_tool_event
-                            ) in self._prepare_retry_other_tool(ctx, index, next_tool):
-                                yield _prepare_retry_other_tool_event
-                        else:
-                            logger.warning(
-                                f'{ctx.session.id} No more alternative tools for step {index + 1}'
-                            )
-                            break  # 退出tool while
-
-            # 最终仍然没有成功，中止计划
-            if not tool_attempt_success:
-                break
+                        yield _prepare_retry_failed_result_event
+                # 异步任务，直接退出当前步骤
+                elif current_steps[index]['status'] == PlanStepStatusEnum.SUBMITTED:
+                    return
+                else:
+                    # 其他状态，退出循环
+                    break
+
+            # 更换其他工具重试
+            available_alts = [alt for alt in alternatives if alt not in tried_tools]
+            if not available_alts:
+                logger.warning(
+                    f'{ctx.session.id} No more alternative tools for step {index + 1}'
+                )
+                return
+
+            # 尝试替换工具
+            next_tool = available_alts[0]
+            tried_tools.append(next_tool)
+            async for _prepare_retry_other_tool_event in self._prepare_retry_other_tool(
+                ctx, index, next_tool
+            ):
+                yield _prepare_retry_other_tool_event
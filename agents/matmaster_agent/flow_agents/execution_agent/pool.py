@@ -0,0 +1,75 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from google.adk.agents import BaseAgent
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+
+@dataclass(slots=True)
+class ExecutionAgentPoolMetrics:
+    gets: int = 0
+    builds: int = 0
+    build_time_sum: float = 0.0
+
+    def snapshot(self) -> dict:
+        reuses = self.gets - self.builds
+        build_time_avg = self.build_time_sum / max(self.builds, 1)
+        return {
+            'gets': self.gets,
+            'builds': self.builds,
+            'reuse_rate': round(reuses / max(self.gets, 1), 3),
+            'build_time_avg': round(build_time_avg, 4),
+            # 按已发生构建的平均耗时估算
+            'saved_build_time': round(reuses * build_time_avg, 2),
+        }
+
+
+class ExecutionAgentPool:
+    """
+    按子 agent 名称集合缓存构建好的执行 agent 树（含子 agent 的 toolset、追踪回调等）。
+
+    agent 运行时不再改写自身属性（每次调用的 instruction、output_schema 等通过 invocation_args 传入），
+    同一棵树可以同时用于多个调用，因此每个 key 只保留一个实例、直接共享；
+    超过 max_keys 个 key 时按 LRU 淘汰（正在运行的调用仍持有被淘汰的实例，不受影响）。
+    """
+
+    def __init__(self, build: Callable[[tuple[str, ...]], BaseAgent], max_keys: int):
+        self._build = build
+        self.max_keys = max_keys
+        self._agents: OrderedDict[tuple[str, ...], BaseAgent] = OrderedDict()
+        self.metrics = ExecutionAgentPoolMetrics()
+
+    @staticmethod
+    def pool_key(agent_names: Iterable[str]) -> tuple[str, ...]:
+        return tuple(sorted(set(agent_names)))
+
+    def get(self, agent_names: Iterable[str]) -> BaseAgent:
+        key = self.pool_key(agent_names)
+        self.metrics.gets += 1
+        if (agent := self._agents.get(key)) is not None:
+            self._agents.move_to_end(key)
+            return agent
+
+        start = time.perf_counter()
+        agent = self._build(key)
+        elapsed = time.perf_counter() - start
+        self.metrics.builds += 1
+        self.metrics.build_time_sum += elapsed
+        logger.info(f'built execution agent for {list(key)}, cost = {elapsed:.3f}s')
+
+        self._agents[key] = agent
+        while len(self._agents) > self.max_keys:
+            self._agents.popitem(last=False)
+        return agent
+
+    def clear(self):
+        self._agents.clear()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, List, Optional
+
+from google.adk.agents import InvocationContext
+from google.adk.events import Event
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.state import PLAN
+from agents.matmaster_agent.utils.state_utils import (
+    current_plan_index,
+    rebase_state_value,
+)
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+_FINISHED = object()
+
+# 多个步骤都会更新的共享状态，输出前需叠加到最新值上；步骤私有的中间状态见 step_state_key
+REBASE_STATE_KEYS = (PLAN, 'long_running_jobs')
+
+
+def normalize_depends_on(depends_on, index: int) -> Optional[List[int]]:
+    """
+    depends_on 为从 1 开始的前序步骤编号；None 表示依赖上一步（按顺序执行）。
+    引用自身或后续步骤等非法输入时退回 None，宁可串行也不误并发。
+    """
+    if depends_on is None:
+        return None
+    if not isinstance(depends_on, list) or not all(
+        isinstance(step, int) and 1 <= step <= index for step in depends_on
+    ):
+        return None
+    return sorted(set(depends_on))
+
+
+def step_dependencies(steps: List[dict]) -> List[frozenset]:
+    """每一步依赖的前序步骤下标（从 0 开始）"""
+    dependencies = []
+    for index, step in enumerate(steps):
+        depends_on = normalize_depends_on(step.get('depends_on'), index)
+        if depends_on is None:
+            dependencies.append(frozenset({index - 1} if index else ()))
+        else:
+            dependencies.append(frozenset(step - 1 for step in depends_on))
+    return dependencies
+
+
+def step_branch_ctx(
+    ctx: InvocationContext, agent_name: str, index: int, total: int
+) -> InvocationContext:
+    """并发步骤各自使用独立 branch，LLM 上下文中互不可见（后续步骤仍可见全部事件）"""
+    branch_ctx = ctx.model_copy()
+    # 带上总步数，避免 step_1 成为 step_10 的前缀而被视为父 branch
+    branch_suffix = f'{agent_name}.step_{index + 1}_of_{total}'
+    branch_ctx.branch = f'{ctx.branch}.{branch_suffix}' if ctx.branch else branch_suffix
+    return branch_ctx
+
+
+class ConcurrentStepRunner:
+    """
+    在同一 invocation 内并发推进多个步骤的事件流。
+
+    与 ParallelAgent 相同，每个步骤产出的事件要等上游 Runner 处理（state_delta 生效）后才继续，
+    事件逐个输出，state 变更有确定的先后顺序；事件中基于旧 state 计算的 plan、long_running_jobs
+    在输出前按三方合并叠加到最新 state 上，避免覆盖其它步骤的更新。
+    tool_call_info 等步骤内的中间状态按步骤下标使用各自的 key（step_state_key），不做合并。
+    """
+
+    def __init__(self, ctx: InvocationContext):
+        self.ctx = ctx
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def start(self, index: int, events: AsyncGenerator[Event, None]):
+        self._tasks[index] = asyncio.create_task(self._drive(index, events))
+
+    async def _drive(self, index: int, events: AsyncGenerator[Event, None]):
+        current_plan_index.set(index)
+        try:
+            async for event in events:
+                state_delta = event.actions.state_delta if event.actions else None
+                # 事件产出时的 state 即为计算 state_delta 的基准
+                base = {
+                    key: self.ctx.session.state.get(key)
+                    for key in REBASE_STATE_KEYS
+                    if state_delta and key in state_delta
+                }
+                processed = asyncio.Event()
+                await self._queue.put((index, event, base, processed))
+                await processed.wait()
+        except Exception as err:
+            await self._queue.put((index, err, None, None))
+        else:
+            await self._queue.put((index, _FINISHED, None, None))
+
+    def _rebase(self, event: Event, base: dict):
+        state_delta = event.actions.state_delta
+        for key, base_value in base.items():
+            current = self.ctx.session.state.get(key)
+            if isinstance(state_delta[key], dict) and current is not base_value:
+                state_delta[key] = rebase_state_value(
+                    base_value, state_delta[key], current
+                )
+
+    async def events(self) -> AsyncGenerator[tuple[int, Optional[Event]], None]:
+        """输出 (步骤下标, 事件)；步骤结束时输出 (步骤下标, None)，此时调用方可以启动新的步骤"""
+        try:
+            while self._tasks:
+                index, item, base, processed = await self._queue.get()
+                if item is _FINISHED:
+                    del self._tasks[index]
+                    yield index, None
+                elif isinstance(item, Exception):
+                    del self._tasks[index]
+                    raise item
+                else:
+                    if base:
+                        self._rebase(item, base)
+                    yield index, item
+                    processed.set()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
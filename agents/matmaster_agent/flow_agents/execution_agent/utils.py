@@ -1,28 +1,29 @@
 from google.adk.agents import InvocationContext
 
 from agents.matmaster_agent.state import ERROR_DETAIL, ERROR_OCCURRED
+from agents.matmaster_agent.utils.state_utils import step_state_key
 
 
 def should_exit_retryLoop(ctx: InvocationContext) -> bool:
-    ANY_ERROR = ctx.session.state[ERROR_OCCURRED]
+    # 并发步骤各自记录错误，只看当前步骤
+    ANY_ERROR = ctx.session.state.get(step_state_key(ERROR_OCCURRED), False)
+    error_detail = ctx.session.state.get(step_state_key(ERROR_DETAIL), '')
 
     # 下载 results.txt 失败，退出同一工具重试
     DOWNLOAD_RESULTS_TXT_FAILED = (
         ANY_ERROR
-        and ctx.session.state[ERROR_DETAIL].startswith('ClientResponseError')
-        and 'results.txt' in ctx.session.state[ERROR_DETAIL]
+        and error_detail.startswith('ClientResponseError')
+        and 'results.txt' in error_detail
     )
 
     # HTTP 412 ERROR
     HTTP_412_ERROR = (
         ANY_ERROR
-        and ctx.session.state[ERROR_DETAIL].startswith('HTTPStatusError')
-        and '412 Precondition Failed' in ctx.session.state[ERROR_DETAIL]
+        and error_detail.startswith('HTTPStatusError')
+        and '412 Precondition Failed' in error_detail
     )
 
     # AccessKey Error
-    AccessKey_ERROR = (
-        ANY_ERROR and 'AccessKey Invalid!' in ctx.session.state[ERROR_DETAIL]
-    )
+    AccessKey_ERROR = ANY_ERROR and 'AccessKey Invalid!' in error_detail
 
     return DOWNLOAD_RESULTS_TXT_FAILED or HTTP_412_ERROR or AccessKey_ERROR
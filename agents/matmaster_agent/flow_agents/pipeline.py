@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import AsyncGenerator, List, Optional
+
+from google.adk.agents import InvocationContext
+from google.adk.events import Event
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+
+class StageTimer:
+    """记录单轮 research flow 中各阶段的耗时，用于观察关键路径"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.origin = time.perf_counter()
+        self.spans: dict[str, list[float]] = {}
+
+    def start(self, name: str):
+        self.spans[name] = [time.perf_counter() - self.origin, -1.0]
+
+    def stop(self, name: str):
+        if name in self.spans:
+            self.spans[name][1] = time.perf_counter() - self.origin
+
+    @contextmanager
+    def stage(self, name: str):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def summary(self) -> dict:
+        finished = {k: v for k, v in self.spans.items() if v[1] >= 0}
+        if not finished:
+            return {}
+        wall = max(end for _, end in finished.values())
+        serial = sum(end - start for start, end in finished.values())
+        return {
+            'stages': {
+                k: {'start': round(start, 3), 'cost': round(end - start, 3)}
+                for k, (start, end) in finished.items()
+            },
+            'wall': round(wall, 3),
+            'serial': round(serial, 3),
+            'saved': round(max(serial - wall, 0.0), 3),
+        }
+
+    def log_summary(self, label: str):
+        logger.info(f'{self.session_id} {label} stage timings = {self.summary()}')
+
+
+def snapshot_ctx(ctx: InvocationContext) -> InvocationContext:
+    """
+    会话事件固定为当前时刻的快照（state 仍与原会话共享）：
+    提前运行的阶段看到的对话历史与并行阶段的执行进度无关。
+    """
+    session = ctx.session.model_copy(update={'events': list(ctx.session.events)})
+    return ctx.model_copy(update={'session': session})
+
+
+class SpeculativeStage:
+    """
+    提前在后台运行某个阶段，事件先缓存而不下发，由调用方在原顺序的位置统一下发；
+    运行失败或被取消时由调用方顺序重跑。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        events: AsyncGenerator[Event, None],
+        timer: Optional[StageTimer] = None,
+    ):
+        self.name = name
+        self.timer = timer
+        self.invalidated = False
+        self._buffer: List[Event] = []
+        self._task = asyncio.create_task(self._consume(events))
+
+    async def _consume(self, events: AsyncGenerator[Event, None]):
+        if self.timer:
+            self.timer.start(self.name)
+        try:
+            async for event in events:
+                self._buffer.append(event)
+        finally:
+            if self.timer:
+                self.timer.stop(self.name)
+
+    def cancel(self):
+        self.invalidated = True
+        if not self._task.done():
+            self._task.cancel()
+
+    async def result(self) -> Optional[List[Event]]:
+        """返回缓存的事件；若推测失效或执行异常，返回 None"""
+        if self.invalidated:
+            return None
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            if not self.invalidated:
+                raise
+            return None
+        except Exception as err:
+            logger.warning(f'{self.name} speculative run failed, fallback: {err}')
+            return None
+
+        # 缓存事件在后续才下发，刷新时间戳保证会话事件有序
+        now = time.time()
+        for event in self._buffer:
+            event.timestamp = now
+        return self._buffer
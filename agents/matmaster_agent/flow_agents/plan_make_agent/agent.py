@@ -8,6 +8,9 @@ from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
 from agents.matmaster_agent.core_agents.base_agents.schema_agent import (
     DisallowTransferAndContentLimitSchemaAgent,
 )
+from agents.matmaster_agent.flow_agents.execution_agent.scheduler import (
+    normalize_depends_on,
+)
 from agents.matmaster_agent.logger import PrefixFilter
 from agents.matmaster_agent.state import MULTI_PLANS
 from agents.matmaster_agent.utils.event_utils import update_state_event
@@ -44,9 +47,10 @@ class PlanMakeAgent(DisallowTransferAndContentLimitSchemaAgent):
             total_steps = len(update_plan.get('steps', []))
             exist_step = 0
             update_plan_steps = []
-            for step in update_plan.get('steps', []):
+            for index, step in enumerate(update_plan.get('steps', [])):
                 if not step['tool_name']:
                     step['tool_name'] = 'llm_tool'
+                step['depends_on'] = normalize_depends_on(step.get('depends_on'), index)
                 update_plan_steps.append(step)
             update_plan['steps'] = update_plan_steps
 
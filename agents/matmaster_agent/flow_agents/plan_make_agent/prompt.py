@@ -24,6 +24,7 @@ Return a JSON structure with the following format:
           "tool_name": <string|null>,  // Name of the tool to use (exact match from available list). Use null if no suitable tool exists
           "description": <string>,     // Clear explanation of what this tool call will accomplish
           "feasibility": <string>,     // Evidence input/preceding steps support this step, or why no tool support exists
+          "depends_on": <list[int]>,   // 1-based numbers of EARLIER steps whose outputs this step consumes; [] if it needs none
           "status": "plan"             // Always return "plan"
         }}
       ]
@@ -41,6 +42,7 @@ CRITICAL GUIDELINES:
 7. Match tools precisely to requirements - if functionality doesn't align exactly, use null
 8. Ensure each plan’s steps array represents a complete execution sequence for the request
 9. Across different plans, avoid producing identical step lists; vary tooling and/or ordering whenever feasible.
+10. Fill "depends_on" precisely: list every earlier step whose result (file URL, structure, parameters) this step uses, and use [] only when the step needs nothing from other steps. Independent steps (e.g., retrieving or generating different structures) may be executed concurrently.
 
 EXECUTION PRINCIPLES:
 - Make sure that the previous steps can provide the input information required for the current step, such as the file URL
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Literal, Optional
 
 from pydantic import BaseModel, create_model
@@ -5,13 +6,15 @@ from pydantic import BaseModel, create_model
 from agents.matmaster_agent.flow_agents.model import PlanStepStatusEnum
 
 
-def create_dynamic_multi_plans_schema(available_tools: list):
+@lru_cache(maxsize=256)
+def create_dynamic_multi_plans_schema(available_tools: tuple[str, ...]):
     # 动态创建 PlanStepSchema
     DynamicPlanStepSchema = create_model(
         'DynamicPlanStepSchema',
         tool_name=(Optional[Literal[tuple(available_tools)]], None),
         description=(str, ...),
         feasibility=(str, ...),
+        depends_on=(Optional[List[int]], None),
         status=(
             Literal[tuple(PlanStepStatusEnum.__members__.values())],
             PlanStepStatusEnum.PLAN.value,
@@ -0,0 +1,36 @@
+from functools import lru_cache
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+from opik.integrations.adk import track_adk_agent_recursive
+
+from agents.matmaster_agent.flow_agents.step_title_agent.constant import (
+    STEP_TITLE_AGENT,
+)
+from agents.matmaster_agent.flow_agents.step_title_agent.schema import (
+    StepTitlesSchema,
+)
+from agents.matmaster_agent.llm_config import MatMasterLlmConfig
+from agents.matmaster_agent.utils.instruction_utils import get_invocation_args
+
+
+def render_step_titles_instruction(ctx: ReadonlyContext) -> str:
+    # provider 返回的 instruction 不做 {state_key} 注入，步骤描述中的花括号原样保留
+    return get_invocation_args(ctx.agent_name).kwargs['prompt']
+
+
+@lru_cache(maxsize=1)
+def get_step_title_agent() -> LlmAgent:
+    """进程内共享的批量标题 agent：只看本次传入的步骤列表，不读取会话内容"""
+    agent = LlmAgent(
+        name=STEP_TITLE_AGENT,
+        model=MatMasterLlmConfig.tool_schema_model,
+        description='一次性给出计划中每一步的标题',
+        instruction=render_step_titles_instruction,
+        include_contents='none',
+        output_schema=StepTitlesSchema,
+        disallow_transfer_to_parent=True,
+        disallow_transfer_to_peers=True,
+    )
+    track_adk_agent_recursive(agent, MatMasterLlmConfig.opik_tracer)
+    return agent
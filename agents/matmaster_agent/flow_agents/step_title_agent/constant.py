@@ -0,0 +1 @@
+STEP_TITLE_AGENT = 'step_title_agent'
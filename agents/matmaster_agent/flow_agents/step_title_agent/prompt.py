@@ -1,6 +1,12 @@
-STEP_TITLE_INSTRUCTION = """
+STEP_TITLES_PROMPT = """
+Give a short title (no more than 15 words) for each of the following plan steps.
+All titles must be written in {target_language}.
+
+Plan steps:
+{steps}
+
 You must respond with a JSON object containing:
 {{
-    "title": string,  // title description in {target_language}
+    "titles": [string]  // one title per step, in the same order as the plan steps
 }}
 """
@@ -1,5 +1,7 @@
+from typing import List
+
 from pydantic import BaseModel
 
 
-class StepTitleSchema(BaseModel):
-    title: str
+class StepTitlesSchema(BaseModel):
+    titles: List[str]
@@ -0,0 +1,80 @@
+import logging
+import re
+from typing import List, Optional
+
+from google.adk.agents import InvocationContext
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.flow_agents.constant import MATMASTER_SUPERVISOR_AGENT
+from agents.matmaster_agent.flow_agents.step_title_agent.agent import (
+    get_step_title_agent,
+)
+from agents.matmaster_agent.flow_agents.step_title_agent.constant import (
+    STEP_TITLE_AGENT,
+)
+from agents.matmaster_agent.flow_agents.step_title_agent.prompt import (
+    STEP_TITLES_PROMPT,
+)
+from agents.matmaster_agent.flow_agents.step_title_agent.schema import (
+    StepTitlesSchema,
+)
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.utils.fanout_utils import branch_ctx
+from agents.matmaster_agent.utils.helper_func import extract_json_from_string
+from agents.matmaster_agent.utils.instruction_utils import invocation_args
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+STEP_TITLE_MAX_LEN = 30
+
+
+def template_step_title(step: dict) -> str:
+    """不调用 LLM，直接由步骤描述的首句生成标题（用于重试或批量标题尚未返回时）"""
+    description = step.get('description', '').split('\n\n注意：')[0].strip()
+    title = re.split(r'[。；;\n]|\.\s', description, maxsplit=1)[0].strip()
+    if len(title) > STEP_TITLE_MAX_LEN:
+        title = title[:STEP_TITLE_MAX_LEN] + '…'
+    return title or step.get('tool_name', '')
+
+
+async def generate_step_titles(
+    ctx: InvocationContext, steps: List[dict], target_language: str
+) -> Optional[List[str]]:
+    """
+    一次 LLM 调用为计划中所有步骤生成标题，失败或数量不符时返回 None。
+    通过 step_title_agent 调用（与其它模型调用一样经过 ADK 与 opik 追踪），
+    在独立 branch 中运行，事件不写入会话。
+    """
+    prompt = STEP_TITLES_PROMPT.format(
+        target_language=target_language,
+        steps='\n'.join(
+            f"{index + 1}. `{step.get('tool_name')}`: {step.get('description', '')}"
+            for index, step in enumerate(steps)
+        ),
+    )
+    agent = get_step_title_agent()
+    text = ''
+    try:
+        with invocation_args(STEP_TITLE_AGENT, prompt=prompt):
+            async for event in agent.run_async(
+                branch_ctx(ctx, MATMASTER_SUPERVISOR_AGENT, agent)
+            ):
+                if event.is_final_response() and event.content and event.content.parts:
+                    text = ''.join(
+                        part.text
+                        for part in event.content.parts
+                        if part.text and not part.thought
+                    )
+        titles = StepTitlesSchema.model_validate_json(
+            extract_json_from_string(text)
+        ).titles
+    except Exception as err:
+        logger.warning(f'generate step titles failed: {err!r}')
+        return None
+
+    if len(titles) != len(steps):
+        logger.warning(f'step titles mismatch: {len(titles)} != {len(steps)}')
+        return None
+    return titles
@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from typing import List
 
 from google.adk.agents import InvocationContext
@@ -14,6 +15,15 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+@lru_cache(maxsize=256)
+def tools_info_prompt(available_tools: tuple[str, ...]) -> str:
+    """plan_make 的可用工具说明，按工具集合缓存"""
+    return '\n'.join(
+        f"{tool}\n    scene: {', '.join(ALL_TOOLS[tool]['scene'])}\n    description: {ALL_TOOLS[tool]['description']}"
+        for tool in available_tools
+    )
+
+
 def get_tools_list(ctx: InvocationContext, scenes: list):
     if not scenes:
         return ALL_AGENT_TOOLS_LIST
@@ -1,3 +1,5 @@
+from contextvars import ContextVar
+
 from toolsy.i8n import I18N
 
 translations = {
@@ -26,6 +28,7 @@ translations = {
         'NoFoundStructure': 'No eligible structures found.',
         'WalletNoFee': 'Insufficient wallet balance',
         'WalletNoFeeAction': 'Insufficient wallet balance. Please top up your account on [this page](https://www.bohrium.com/consume?menu=cash) and try again.',
+        'ErrorExplainFallback': 'An error occurred during execution ({error_type}): {error_message}\nThe service may be temporarily unavailable or the input parameters may be invalid. Please try again later or adjust the parameters.',
     },
     'zh': {
         'JobStatus': '任务状态',
@@ -52,7 +55,40 @@ translations = {
         'NoFoundStructure': '未找到符合条件的结构',
         'WalletNoFee': '钱包余额不足',
         'WalletNoFeeAction': '钱包余额不足，请在[此页面](https://www.bohrium.com/consume?menu=cash)充值后重试。',
+        'ErrorExplainFallback': '执行过程中出现错误（{error_type}）：{error_message}\n可能是服务暂时不可用或输入参数有误，请稍后重试或调整参数。',
     },
 }
 
-i18n = I18N(translations=translations)
+
+class InvocationI18N(I18N):
+    """
+    语言保存在 ContextVar 中而不是实例属性上：每个 invocation 在自己的协程上下文里设置语言，
+    并发会话之间互不覆盖。
+    """
+
+    def __init__(self, translations=None):
+        super().__init__(translations=translations)
+        self._language_var: ContextVar[str] = ContextVar(
+            'i18n_language', default=self._language
+        )
+
+    @property
+    def language(self) -> str:
+        return self._language_var.get()
+
+    @language.setter
+    def language(self, lang: str):
+        if lang in self._translations:
+            self._language_var.set(lang)
+
+    def t(self, key: str, **variables) -> str:
+        text = self._translations.get(self.language, {}).get(
+            key, self._translations['en'].get(key, key)
+        )
+        try:
+            return text.format(**variables)
+        except (KeyError, ValueError):
+            return text
+
+
+i18n = InvocationI18N(translations=translations)
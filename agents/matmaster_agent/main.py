@@ -7,7 +7,18 @@ from rich import print
 
 from agents.matmaster_agent.agent import root_agent
 from agents.matmaster_agent.constant import DBUrl
+from agents.matmaster_agent.flow_agents.agent import execution_agent_pool
 from agents.matmaster_agent.logger import logger
+from agents.matmaster_agent.services.common_db import (
+    common_db_metrics,
+    paper_content_metrics,
+)
+from agents.matmaster_agent.services.error_explainer import error_explainer
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.services.session_files import session_file_writer
+from agents.matmaster_agent.services.structure import structure_info_cache
+from agents.matmaster_agent.utils.fanout_utils import fanout_metrics
+from agents.matmaster_agent.utils.transfer_utils import transfer_check_metrics
 
 # litellm._turn_on_debug()
 
@@ -32,6 +43,9 @@ async def agent_main() -> None:
     )
     logger.info(f"Current Session: {session.id}")
 
+    # Shared HTTP connection pools live as long as the runner
+    await http_client.start()
+
     # Set up the agent runner with root agent and session service
     runner = Runner(
         app_name='matmaster_agent', agent=root_agent, session_service=session_service
@@ -117,6 +131,17 @@ async def agent_main() -> None:
 
     # Clean up resources
     await runner.close()
+    await session_file_writer.close()
+    await http_client.close()
+    logger.info(f'transfer check metrics = {transfer_check_metrics.snapshot()}')
+    logger.info(f'error explain metrics = {error_explainer.metrics.snapshot()}')
+    logger.info(f'structure info metrics = {structure_info_cache.metrics.snapshot()}')
+    logger.info(f'common db metrics = {common_db_metrics.snapshot()}')
+    logger.info(f'paper content metrics = {paper_content_metrics.snapshot()}')
+    logger.info(f'paper fanout metrics = {fanout_metrics.snapshot()}')
+    logger.info(
+        f'execution agent pool metrics = {execution_agent_pool.metrics.snapshot()}'
+    )
 
 
 if __name__ == '__main__':
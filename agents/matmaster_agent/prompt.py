@@ -6,6 +6,17 @@ Important: Do not end with any question or prompt for user action.
 ---
 """
 
+ERROR_EXPLAIN_INSTRUCTION = """
+An error occurred while running a tool or agent.
+Error type: {error_type}
+Error message: {error_message}
+
+Briefly explain the most likely cause of this error and what the user can do about it.
+Only rely on the error above; placeholders such as <url>, <id>, <hex> and <n> stand for values that were removed.
+Language: always answer in this language ({language}).
+Important: Do not end with any question or prompt for user action.
+"""
+
 GLOBAL_SCHEMA_INSTRUCTION = """
 ---
 Return ONLY valid JSON object - no additional text, explanations, or formatting
@@ -0,0 +1,538 @@
+"""
+common_db（db-core）数据库访问：chembrain / ssebrain 等 agent 共用的表结构查询与数据查询工具。
+
+各 agent 通过 register_database 注册自己的表配置，用 get_database_manager 取得进程内共享的管理器；
+表结构（字段列表与字段说明）按 (数据库, 表) 进程级缓存，一次加载同时服务 get_table_fields、
+get_table_field_info 与 query_table 的默认字段，请求走共享的 http_client 连接池。
+"""
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional
+
+from agents.matmaster_agent.config import COMMON_DB_SCHEMA_TTL, PAPER_CONTENT_CACHE_TTL
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.services.http_client import DEFAULT_RETRY, http_client
+from agents.matmaster_agent.utils.cache_utils import AsyncLoadingCache, TTLCache
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+COMMON_DB_TABLE_URL = 'https://db-core.dp.tech/api/common_db/v1/table'
+COMMON_DB_QUERY_URL = 'https://db-core.dp.tech/api/common_db/v1/common_data/list'
+COMMON_DB_USER_ID = 14962
+COMMON_DB_HEADERS = {'X-User-Id': str(COMMON_DB_USER_ID), 'X-Org-Id': '3962'}
+COMMON_DB_SCHEMA_CACHE_SIZE = 256
+FIELD_INFO_PAGE_SIZE = 500
+PAPER_CONTENT_CACHE_SIZE = 128
+PAPER_BATCH_SIZE = 50  # 单次 doi IN (...) 查询的 DOI 数
+PAPER_PAGE_SIZE = 100
+PAPER_FIGURES_LIMIT = 50  # 每篇论文最多保留的图片数，与原单篇查询的 page_size 一致
+
+_QUERY_TABLE_DOC_HEAD = """
+            Query the table
+            Args:
+                table_name: the name of the table
+                filters_json: A JSON formatted string representing the query conditions. IMPORTANT: You must construct the dictionary structure as a valid JSON string.
+"""
+_QUERY_TABLE_DOC_TAIL = """                selected_fields: the fields to include in the result, if None, return all fields
+                page: the page number of the query, default is 1
+                page_size: the page size of the query, default is 50
+                More details about filters_json:
+                A JSON structure used for database queries to specify query conditions. It contains the following two types of conditions:
+                - Type 1: Single condition
+                example: {"type": 1, "field": "column_name", "operator": "op",  "value": "some_value"}
+                details:
+                - type: 1, indicating a single condition
+                - field: The name of the field to be queried.
+                - operator: The operator to be used for the query.
+                - For numeric fields, you can use lt (less than), gt (greater than), eq (equal to), ne (not equal to), le (less than or equal to), ge (greater than or equal to), and use float or int as the value, not str.
+                - For string fields, always use like (for partial string matching).
+                - value: The value of the field. If the field is a list, you can use in (for list matching) or like (for partial string matching).
+                - Type 2: Combined condition. This type of condition is used to combine multiple conditions using 'and' or 'or' logic.
+                example: {"type": 2, "groupOperator": "and", "sub": [{...filter_condition_1...}, {...filter_condition_2...}, ...]}\\
+                - type: 2, indicating a combined condition
+                - groupOperator: The operator to be used for combining the conditions. It can be 'and' or 'or'.
+                - sub: A list of filter conditions to be combined. Each condition in the list can be either a single condition (Type 1) or a combined condition (Type 2).
+            Returns:
+                A dictionary containing the result of the query, {'result': [row1, row2, ...], 'row_count': row_count, 'papers': [doi1, doi2, ...], 'paper_count': paper_count}
+            """
+
+# db_name -> 表配置（tables / paper_text_table / paper_figure_table / field_info_table 等）
+_DATABASES: Dict[str, dict] = {}
+
+
+def register_database(db_name: str, tables: dict):
+    _DATABASES[db_name] = tables
+
+
+@dataclass(slots=True)
+class CommonDbMetrics:
+    schema_lookups: int = 0
+    schema_loads: int = 0
+    queries: int = 0
+    query_errors: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'schema_lookups': self.schema_lookups,
+            'schema_loads': self.schema_loads,
+            'schema_hit_rate': round(
+                1 - self.schema_loads / max(self.schema_lookups, 1), 3
+            ),
+            'queries': self.queries,
+            'query_errors': self.query_errors,
+        }
+
+
+@dataclass(slots=True)
+class PaperContentMetrics:
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    round_trips: int = 0
+    legacy_round_trips: int = 0
+    bytes_fetched: int = 0
+    bytes_saved: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'round_trips': self.round_trips,
+            # 按原实现（每次调用每篇论文单独查询）估算
+            'round_trips_saved': self.legacy_round_trips - self.round_trips,
+            'bytes_fetched': self.bytes_fetched,
+            'bytes_saved': self.bytes_saved,
+        }
+
+
+common_db_metrics = CommonDbMetrics()
+paper_content_metrics = PaperContentMetrics()
+# (db_name, table_name) -> {'fields', 'primary_fields', 'field_info'}
+_schema_cache = AsyncLoadingCache(COMMON_DB_SCHEMA_CACHE_SIZE, COMMON_DB_SCHEMA_TTL)
+# (db_name, doi) -> (论文内容, 序列化字节数)
+_paper_cache = TTLCache(PAPER_CONTENT_CACHE_SIZE, PAPER_CONTENT_CACHE_TTL)
+_paper_inflight: Dict[tuple[str, str], asyncio.Future] = {}
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+def _to_snake_case(name: str) -> str:
+    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+
+
+async def _post_query(payload: dict) -> tuple[dict, str]:
+    # 查询接口虽为 POST 但只读，允许重试
+    async with http_client.post(
+        COMMON_DB_QUERY_URL,
+        headers=COMMON_DB_HEADERS,
+        json={'userId': COMMON_DB_USER_ID, **payload},
+        retry=DEFAULT_RETRY,
+    ) as response:
+        raw = await response.text()
+    return json.loads(raw), raw
+
+
+class DatabaseManager:
+    """
+    A manager for database operations.
+    """
+
+    def __init__(self, db_name: str):
+        if db_name not in _DATABASES:
+            raise ValueError(f'Database name {db_name} not supported!')
+        self.db_name = db_name
+        tables = _DATABASES[db_name]
+
+        # get the table names
+        self.paper_text_table = tables.get('paper_text_table', None)
+        self.paper_figure_table = tables.get('paper_figure_table', None)
+        self.field_info_table = tables.get('field_info_table', None)
+        self.query_filters_example = tables.get('query_filters_example', '')
+        self.tables: List[dict] = tables['tables']
+
+        # table_name -> 表配置 + fields / primary_fields，由 async_init 填充
+        self.table_schema: Dict[str, dict] = {}
+
+    async def _load_table_schema(self, table_name: str) -> dict:
+        common_db_metrics.schema_loads += 1
+        if self.field_info_table:
+            result, raw = await _post_query(
+                {
+                    'tableAk': self.field_info_table,
+                    'filters': {
+                        'type': 1,
+                        'field': 'tableAK',
+                        'operator': 'eq',
+                        'value': table_name,
+                    },
+                    'page': 1,
+                    'pageSize': FIELD_INFO_PAGE_SIZE,
+                }
+            )
+            if result.get('code', 0) != 0:
+                raise ValueError(raw)
+            field_info = {
+                item['field']: {
+                    'field': item['field'],
+                    'type': item.get('type'),
+                    'description': item.get('description'),
+                    'example': item.get('example', None),
+                    'note': item.get('note', None),
+                }
+                for item in (result.get('data') or {}).get('list') or []
+            }
+            primary_fields = [
+                name
+                for name, info in field_info.items()
+                if 'primary' in (info['note'] or '')
+            ]
+        else:
+            async with http_client.get(
+                COMMON_DB_TABLE_URL,
+                headers=COMMON_DB_HEADERS,
+                params={'tableAk': table_name},
+            ) as response:
+                raw = await response.text()
+            result = json.loads(raw)
+            if result['code'] != 0:
+                raise ValueError(raw)
+            if not result['data']['fields']:
+                raise ValueError(f'No fields found in table {table_name}')
+            field_info = {field['name']: field for field in result['data']['fields']}
+            primary_fields = []
+
+        return {
+            'fields': list(field_info),
+            'primary_fields': primary_fields,
+            'field_info': field_info,
+        }
+
+    async def get_table_schema(self, table_name: str) -> dict:
+        common_db_metrics.schema_lookups += 1
+        return await _schema_cache.get(
+            (self.db_name, table_name), partial(self._load_table_schema, table_name)
+        )
+
+    async def _default_fields(self, table_name: str) -> Optional[List[str]]:
+        try:
+            schema = await self.get_table_schema(table_name)
+        except Exception:
+            return None
+        return schema['primary_fields'] or schema['fields'] or None
+
+    async def async_init(self):
+        async def table_fields(table_name: str) -> dict:
+            try:
+                return await self.get_table_schema(table_name)
+            except Exception as err:
+                logger.warning(f'{self.db_name}.{table_name} schema failed: {err!r}')
+                return {'fields': [], 'primary_fields': []}
+
+        # 各表并发加载；每次生成新的 dict，不修改共享的表配置
+        schemas = await asyncio.gather(
+            *(table_fields(table.get('table_name', '')) for table in self.tables)
+        )
+        self.table_schema = {
+            table.get('table_name', ''): {
+                **table,
+                'fields': schema['fields'],
+                'primary_fields': schema['primary_fields'] or schema['fields'],
+            }
+            for table, schema in zip(self.tables, schemas)
+        }
+
+    def init_get_table_fields(self):
+        async def get_table_fields(table_name: str):
+            """
+            Get the fields of a table
+            Args:
+                table_name: the name of the table
+                Should determine which table to query based on the user's requirements
+
+            Returns:
+                A dictionary containing the fields of the table, {'fields': [field_name1, field_name2, ...]}
+            """
+            try:
+                schema = await self.get_table_schema(table_name)
+            except Exception as err:
+                return {'error': str(err)}
+            return {
+                'fields': schema['fields'],
+                'primary_fields': schema['primary_fields'],
+            }
+
+        return get_table_fields
+
+    def init_get_table_field_info(self):
+        """instantiate the get_table_field_info function tool"""
+
+        async def get_table_field_info(table_name: str, field_name: str):
+            """
+            Get the info of a field in a table
+            Args:
+                table_name: the name of the table
+                field_name: the name of the field
+                Should carefully consider which field to query based on the user's requirements. When querying molecules, pay particular attention to distinguishing between abbreviations and full names.
+                Name like PMDA, PPD is the abbreviation of the molecule, while 3-Chlorophthalic anhydride is the full name of the molecule.
+
+            Returns:
+                A dictionary containing the info of the field, {'field_info': {field_name: field_info}}
+            """
+            try:
+                schema = await self.get_table_schema(table_name)
+            except Exception as err:
+                return {'error': str(err)}
+            if field_name not in schema['field_info']:
+                return {'error': f'Field {field_name} not found in table {table_name}'}
+            return {'field_info': schema['field_info'][field_name]}
+
+        return get_table_field_info
+
+    def init_query_table(self):
+        """instantiate the query_table function tool"""
+
+        async def query_table(
+            table_name: str,
+            filters_json: str,
+            selected_fields: Optional[List[str]] = None,
+            page: Optional[int] = 1,
+            page_size: Optional[int] = 50,
+        ):
+            try:
+                # First, parse the JSON string back into a Python dictionary
+                filters = json.loads(filters_json)
+            except json.JSONDecodeError as e:
+                return {'error': f"Invalid JSON in filters_json parameter: {e}"}
+
+            if selected_fields is None:
+                selected_fields = await self._default_fields(table_name)
+            common_db_metrics.queries += 1
+            result, raw = await _post_query(
+                {
+                    'tableAk': table_name,
+                    'filters': filters,
+                    'selectedFields': selected_fields,
+                    'page': page,
+                    'pageSize': page_size,
+                }
+            )
+            if result['code'] != 0:
+                common_db_metrics.query_errors += 1
+                return {
+                    'error': raw,
+                    'row_count': 0,
+                    'papers': [],
+                    'paper_count': 0,
+                }
+            items = result['data']['list']
+            if not items:
+                return {
+                    'error': 'No data found!',
+                    'row_count': 0,
+                    'papers': [],
+                    'paper_count': 0,
+                }
+
+            selected = set(selected_fields) if selected_fields else None
+            rows = []
+            for item in items:
+                if table_name == 'polym00':
+                    item = {_to_snake_case(key): value for key, value in item.items()}
+                rows.append(
+                    {
+                        key: value
+                        for key, value in item.items()
+                        if selected is None or key in selected
+                    }
+                )
+            dois = list({item['doi'] for item in items if 'doi' in item})
+            return {
+                'result': rows,
+                'row_count': len(items),
+                'papers': dois,
+                'paper_count': len(dois),
+            }
+
+        query_table.__doc__ = (
+            _QUERY_TABLE_DOC_HEAD + self.query_filters_example + _QUERY_TABLE_DOC_TAIL
+        )
+        return query_table
+
+    async def _query_papers_table(
+        self, table_name: str, dois: List[str], limit_per_paper: int
+    ) -> Dict[str, List[dict]]:
+        """按 DOI 批量查询（doi IN (...)，分页取完），返回 doi -> 行"""
+        selected_fields = await self._default_fields(table_name)
+        request_fields = (
+            list({*selected_fields, 'doi'}) if selected_fields is not None else None
+        )
+        selected = set(selected_fields) if selected_fields else None
+        requested = {doi.lower(): doi for doi in dois}
+        rows_by_doi: Dict[str, List[dict]] = {}
+        for offset in range(0, len(dois), PAPER_BATCH_SIZE):
+            batch = dois[offset : offset + PAPER_BATCH_SIZE]
+            page = 1
+            while True:
+                result, raw = await _post_query(
+                    {
+                        'tableAk': table_name,
+                        'filters': {
+                            'type': 1,
+                            'field': 'doi',
+                            'operator': 'in',
+                            'value': batch,
+                        },
+                        'selectedFields': request_fields,
+                        'page': page,
+                        'pageSize': PAPER_PAGE_SIZE,
+                    }
+                )
+                paper_content_metrics.round_trips += 1
+                paper_content_metrics.bytes_fetched += len(raw)
+                if result.get('code', 0) != 0:
+                    raise ValueError(raw)
+                items = (result.get('data') or {}).get('list') or []
+                for item in items:
+                    # 库中 DOI 大小写可能与请求不同
+                    doi = requested.get(str(item.get('doi', '')).lower())
+                    rows = rows_by_doi.setdefault(doi, [])
+                    if len(rows) < limit_per_paper:
+                        rows.append(
+                            {
+                                key: value
+                                for key, value in item.items()
+                                if selected is None or key in selected
+                            }
+                        )
+                if len(items) < PAPER_PAGE_SIZE:
+                    break
+                page += 1
+        return rows_by_doi
+
+    async def _query_papers(self, dois: List[str]) -> Dict[str, dict]:
+        text_rows, figure_rows = await asyncio.gather(
+            self._query_papers_table(self.paper_text_table, dois, 1),
+            (
+                self._query_papers_table(
+                    self.paper_figure_table, dois, PAPER_FIGURES_LIMIT
+                )
+                if self.paper_figure_table
+                else asyncio.sleep(0, {})
+            ),
+        )
+        contents = {}
+        for doi in dois:
+            full_text = None
+            if rows := text_rows.get(doi):
+                full_text = rows[0].get('main_txt')
+                if full_text is None:
+                    full_text = rows[0].get('main-text', '')
+            contents[doi] = {'main_txt': full_text, 'figures': figure_rows.get(doi)}
+        return contents
+
+    async def fetch_papers_content(self, dois: List[str]) -> Dict[str, dict]:
+        """
+        批量获取论文全文与图片：缓存命中的直接返回，正在获取的等待同一结果，
+        其余合并为每张表一次 doi IN (...) 查询；获取失败的论文结果为 None。
+        """
+        metrics = paper_content_metrics
+        dois = list(dict.fromkeys(dois))
+        contents: Dict[str, Optional[dict]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+        for doi in dois:
+            key = (self.db_name, doi)
+            metrics.requests += 1
+            # 原实现每次调用每篇论文分别查询全文表与图片表
+            metrics.legacy_round_trips += 2 if self.paper_figure_table else 1
+            if (cached := _paper_cache.get(key)) is not None:
+                metrics.cache_hits += 1
+                contents[doi], size = cached
+                metrics.bytes_saved += size
+            elif (future := _paper_inflight.get(key)) is not None:
+                metrics.coalesced += 1
+                waiting[doi] = future
+            else:
+                missing.append(doi)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {doi: loop.create_future() for doi in missing}
+            for doi, future in futures.items():
+                _paper_inflight[(self.db_name, doi)] = future
+            fetched = {}
+            try:
+                fetched = await self._query_papers(missing)
+            except Exception as err:
+                logger.warning(f'fetch papers {missing} failed: {err!r}')
+            finally:
+                for doi, future in futures.items():
+                    content = fetched.get(doi)
+                    if content and (content['main_txt'] or content['figures']):
+                        _paper_cache.set(
+                            (self.db_name, doi),
+                            (content, len(json.dumps(content, default=str))),
+                        )
+                    _paper_inflight.pop((self.db_name, doi), None)
+                    future.set_result(content)
+                    contents[doi] = content
+
+        for doi, future in waiting.items():
+            contents[doi] = await asyncio.shield(future)
+            if (cached := _paper_cache.get((self.db_name, doi))) is not None:
+                metrics.bytes_saved += cached[1]
+        return contents
+
+    def prefetch_papers(self, dois: List[str]):
+        """检索返回论文列表后立即在后台批量获取，各论文 agent 读取时直接命中缓存"""
+        if not dois or self.paper_text_table is None:
+            return
+        before = paper_content_metrics.snapshot()
+
+        async def prefetch():
+            await self.fetch_papers_content(dois)
+            after = paper_content_metrics.snapshot()
+            logger.info(
+                f'prefetched {len(dois)} papers from {self.db_name}: '
+                f'round_trips = {after["round_trips"] - before["round_trips"]}, '
+                f'bytes = {after["bytes_fetched"] - before["bytes_fetched"]}'
+            )
+
+        task = asyncio.create_task(prefetch())
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+
+    def init_fetch_paper_content(self):
+        """instantiate the fetch_paper_content function tool"""
+
+        async def fetch_paper_content(paper_doi):
+            # get paper text
+            if self.paper_text_table is None:
+                return '', None
+            content = (await self.fetch_papers_content([paper_doi]))[paper_doi]
+            if content is None or (
+                content['main_txt'] is None and content['figures'] is None
+            ):
+                return {'error': 'No data found!', 'tool': 'fetch_paper_content'}
+            return content
+
+        return fetch_paper_content
+
+
+_managers: Dict[str, DatabaseManager] = {}
+
+
+def get_database_manager(db_name: str) -> DatabaseManager:
+    """进程内共享的 DatabaseManager；表结构由进程级缓存提供，async_init 只在缓存过期时访问接口"""
+    if db_name not in _managers:
+        _managers[db_name] = DatabaseManager(db_name)
+    return _managers[db_name]
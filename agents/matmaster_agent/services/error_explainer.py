@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import InvocationContext, LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event
+from google.adk.models.lite_llm import LiteLlm
+from opik.integrations.adk import track_adk_agent_recursive
+
+from agents.matmaster_agent.config import (
+    ERROR_EXPLAIN_BURST,
+    ERROR_EXPLAIN_CACHE_TTL,
+    ERROR_EXPLAIN_RATE,
+)
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.core_agents.base_agents.climit_agent import (
+    ContentLimitLlmAgent,
+)
+from agents.matmaster_agent.llm_config import DEFAULT_MODEL, MatMasterLlmConfig
+from agents.matmaster_agent.locales import i18n
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.prompt import ERROR_EXPLAIN_INSTRUCTION
+from agents.matmaster_agent.utils.cache_utils import TTLCache
+from agents.matmaster_agent.utils.instruction_utils import (
+    get_invocation_args,
+    invocation_args,
+)
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+ERROR_EXPLAIN_CACHE_SIZE = 1024
+ERROR_MESSAGE_KEY_LENGTH = 300
+
+# 错误信息中每次都不同的部分（URL、ID、数字等），归一化后同类错误共享解释
+_URL_RE = re.compile(r'https?://\S+')
+_UUID_RE = re.compile(
+    r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.I
+)
+_HEX_RE = re.compile(r'\b(?:0x)?[0-9a-f]{8,}\b', re.I)
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_error_message(message: str) -> str:
+    message = _URL_RE.sub('<url>', message)
+    message = _UUID_RE.sub('<id>', message)
+    message = _HEX_RE.sub('<hex>', message)
+    message = _NUMBER_RE.sub('<n>', message)
+    message = _WHITESPACE_RE.sub(' ', message).strip()
+    return message[:ERROR_MESSAGE_KEY_LENGTH]
+
+
+def render_error_explain_instruction(ctx: ReadonlyContext) -> str:
+    # provider 返回的 instruction 不做 {state_key} 注入，错误信息中的花括号原样保留
+    language, error_type, error_message = get_invocation_args(ctx.agent_name).kwargs[
+        'key'
+    ]
+    return ERROR_EXPLAIN_INSTRUCTION.format(
+        language=language, error_type=error_type, error_message=error_message
+    )
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+@dataclass(slots=True)
+class ErrorExplainMetrics:
+    explains: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    llm_calls: int = 0
+    llm_errors: int = 0
+    degraded: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'explains': self.explains,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'llm_calls': self.llm_calls,
+            'llm_errors': self.llm_errors,
+            'degraded': self.degraded,
+            'llm_skip_rate': round(1 - self.llm_calls / max(self.explains, 1), 3),
+        }
+
+
+class ErrorExplainer:
+    """
+    进程内共享的错误分析：agent 只构建一次；解释按 (语言, 错误类型, 归一化错误信息) 缓存，
+    相同错误同时只有一次 LLM 调用，其余调用方等待其结果；超出限流时降级为模板说明，
+    避免后端故障、请求大量报错时错误分析本身放大负载与延迟。
+
+    解释会共享给其它会话，因此 agent 不读取会话内容，只根据缓存 key 中的归一化错误信息生成。
+    """
+
+    def __init__(self, cache_ttl: float, rate: float, burst: int):
+        self._cache = TTLCache(ERROR_EXPLAIN_CACHE_SIZE, cache_ttl)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._limiter = _TokenBucket(rate, burst)
+        self._agent: Optional[LlmAgent] = None
+        self.metrics = ErrorExplainMetrics()
+
+    @property
+    def agent(self) -> LlmAgent:
+        if self._agent is None:
+            self._agent = ContentLimitLlmAgent(
+                name='error_handel_agent',
+                description='仅分析错误原因',
+                instruction=render_error_explain_instruction,
+                include_contents='none',
+                model=LiteLlm(model=DEFAULT_MODEL),
+            )
+            track_adk_agent_recursive(self._agent, MatMasterLlmConfig.opik_tracer)
+        return self._agent
+
+    @staticmethod
+    def key(error_type: str, error_message: str) -> tuple[str, str, str]:
+        return i18n.language, error_type, normalize_error_message(error_message)
+
+    async def run(
+        self, ctx: InvocationContext, key: tuple
+    ) -> AsyncGenerator[Event, None]:
+        """运行 agent 生成 key 对应的解释（需先通过 try_begin）"""
+        with invocation_args(self.agent.name, key=key):
+            async for event in self.agent.run_async(ctx):
+                yield event
+
+    async def lookup(self, key: tuple) -> Optional[str]:
+        """已缓存或正在生成的解释；没有时返回 None"""
+        self.metrics.explains += 1
+        if (explanation := self._cache.get(key)) is not None:
+            self.metrics.cache_hits += 1
+            return explanation
+        if (future := self._inflight.get(key)) is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(future)
+        return None
+
+    def try_begin(self, key: tuple) -> bool:
+        """是否由调用方运行 agent 生成解释（之后必须调用 finish）"""
+        if key in self._inflight or not self._limiter.try_acquire():
+            self.metrics.degraded += 1
+            return False
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        self.metrics.llm_calls += 1
+        return True
+
+    def finish(self, key: tuple, explanation: Optional[str]):
+        if explanation:
+            self._cache.set(key, explanation)
+        else:
+            self.metrics.llm_errors += 1
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(explanation)
+
+    @staticmethod
+    def fallback(error_type: str, error_message: str) -> str:
+        return i18n.t(
+            'ErrorExplainFallback',
+            error_type=error_type,
+            error_message=error_message[:ERROR_MESSAGE_KEY_LENGTH],
+        )
+
+
+error_explainer = ErrorExplainer(
+    cache_ttl=ERROR_EXPLAIN_CACHE_TTL,
+    rate=ERROR_EXPLAIN_RATE,
+    burst=ERROR_EXPLAIN_BURST,
+)
@@ -0,0 +1,198 @@
+"""
+进程内共享的 HTTP 客户端：按 host 复用连接池（keep-alive + DNS 缓存），
+统一超时与重试退避策略，并记录每个 host 的请求量、延迟分布与连接池占用。
+
+用法与 aiohttp.ClientSession 一致：
+
+    async with http_client.get(url, params=...) as response:
+        payload = await response.json()
+"""
+
+import asyncio
+import bisect
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 与 aiohttp 默认值一致（总超时 300 秒），需要更短超时的调用方按请求传入 timeout
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=30)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """连接错误/超时与指定状态码时按指数退避重试"""
+
+    attempts: int = 3
+    backoff: float = 0.2  # 首次重试前等待（秒）
+    max_backoff: float = 2.0
+    statuses: frozenset = frozenset({429, 502, 503, 504})
+
+    def delay(self, attempt: int) -> float:
+        base = min(self.backoff * (2**attempt), self.max_backoff)
+        return base * (0.5 + random.random() / 2)
+
+
+DEFAULT_RETRY = RetryPolicy()
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+@dataclass(slots=True)
+class HostMetrics:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    latency_sum: float = 0.0
+    latency_buckets: list = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    def acquire(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def release(self, latency: float):
+        self.in_flight -= 1
+        self.latency_sum += latency
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def snapshot(self, pool_limit: int) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'in_flight': self.in_flight,
+            'pool_saturation': round(self.in_flight / pool_limit, 3),
+            'max_pool_saturation': round(self.max_in_flight / pool_limit, 3),
+            'latency_avg': round(self.latency_sum / max(self.requests, 1), 4),
+            'latency_histogram': dict(
+                zip(
+                    [f'le_{b}' for b in LATENCY_BUCKETS] + ['le_inf'],
+                    self.latency_buckets,
+                )
+            ),
+        }
+
+
+class HttpClient:
+    def __init__(
+        self,
+        limit_per_host: int = 32,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+        retry: RetryPolicy = DEFAULT_RETRY,
+    ):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self.retry = retry
+        self._sessions: dict[
+            str, tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]
+        ] = {}
+        self._metrics: dict[str, HostMetrics] = {}
+
+    def _get_session(self, host: str) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        cached = self._sessions.get(host)
+        if cached and cached[0] is loop and not cached[1].closed:
+            return cached[1]
+
+        # 每个 host 一个独立的连接池，互不抢占
+        session = aiohttp.ClientSession(
+            timeout=self.timeout,
+            connector=aiohttp.TCPConnector(
+                limit=self.limit_per_host,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            ),
+        )
+        self._sessions[host] = (loop, session)
+        return session
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, *, retry: Optional[RetryPolicy] = None, **kwargs
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        method = method.upper()
+        if retry is None:
+            # 非幂等请求（POST/PATCH）默认不重试，避免重复提交
+            retry = self.retry if method in IDEMPOTENT_METHODS else NO_RETRY
+        host = urlsplit(url).netloc
+        metrics = self._metrics.setdefault(host, HostMetrics())
+        session = self._get_session(host)
+
+        metrics.acquire()
+        start = time.perf_counter()
+        response = None
+        try:
+            for attempt in range(retry.attempts):
+                last_attempt = attempt == retry.attempts - 1
+                try:
+                    response = await session.request(method, url, **kwargs)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                    if last_attempt:
+                        metrics.errors += 1
+                        raise
+                    logger.warning(f'{method} {url} failed ({err!r}), retrying')
+                else:
+                    if response.status not in retry.statuses or last_attempt:
+                        break
+                    logger.warning(f'{method} {url} status {response.status}, retrying')
+                    response.release()
+                metrics.retries += 1
+                await asyncio.sleep(retry.delay(attempt))
+
+            if response.status >= 400:
+                metrics.errors += 1
+            yield response
+        finally:
+            if response is not None:
+                response.release()
+            metrics.release(time.perf_counter() - start)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self) -> dict:
+        return {
+            host: m.snapshot(self.limit_per_host) for host, m in self._metrics.items()
+        }
+
+    async def start(self):
+        """连接池按 host 懒加载，这里仅重置统计，便于与 Runner 生命周期对齐"""
+        self._metrics.clear()
+
+    async def close(self):
+        logger.info(f'http client metrics = {self.metrics()}')
+        loop = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        for session_loop, session in sessions.values():
+            # 其它事件循环（如脚本中多次 asyncio.run）创建的连接池随其循环释放
+            if session_loop is loop and not session.closed:
+                await session.close()
+
+
+http_client = HttpClient()
@@ -1,44 +1,139 @@
-import requests
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+import aiohttp
 
 from agents.matmaster_agent.constant import ICL_SERVICE_URL
+from agents.matmaster_agent.services.http_client import NO_RETRY, http_client
+from agents.matmaster_agent.utils.cache_utils import TTLCache
+
+ICL_TIMEOUT = 10  # 单次请求超时（秒）
+ICL_CACHE_TTL = 600  # 检索结果缓存时间（秒）
+ICL_CACHE_SIZE = 512
+ICL_BREAKER_THRESHOLD = 3  # 连续失败次数达到阈值后熔断
+ICL_BREAKER_COOLDOWN = 30  # 熔断持续时间（秒），之后放行一次探测请求
+
+FALLBACK_EXAMPLES = [
+    {
+        'input': '请为我构建一个铁的 bcc 结构',
+        'update_input': '请构建铁的体心立方（bcc）晶体结构，空间群为Im-3m，晶格常数为2.87Å',
+        'toolchain': ['build_bulk_structure_by_template', 'optimize_structure'],
+        'scene_tags': ['structure_generate', 'optimize_structure'],
+    }
+]
+
+
+class _CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            # half-open：放行探测请求，失败则重新计时
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
 
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
 
-def select_examples(query, session_id, current_env, logger):
+
+_cache = TTLCache(ICL_CACHE_SIZE, ICL_CACHE_TTL)
+_breaker = _CircuitBreaker(ICL_BREAKER_THRESHOLD, ICL_BREAKER_COOLDOWN)
+_inflight: dict[tuple, asyncio.Task] = {}
+
+
+def _normalize_query(query: str) -> str:
+    return re.sub(r'\s+', ' ', (query or '').strip()).lower()
+
+
+async def _request_examples(key: tuple, api: str, query, session_id, current_env):
     try:
-        return requests.post(
-            url=f"http://{ICL_SERVICE_URL}/api/v1/icl/select-examples",
-            json={'query': query, 'session_id': session_id, 'current_env': current_env},
-            timeout=10,
-        ).json()['data']
-    except Exception as e:
-        logger.info(f"select_examples fallback due to error: {e}")
-        return [
-            {
-                'input': '请为我构建一个铁的 bcc 结构',
-                'update_input': '请构建铁的体心立方（bcc）晶体结构，空间群为Im-3m，晶格常数为2.87Å',
-                'toolchain': ['build_bulk_structure_by_template', 'optimize_structure'],
-                'scene_tags': ['structure_generate', 'optimize_structure'],
-            }
-        ]
-
-
-def select_update_examples(query, session_id, current_env, logger):
+        # 失败由熔断器计数并走兜底示例，这里不再额外重试
+        async with http_client.post(
+            f"http://{ICL_SERVICE_URL}/api/v1/icl/{api}",
+            json={
+                'query': query,
+                'session_id': session_id,
+                'current_env': current_env,
+            },
+            timeout=aiohttp.ClientTimeout(total=ICL_TIMEOUT),
+            retry=NO_RETRY,
+        ) as response:
+            response.raise_for_status()
+            data = (await response.json())['data']
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _breaker.record_failure()
+        raise
+
+    _breaker.record_success()
+    _cache.set(key, data)
+    return data
+
+
+def _release_inflight(key: tuple, task: asyncio.Task):
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # 等待方已全部取消时，避免 "exception was never retrieved"
+
+
+async def _fetch_examples(
+    api: str, query, session_id, current_env, logger: logging.Logger
+):
+    # 示例只取决于 query 与环境，跨会话共享；session_id 仅供服务端记录，
+    # 合并的并发请求只带发起者的 session_id
+    key = (api, _normalize_query(query), current_env)
+    if (cached := _cache.get(key)) is not None:
+        return cached
+
+    if not _breaker.allow():
+        logger.info(f"{api} circuit open, use fallback examples")
+        return FALLBACK_EXAMPLES
+
+    # 相同 query 的并发请求合并为一次
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _request_examples(key, api, query, session_id, current_env)
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _release_inflight(key, t))
+
     try:
-        return requests.post(
-            url=f"http://{ICL_SERVICE_URL}/api/v1/icl/select-update-examples",
-            json={'query': query, 'session_id': session_id, 'current_env': current_env},
-            timeout=10,
-        ).json()['data']
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        logger.info(f"select_update_examples fallback due to error: {e}")
-        return [
-            {
-                'input': '请为我构建一个铁的 bcc 结构',
-                'update_input': '请构建铁的体心立方（bcc）晶体结构，空间群为Im-3m，晶格常数为2.87Å',
-                'toolchain': ['build_bulk_structure_by_template', 'optimize_structure'],
-                'scene_tags': ['structure_generate', 'optimize_structure'],
-            }
-        ]
+        logger.info(f"{api} fallback due to error: {e}")
+        return FALLBACK_EXAMPLES
+
+
+async def select_examples(query, session_id, current_env, logger):
+    return await _fetch_examples(
+        'select-examples', query, session_id, current_env, logger
+    )
+
+
+async def select_update_examples(query, session_id, current_env, logger):
+    return await _fetch_examples(
+        'select-update-examples', query, session_id, current_env, logger
+    )
 
 
 def scene_tags_from_examples(examples):
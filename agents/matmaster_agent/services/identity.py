@@ -0,0 +1,79 @@
+"""
+AK 身份信息解析：access_key -> username / ticket / 项目列表。
+结果按 TTL 缓存并在进程内共享，同一 AK 的并发查询合并为一次请求；
+工具回调与额度检查等路径统一通过 identity_resolver 获取。
+"""
+
+import logging
+import os
+from typing import Optional
+
+from agents.matmaster_agent.config import IDENTITY_CACHE_TTL
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.services.project import get_project_list
+from agents.matmaster_agent.utils.auth import ak_to_ticket, ak_to_username
+from agents.matmaster_agent.utils.cache_utils import AsyncLoadingCache, TTLCache
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+
+class IdentityResolver:
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        # ticket 有效期为 48 小时，远大于缓存时间
+        self._usernames = AsyncLoadingCache(maxsize, ttl)
+        self._tickets = AsyncLoadingCache(maxsize, ttl)
+        self._project_ids = AsyncLoadingCache(maxsize, ttl)
+        # access_key -> 已因不在项目列表中刷新过的 project_id，TTL 内不再重复刷新
+        self._project_misses = TTLCache(maxsize, ttl)
+
+    async def get_username(self, access_key: str) -> str:
+        return await self._usernames.get(
+            access_key, lambda: ak_to_username(access_key=access_key)
+        )
+
+    async def get_ticket(self, access_key: str) -> str:
+        return await self._tickets.get(
+            access_key, lambda: ak_to_ticket(access_key=access_key)
+        )
+
+    async def get_project_ids(self, access_key: str) -> list:
+        return await self._project_ids.get(
+            access_key, lambda: get_project_list(access_key=access_key)
+        )
+
+    async def get_project_id(
+        self, access_key: str, preferred: Optional[str] = None
+    ) -> str:
+        """优先使用 preferred（前端传入），不属于该用户时使用其第一个项目"""
+        project_id = preferred or os.getenv('BOHRIUM_PROJECT_ID')
+        project_ids = await self.get_project_ids(access_key)
+        misses = self._project_misses.get(access_key) or set()
+        if project_id and project_id not in project_ids and project_id not in misses:
+            # 可能是刚创建的项目，强制刷新一次；仍不存在时 TTL 内直接回退，不再每次刷新
+            self._project_misses.set(access_key, misses | {project_id})
+            self._project_ids.invalidate(access_key)
+            project_ids = await self.get_project_ids(access_key)
+        if project_id in project_ids:
+            return project_id
+
+        logger.warning(
+            f'project_id <{project_id}> is not exist, use project_list[0] <{project_ids[0]}>'
+        )
+        return project_ids[0]
+
+    def invalidate(self, access_key: Optional[str] = None):
+        """AK 失效、ticket 被拒绝或用户切换项目时调用"""
+        for cache in (self._usernames, self._tickets, self._project_ids):
+            cache.invalidate(access_key)
+        if access_key is None:
+            self._project_misses = TTLCache(
+                self._project_misses.maxsize, self._project_misses.ttl
+            )
+        else:
+            self._project_misses.pop(access_key)
+
+
+identity_resolver = IdentityResolver(ttl=IDENTITY_CACHE_TTL)
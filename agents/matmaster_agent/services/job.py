@@ -2,11 +2,19 @@ import asyncio
 import json
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 import aiohttp
 import jsonpickle
 
+from agents.matmaster_agent.config import (
+    HARVEST_CONCURRENCY,
+    JOB_POLL_CONCURRENCY,
+    JOB_STATUS_CACHE_TTL,
+)
 from agents.matmaster_agent.constant import (
     MATMASTER_AGENT_NAME,
     OPENAPI_FILE_TOKEN_API,
@@ -15,12 +23,16 @@ from agents.matmaster_agent.constant import (
     OpenAPIJobAPI,
 )
 from agents.matmaster_agent.logger import PrefixFilter
-from agents.matmaster_agent.utils.io_oss import file_to_base64, upload_to_oss_wrapper
+from agents.matmaster_agent.services.http_client import DEFAULT_RETRY, http_client
+from agents.matmaster_agent.utils.cache_utils import TTLCache
+from agents.matmaster_agent.utils.io_oss import get_oss_url, upload_stream_to_oss
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
 logger.setLevel(logging.INFO)
 
+_job_status_cache = TTLCache(maxsize=1024, ttl=JOB_STATUS_CACHE_TTL)
+
 
 async def check_job_create_service(access_key, project_id):
     job_create_url = f"{OPENAPI_HOST}/openapi/v1/sandbox/job/create"
@@ -31,141 +43,73 @@ async def check_job_create_service(access_key, project_id):
     params = {'accessKey': access_key}
     logger.info(f"project_id = {project_id}, ak = {access_key}")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            job_create_url, json=payload, params=params
-        ) as response:
-            res = json.loads(await response.text())
-            if res['code'] != 0:
-                if res['code'] == 140202:
-                    res['error'][
-                        'msg'
-                    ] = '钱包余额不足，请在[此页面](https://www.bohrium.com/consume?menu=cash)充值后重试。'
+    async with http_client.post(
+        job_create_url, json=payload, params=params
+    ) as response:
+        res = json.loads(await response.text())
+        if res['code'] != 0:
+            if res['code'] == 140202:
+                res['error'][
+                    'msg'
+                ] = '钱包余额不足，请在[此页面](https://www.bohrium.com/consume?menu=cash)充值后重试。'
 
-                return res
+            return res
 
 
 async def get_job_detail(job_id, access_key):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            f'{OpenAPIJobAPI}/{job_id}', headers={'accessKey': access_key}
-        ) as response:
-            res_text = await response.text()
-            logger.info(
-                f'job_id = {job_id}, access_key = {access_key}, response = {res_text}'
-            )
-            res = json.loads(res_text)
+    async with http_client.get(
+        f'{OpenAPIJobAPI}/{job_id}', headers={'accessKey': access_key}
+    ) as response:
+        res_text = await response.text()
+        logger.info(
+            f'job_id = {job_id}, access_key = {access_key}, response = {res_text}'
+        )
+        res = json.loads(res_text)
 
-            return res
+        return res
 
 
-async def check_status_and_download_file(
-    response: aiohttp.ClientResponse, file_download_path: str
-):
-    async def download_file(resp: aiohttp.ClientResponse, output_path: str):
-        # --- 新增：确保父目录存在 ---
-        dest_path = Path(output_path)
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        # parents=True 表示递归创建所有不存在的父目录
-        # exist_ok=True 表示如果目录已存在则不报错
-        # ------------------------
-
-        total_size = int(resp.headers.get('content-length', 0))
-        downloaded_size = 0
-
-        # aiohttp 读取 body 用 resp.content.iter_chunked
-        with open(output_path, 'wb') as f:
-            async for chunk in resp.content.iter_chunked(8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    if total_size > 0:
-                        progress = (downloaded_size / total_size) * 100
-                        print(
-                            f"\rDownload progress: {progress:.1f}%", end='', flush=True
-                        )
-        print()
-
-    status_code = response.status
-
-    if status_code == 400:
-        logger.error(f'`{file_download_path}` url returned 400 Bad Request')
-        return
+async def get_job_details(job_ids: list[str], access_key: str) -> dict[str, dict]:
+    """
+    并发查询多个任务的详情（OpenAPI 暂无批量查询接口），并发数受 JOB_POLL_CONCURRENCY 限制；
+    查询成功的结果按 (access_key, job_id) 短时缓存，同一会话连续几轮对话内不重复请求；
+    不同 access_key 之间不共享，每个调用方至少经过一次自己的鉴权请求。
+    """
+    semaphore = asyncio.Semaphore(JOB_POLL_CONCURRENCY)
 
-    if status_code == 200:
-        await download_file(response, file_download_path)
-        if Path(file_download_path).exists():
-            file_size = os.path.getsize(file_download_path)
-            logger.info(
-                f"Download `{file_download_path}` completed successfully! File size: {file_size} bytes"
-            )
-        else:
-            logger.error(
-                f"Error: Download `{file_download_path}` failed - file doesn't exist"
-            )
-        return
+    async def query(job_id):
+        key = (access_key, job_id)
+        if (cached := _job_status_cache.get(key)) is not None:
+            return cached
+        async with semaphore:
+            res = await get_job_detail(job_id=job_id, access_key=access_key)
+        if res.get('code') == 0:
+            _job_status_cache.set(key, res)
+        return res
 
-    logger.error(f'`{file_download_path}` url returned status code: {status_code}')
+    results = await asyncio.gather(*(query(job_id) for job_id in job_ids))
+    return dict(zip(job_ids, results))
 
 
 async def get_token(file_path, job_id, access_key):
     request_body = {'filePath': file_path, 'jobId': job_id}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{OPENAPI_FILE_TOKEN_API}?accessKey={access_key}",
-            json=request_body,
-        ) as response:
-            response.raise_for_status()
-            payload = await response.json()
-
-            response_data_json = payload.get('data', {})
-            response_file_token = response_data_json.get('token', '')
-            response_file_path = response_data_json.get('path', '')
-            response_file_host = response_data_json.get('host', '')
+    # 仅申请下载 token，无副作用，可安全重试
+    async with http_client.post(
+        f"{OPENAPI_FILE_TOKEN_API}?accessKey={access_key}",
+        json=request_body,
+        retry=DEFAULT_RETRY,
+    ) as response:
+        response.raise_for_status()
+        payload = await response.json()
+
+        response_data_json = payload.get('data', {})
+        response_file_token = response_data_json.get('token', '')
+        response_file_path = response_data_json.get('path', '')
+        response_file_host = response_data_json.get('host', '')
 
     return response_file_host, response_file_path, response_file_token
 
 
-async def get_token_and_download_file(file_path, job_id, access_key):
-    response_file_host, response_file_path, response_file_token = await get_token(
-        file_path, job_id, access_key
-    )
-
-    # 构建log文件URL并检查状态
-    if response_file_host and response_file_path and response_file_token:
-        file_url = f"{response_file_host}/api/download/{response_file_path}?token={response_file_token}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(file_url) as file_response:
-                file_response.raise_for_status()
-                await check_status_and_download_file(
-                    file_response, file_path
-                )  # 需要你把该函数签名改一下
-    else:
-        logger.error(f"Incomplete {file_path} information - cannot construct file URL")
-
-
-async def get_token_and_download_dir(dir_path, job_id, access_key):
-    host, path, token = await get_token('', job_id, access_key)
-    prefix = path.replace('results.txt', '')
-    request_body = {
-        'targetDir': dir_path,
-        'tempDir': prefix,
-        'maxCompressSize': 1073741824,
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f'{TIEFBLUE_NAS_HOST}/api/downloadr',
-            json=request_body,
-            headers={
-                'Authorization': f"Bearer {token}",
-                'Content-Type': 'application/json',
-            },
-        ) as response:
-            blob = await response.read()
-            with open(f"{dir_path.split("/")[-2]}.zip", 'wb') as f:
-                f.write(blob)
-
-
 async def get_iterate_files(
     job_id: str, prefix: str | None = None, access_key: str = ''
 ):
@@ -184,29 +128,118 @@ async def get_iterate_files(
         prefix += '/'
 
     request_body = {'prefix': prefix}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{host}/api/iterate",
-            json=request_body,
-            headers={
-                'Authorization': f"Bearer {token}",
-                'Content-Type': 'application/json',
-            },
-        ) as response:
-            iterate_json = await response.json()
+    async with http_client.post(
+        f"{host}/api/iterate",
+        json=request_body,
+        headers={
+            'Authorization': f"Bearer {token}",
+            'Content-Type': 'application/json',
+        },
+        retry=DEFAULT_RETRY,
+    ) as response:
+        iterate_json = await response.json()
 
     return prefix, iterate_json
 
 
+# 结果文件可能很大，只限制单次读取间隔，不限制总时长
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=120)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+@asynccontextmanager
+async def open_job_file(file_path, job_id, access_key):
+    """打开任务文件的下载响应（流式），文件信息不完整时返回 None"""
+    host, path, token = await get_token(file_path, job_id, access_key)
+    if not (host and path and token):
+        logger.error(f"Incomplete {file_path} information - cannot construct file URL")
+        yield None
+        return
+
+    async with http_client.get(
+        f"{host}/api/download/{path}?token={token}", timeout=STREAM_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+        yield response
+
+
+@asynccontextmanager
+async def open_job_dir(dir_path, job_id, access_key):
+    """打开任务目录打包（zip）后的下载响应（流式）"""
+    host, path, token = await get_token('', job_id, access_key)
+    request_body = {
+        'targetDir': dir_path,
+        'tempDir': path.replace('results.txt', ''),
+        'maxCompressSize': 1073741824,
+    }
+    async with http_client.post(
+        f'{TIEFBLUE_NAS_HOST}/api/downloadr',
+        json=request_body,
+        headers={
+            'Authorization': f"Bearer {token}",
+            'Content-Type': 'application/json',
+        },
+        timeout=STREAM_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        yield response
+
+
+async def read_job_file(file_path, job_id, access_key) -> Optional[bytes]:
+    async with open_job_file(file_path, job_id, access_key) as response:
+        return await response.read() if response is not None else None
+
+
+class HarvestStats:
+    """记录结果收集的字节数与耗时"""
+
+    def __init__(self, session_id: str, job_id: str):
+        self.session_id = session_id
+        self.job_id = job_id
+        self.start = time.perf_counter()
+        self.total_bytes = 0
+
+    def record(self, name: str, size: int, cost: float):
+        self.total_bytes += size
+        logger.info(
+            f'{self.session_id} job {self.job_id} harvested `{name}`: '
+            f'{size} bytes in {cost:.2f}s ({size / max(cost, 1e-6) / 1e6:.2f} MB/s)'
+        )
+
+    def log_summary(self, files: int):
+        wall = time.perf_counter() - self.start
+        logger.info(
+            f'{self.session_id} job {self.job_id} harvest finished: {files} files, '
+            f'{self.total_bytes} bytes in {wall:.2f}s '
+            f'({self.total_bytes / max(wall, 1e-6) / 1e6:.2f} MB/s)'
+        )
+
+
 async def parse_and_prepare_results(
     job_id: str = '', access_key: str = '', session_id: str = ''
 ):
+    """
+    解析 results.txt，并将其中的结果文件/目录从 NAS 流式转存到 OSS：
+    不落盘、不经过 base64，多个结果对象在 HARVEST_CONCURRENCY 限制下并发处理。
+    """
+
     def norm(p: str) -> str:
         p = p.replace('\\', '/')
         if p.endswith('/') and p != '/':
             p = p[:-1]
         return p
 
+    async def _list_dir(dp: str):
+        _prefix, iterate_json = await get_iterate_files(
+            job_id, prefix=dp, access_key=access_key
+        )
+        return _index_listing(_prefix, iterate_json)
+
+    def _index_listing(_prefix: str, iterate_json: dict):
+        objects = iterate_json.get('data', {}).get('objects', [])
+        idx = {norm(o['path']): o for o in objects}
+        return {'prefix': _prefix, 'objects': objects, 'idx': idx}
+
     async def list_dir(dir_prefix: str):
         """
         dir_prefix: jobs/xxx/xxx/ 或 jobs/xxx/xxx/trajs_files/
@@ -215,18 +248,10 @@ async def parse_and_prepare_results(
         if not dp.endswith('/'):
             dp += '/'
 
-        if dp in listing_cache:
-            return listing_cache[dp]
-
-        _prefix, iterate_json = await get_iterate_files(
-            job_id, prefix=dp, access_key=access_key
-        )
-        objects = iterate_json.get('data', {}).get('objects', [])
-        idx = {norm(o['path']): o for o in objects}
-
-        listing_cache[dp] = {'prefix': _prefix, 'objects': objects, 'idx': idx}
-
-        return listing_cache[dp]
+        # 缓存 Task，并发查找同一目录时只请求一次
+        if dp not in listing_cache:
+            listing_cache[dp] = asyncio.ensure_future(_list_dir(dp))
+        return await listing_cache[dp]
 
     def remote_candidates(rel: str):
         rel = norm(rel)
@@ -256,90 +281,83 @@ async def parse_and_prepare_results(
         obj = parent_listing['idx'].get(rf) or parent_listing['idx'].get(rd)
         return obj
 
-    async def safe_cleanup_file(file_download_path: Path):
-        """
-        删除文件，并由内向外清理空的父目录，直到当前工作目录为止。
-        """
-        file_path = file_download_path.resolve()
-        root_dir = Path.cwd().resolve()  # 获取当前工作目录的绝对路径
-
-        # 1. 删除文件本身
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"已删除文件: {file_path}")
-        except Exception as e:
-            logger.error(f"无法删除文件 {file_path}: {e}")
-            return
-
-        # 2. 逐级向上清理空目录
-        # target_dir 从文件所在的直接父目录开始
-        target_dir = file_path.parent
-
-        # 循环条件：目标目录属于当前目录的子目录，且不是当前目录本身
-        while target_dir.is_relative_to(root_dir) and target_dir != root_dir:
-            try:
-                # rmdir 仅在目录为空时才会成功
-                target_dir.rmdir()
-                logger.info(f"清理空目录: {target_dir}")
-                # 移动到上一层
-                target_dir = target_dir.parent
-            except OSError:
-                # 如果目录非空（比如里面还有其他 band.png）或权限不足，停止向上清理
-                logger.info(f"停止清理：目录 {target_dir} 非空或无权限")
-                break
+    async def harvest(rel: str) -> Optional[str]:
+        obj = await find_obj(rel)
+        if obj is None:
+            logger.warning(f"{session_id} `{rel}` is not exist")
+            return None
+
+        if obj.get('isDir'):
+            filename = f"{obj['path'].split("/")[-2]}.zip"
+            opener = open_job_dir(obj['path'], job_id, access_key)
+        else:
+            filename = Path(rel).name
+            opener = open_job_file(rel, job_id, access_key)
+        oss_path = f"agent/{job_root_prefix}{filename}"
+
+        async with semaphore:
+            start = time.perf_counter()
+            async with opener as response:
+                if response is None:
+                    return None
+                size = await upload_stream_to_oss(
+                    response.content.iter_chunked(STREAM_CHUNK_SIZE), oss_path
+                )
+            stats.record(rel, size, time.perf_counter() - start)
+        return get_oss_url(oss_path)
 
     # Download results.txt & Prepare Parse
     RESULTS_TXT = 'results.txt'
-    await get_token_and_download_file(RESULTS_TXT, job_id, access_key)
-
-    with open(RESULTS_TXT) as f:
-        results_txt_parsed = jsonpickle.loads(
-            f.read().replace('pathlib._local.PosixPath', 'pathlib.PosixPath')
+    results_txt = await read_job_file(RESULTS_TXT, job_id, access_key)
+    if results_txt is None:
+        # 不能把 stderr 当作结果返回，按任务失败处理
+        final_err = await parse_and_prepare_err(
+            job_id=job_id, access_key=access_key, session_id=session_id
         )
-        logger.info(f"{session_id} results_txt_parsed = {results_txt_parsed}")
-    os.remove(RESULTS_TXT)
-
-    final_results = {}
+        raise RuntimeError(
+            f"Job {job_id} finished without {RESULTS_TXT}, err = {final_err['err'][-2000:]}"
+        )
+    results_txt_parsed = jsonpickle.loads(
+        results_txt.decode('utf-8').replace(
+            'pathlib._local.PosixPath', 'pathlib.PosixPath'
+        )
+    )
+    logger.info(f"{session_id} results_txt_parsed = {results_txt_parsed}")
 
-    # 缓存：dir_prefix -> {"idx":..., "objects":...}
-    listing_cache: dict[str, dict] = {}
+    # 缓存：dir_prefix -> Task({"idx":..., "objects":...})
+    listing_cache: dict[str, asyncio.Future] = {}
 
-    # 先拿 job 根 prefix（jobs/xxx/xxx/）
-    job_root_prefix, _ = await get_iterate_files(job_id, access_key=access_key)
+    # 先拿 job 根 prefix（jobs/xxx/xxx/），根目录 listing 直接复用
+    job_root_prefix, root_json = await get_iterate_files(job_id, access_key=access_key)
     job_root_prefix = job_root_prefix.replace('\\', '/')
     if not job_root_prefix.endswith('/'):
         job_root_prefix += '/'
+    listing_cache[job_root_prefix] = asyncio.get_running_loop().create_future()
+    listing_cache[job_root_prefix].set_result(
+        _index_listing(job_root_prefix, root_json)
+    )
+
+    semaphore = asyncio.Semaphore(HARVEST_CONCURRENCY)
+    stats = HarvestStats(session_id, job_id)
+    file_keys = [k for k, v in results_txt_parsed.items() if isinstance(v, Path)]
+    # 任一文件下载或上传失败时整体失败（TaskGroup 抛出 ExceptionGroup），由上层报错并重试，
+    # 而不是静默丢弃该结果
+    async with asyncio.TaskGroup() as tg:
+        tasks = [
+            tg.create_task(harvest(str(results_txt_parsed[k]).replace('\\', '/')))
+            for k in file_keys
+        ]
+    urls = [task.result() for task in tasks]
+    stats.log_summary(len([url for url in urls if url]))
+    harvested = dict(zip(file_keys, urls))
 
+    final_results = {}
     for k, v in results_txt_parsed.items():
         # 非文件型
         if not isinstance(v, Path):
             final_results[k] = v
-            continue
-
-        rel = str(v).replace('\\', '/')
-        obj = await find_obj(rel)
-
-        if obj is None:
-            logger.warning(f"{session_id} `{rel}` is not exist")
-            continue
-
-        is_dir = bool(obj.get('isDir'))
-        if not is_dir:
-            await get_token_and_download_file(rel, job_id, access_key)
-            filename = Path(rel)
-        else:
-            await get_token_and_download_dir(obj['path'], job_id, access_key)
-            filename = Path(f"{obj['path'].split("/")[-2]}.zip")
-
-        # 上传文件到 OSS
-        file_path, b64_data = await file_to_base64(filename)
-        oss_path = f"agent/{job_root_prefix}{file_path.name}"
-        oss_url = await upload_to_oss_wrapper(b64_data, oss_path, file_path.name)
-        final_results[k] = list(oss_url.values())[0]
-
-        # 删除文件
-        await safe_cleanup_file(filename)
+        elif harvested[k] is not None:
+            final_results[k] = harvested[k]
 
     return final_results
 
@@ -349,12 +367,9 @@ async def parse_and_prepare_err(
 ):
     # Download err & Prepare Parse
     ERR_FILE = 'err'
-    await get_token_and_download_file(ERR_FILE, job_id, access_key)
-
-    with open(ERR_FILE) as f:
-        final_err = {'err': f.read()}
-        logger.info(f"{session_id} final_err = {final_err}")
-    os.remove(ERR_FILE)
+    err = await read_job_file(ERR_FILE, job_id, access_key)
+    final_err = {'err': err.decode('utf-8', errors='replace') if err else ''}
+    logger.info(f"{session_id} final_err = {final_err}")
 
     return final_err
 
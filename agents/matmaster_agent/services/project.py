@@ -1,24 +1,22 @@
 import asyncio
 import json
 
-import aiohttp
-
 from agents.matmaster_agent.constant import OPENAPI_HOST
+from agents.matmaster_agent.services.http_client import http_client
 
 
 async def get_project_list(access_key: str):
     user_project_list_url = f"{OPENAPI_HOST}/openapi/v1/open/user/project/list"
     params = {'accessKey': access_key}
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(user_project_list_url, params=params) as response:
-            res = json.loads(await response.text())
-            project_list = res.get('data', {}).get('items', [])
+    async with http_client.get(user_project_list_url, params=params) as response:
+        res = json.loads(await response.text())
+        project_list = res.get('data', {}).get('items', [])
 
-            if project_list:
-                return [item['project_id'] for item in project_list]
-            else:
-                return project_list
+        if project_list:
+            return [item['project_id'] for item in project_list]
+        else:
+            return project_list
 
 
 if __name__ == '__main__':
@@ -1,33 +1,237 @@
-from typing import List
+import asyncio
+import logging
+import posixpath
+from contextlib import suppress
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
 
-import aiohttp
+from agents.matmaster_agent.config import (
+    SESSION_FILES_BATCH_SIZE,
+    SESSION_FILES_CACHE_TTL,
+    SESSION_FILES_FLUSH_INTERVAL,
+)
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME, MATMASTER_TOOLS_SERVER
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.utils.cache_utils import AsyncLoadingCache
 
-from agents.matmaster_agent.constant import MATMASTER_TOOLS_SERVER
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+SESSION_FILES_CACHE_SIZE = 1024
+SESSION_FILES_MAX_RETRIES = 3
+SESSION_FILES_RETRY_BACKOFF = 0.5
 
 
 async def get_session_files(session_id: str) -> List[str]:
     url = f'{MATMASTER_TOOLS_SERVER}/api/v1/sessions/{session_id}/files'
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            json_content = await response.json()
+    async with http_client.get(url) as response:
+        response.raise_for_status()
+        json_content = await response.json()
 
-            return json_content.get('data', {}).get('files', [])
+        return json_content.get('data', {}).get('files', [])
 
 
 async def insert_session_files(session_id: str, files: List[str]) -> List[str]:
     url = f'{MATMASTER_TOOLS_SERVER}/api/v1/sessions/{session_id}/files'
     req = {'files': files}
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=req) as response:
-            response.raise_for_status()
-            json_content = await response.json()
+    async with http_client.post(url, json=req) as response:
+        response.raise_for_status()
+        json_content = await response.json()
 
-            return json_content.get('data', {}).get('files', [])
+    session_file_index.add(session_id, files)
+    return json_content.get('data', {}).get('files', [])
 
 
-if __name__ == '__main__':
-    import asyncio
+class SessionFiles:
+    """单个会话的文件索引：按 URL 与文件名 O(1) 查找"""
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self.urls: dict[str, None] = {}  # 有序集合，保持服务端返回顺序
+        self.by_name: dict[str, str] = {}
+        self.add(urls)
+
+    def add(self, urls: Iterable[str]):
+        for url in urls:
+            if url in self.urls:
+                continue
+            self.urls[url] = None
+            # 同名文件保留最早出现的一个，与原先按列表顺序匹配的行为一致
+            name = posixpath.basename(urlsplit(url).path)
+            if name:
+                self.by_name.setdefault(name, url)
+
+    def resolve(self, file_path: str) -> Optional[str]:
+        """把 LLM 给出的文件名/相对路径映射为会话中真实的文件 URL，找不到时返回 None"""
+        if file_path in self.urls:
+            return file_path
+
+        url = self.by_name.get(posixpath.basename(file_path))
+        if url and (url.endswith('/' + file_path) or file_path in url):
+            return url
+        # 文件名不完整（如只给了前缀）时退回子串匹配
+        return next((url for url in self.urls if file_path in url), None)
+
+    def __len__(self):
+        return len(self.urls)
+
+
+class SessionFileIndex:
+    """
+    进程内共享的会话文件索引：每个会话首次使用时从 tools-server 加载一次，
+    之后由 insert_session_files 原地更新，按 LRU + TTL 淘汰。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = AsyncLoadingCache(maxsize, ttl)
+
+    @staticmethod
+    async def _load(session_id: str) -> SessionFiles:
+        files = SessionFiles(await get_session_files(session_id))
+        # 尚未写入 tools-server 的文件
+        files.add(session_file_writer.pending(session_id))
+        logger.info(f'{session_id} loaded {len(files)} session files')
+        return files
+
+    async def get(self, session_id: str) -> SessionFiles:
+        return await self._cache.get(session_id, lambda: self._load(session_id))
+
+    async def resolve(self, session_id: str, file_path: str) -> Optional[str]:
+        """
+        同 SessionFiles.resolve；未命中时重新加载一次再查找，
+        以便找到由其他 worker/进程写入、本地索引尚未包含的文件。
+        """
+        loaded = False
+
+        async def _load():
+            nonlocal loaded
+            loaded = True
+            return await self._load(session_id)
+
+        session_files = await self._cache.get(session_id, _load)
+        if (url := session_files.resolve(file_path)) is not None or loaded:
+            return url
+
+        self._cache.invalidate(session_id)
+        try:
+            session_files = await self.get(session_id)
+        except Exception as err:
+            logger.warning(f'{session_id} reload session files failed, err = {err!r}')
+            return None
+        return session_files.resolve(file_path)
+
+    def add(self, session_id: str, files: Iterable[str]):
+        if (session_files := self._cache.peek(session_id)) is not None:
+            session_files.add(files)
+        else:
+            # 尚未加载（或正在加载，结果可能不含新文件）时丢弃，下次使用时重新加载
+            self._cache.invalidate(session_id)
 
+    def invalidate(self, session_id: Optional[str] = None):
+        self._cache.invalidate(session_id)
+
+
+session_file_index = SessionFileIndex(
+    maxsize=SESSION_FILES_CACHE_SIZE, ttl=SESSION_FILES_CACHE_TTL
+)
+
+
+class SessionFileWriter:
+    """
+    会话文件的 write-behind 批量写入：add 立即更新本地索引并返回，
+    后台按会话攒批，在显式 flush、积压达到 batch_size 或等待 flush_interval 后批量写入，
+    失败按指数退避重试，不阻塞事件流。
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # session_id -> 未确认写入的文件（有序集合，含正在写入的）
+        self._pending: dict[str, dict[str, None]] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._flushers: dict[str, asyncio.Task] = {}
+
+    def pending(self, session_id: str) -> List[str]:
+        return list(self._pending.get(session_id, ()))
+
+    def add(self, session_id: str, files: Iterable[str]):
+        files = list(files)
+        if not files:
+            return
+        session_file_index.add(session_id, files)
+        pending = self._pending.setdefault(session_id, {})
+        pending.update(dict.fromkeys(files))
+
+        if session_id not in self._flushers:
+            self._wakeups[session_id] = asyncio.Event()
+            self._flushers[session_id] = asyncio.create_task(self._run(session_id))
+        if len(pending) >= self.batch_size:
+            self.flush(session_id)
+
+    def flush(self, session_id: str):
+        """通知后台立即写入，不等待写入完成"""
+        if (wakeup := self._wakeups.get(session_id)) is not None:
+            wakeup.set()
+
+    async def _run(self, session_id: str):
+        try:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._wakeups[session_id].wait(), self.flush_interval
+                )
+            while pending := self._pending.get(session_id):
+                files = list(pending)
+                batches = [
+                    files[i : i + self.batch_size]
+                    for i in range(0, len(files), self.batch_size)
+                ]
+                await asyncio.gather(
+                    *(self._insert_with_retry(session_id, batch) for batch in batches)
+                )
+                for file in files:
+                    pending.pop(file, None)
+        finally:
+            if not self._pending.get(session_id):
+                self._pending.pop(session_id, None)
+            self._wakeups.pop(session_id, None)
+            self._flushers.pop(session_id, None)
+
+    async def _insert_with_retry(self, session_id: str, files: List[str]):
+        for attempt in range(SESSION_FILES_MAX_RETRIES):
+            try:
+                await insert_session_files(session_id, files)
+                return
+            except Exception as err:
+                logger.warning(
+                    f'{session_id} insert {len(files)} session files failed '
+                    f'(attempt {attempt + 1}), err = {err!r}'
+                )
+                if attempt + 1 < SESSION_FILES_MAX_RETRIES:
+                    await asyncio.sleep(SESSION_FILES_RETRY_BACKOFF * (2**attempt))
+        logger.error(f'{session_id} dropped session files: {files}')
+        # 本地索引已提前加入这些文件：移出积压后丢弃索引，下次以 tools-server 为准重新加载
+        pending = self._pending.get(session_id, {})
+        for file in files:
+            pending.pop(file, None)
+        session_file_index.invalidate(session_id)
+
+    async def close(self):
+        """
+        等待所有积压写入完成（进程退出前调用）。
+        目前只有 main.py 的命令行入口会调用；以服务方式部署时没有退出钩子，
+        进程退出时尚未写入的文件（最多 flush_interval 内的新增）会丢失。
+        """
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        await asyncio.gather(*self._flushers.values(), return_exceptions=True)
+
+
+session_file_writer = SessionFileWriter(
+    batch_size=SESSION_FILES_BATCH_SIZE, flush_interval=SESSION_FILES_FLUSH_INTERVAL
+)
+
+
+if __name__ == '__main__':
     result = asyncio.run(insert_session_files('session_id', ['file_url']))
@@ -1,14 +1,33 @@
 import asyncio
+import hashlib
 import json
 import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
 from typing import Optional
 
 import aiohttp
 
-from agents.matmaster_agent.constant import BOHRIUM_COM, MATMASTER_AGENT_NAME
+from agents.matmaster_agent.config import (
+    STRUCTURE_INFO_CACHE_TTL,
+    STRUCTURE_INFO_URL_TTL,
+)
+from agents.matmaster_agent.constant import (
+    BOHRIUM_COM,
+    MATMASTER_AGENT_NAME,
+    STRUCTURE_INFO_CACHE_DB,
+)
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.utils.cache_utils import TTLCache
+from agents.matmaster_agent.utils.structure_utils import parse_structure
 
 logger = logging.getLogger(__name__)
 
+STRUCTURE_INFO_CACHE_SIZE = 256
+
 
 async def fetch_file_content(url: str, timeout: int = 30) -> Optional[str]:
     """
@@ -21,11 +40,10 @@ async def fetch_file_content(url: str, timeout: int = 30) -> Optional[str]:
     """
     try:
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
-        async with aiohttp.ClientSession(timeout=timeout_obj) as session:
-            async with session.get(url) as response:
-                response.raise_for_status()  # 如果状态码不是 200，抛出异常
-                content = await response.text()
-                return content
+        async with http_client.get(url, timeout=timeout_obj) as response:
+            response.raise_for_status()  # 如果状态码不是 200，抛出异常
+            content = await response.text()
+            return content
     except aiohttp.ClientError as e:
         print(f"网络请求错误: {e}")
         return None
@@ -37,19 +55,174 @@ async def fetch_file_content(url: str, timeout: int = 30) -> Optional[str]:
         return None
 
 
-async def get_info_by_path(file_url, format) -> dict:
+async def request_info_by_str(file_content: Optional[str], format: str) -> dict:
     info_by_path_url = (
         f"{BOHRIUM_COM}/api/materials_db/public/v1/material_visualization/info_by_str"
     )
-    file_content = await fetch_file_content(file_url)
-    # 统一使用小写格式，避免后端对大小写敏感导致 format is invalid
-    normalized_format = (format or '').lower()
-    body_json = {'fileContent': file_content, 'format': normalized_format}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(info_by_path_url, json=body_json) as response:
-            raw_res = await response.text()
-            logger.info(f"[{MATMASTER_AGENT_NAME}] raw_res = {raw_res}")
-            dict_res = json.loads(raw_res)
-            logger.info(f"[{MATMASTER_AGENT_NAME}] res = {dict_res}")
+    body_json = {'fileContent': file_content, 'format': format}
+    async with http_client.post(info_by_path_url, json=body_json) as response:
+        raw_res = await response.text()
+        logger.info(f"[{MATMASTER_AGENT_NAME}] raw_res = {raw_res}")
+        dict_res = json.loads(raw_res)
+        logger.info(f"[{MATMASTER_AGENT_NAME}] res = {dict_res}")
 
     return dict_res
+
+
+@dataclass(slots=True)
+class StructureInfoMetrics:
+    lookups: int = 0
+    url_hits: int = 0
+    coalesced: int = 0
+    content_hits: int = 0
+    disk_hits: int = 0
+    local_parses: int = 0
+    remote_calls: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'lookups': self.lookups,
+            'url_hits': self.url_hits,
+            'coalesced': self.coalesced,
+            'content_hits': self.content_hits,
+            'disk_hits': self.disk_hits,
+            'local_parses': self.local_parses,
+            'remote_calls': self.remote_calls,
+            'remote_skip_rate': round(1 - self.remote_calls / max(self.lookups, 1), 3),
+        }
+
+
+class _SqliteStore:
+    """结构信息的 SQLite 持久缓存，跨进程/重启复用远程接口的解析结果"""
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if directory := os.path.dirname(self.path):
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS structure_info '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+        return self._conn
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    'SELECT value FROM structure_info WHERE key = ? AND created_at > ?',
+                    (key, time.time() - self.ttl),
+                )
+                .fetchone()
+            )
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: dict):
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO structure_info VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time()),
+            )
+
+    async def get(self, key: str) -> Optional[dict]:
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except Exception as err:
+            logger.warning(f'structure info cache read failed: {err!r}')
+            return None
+
+    async def set(self, key: str, value: dict):
+        try:
+            await asyncio.to_thread(self._set, key, value)
+        except Exception as err:
+            logger.warning(f'structure info cache write failed: {err!r}')
+
+
+class StructureInfoCache:
+    """
+    进程内共享的结构信息缓存，返回值与 info_by_str 接口一致，调用方只读不改。
+
+    - URL 层：(URL, 格式) -> 结果，命中时连文件都不下载，同一 URL 的并发查询合并为一次；
+    - 内容层：(文件内容 sha256, 格式) -> 结果，同一文件换了 URL 也能命中，可选 SQLite 持久化；
+    - 未命中时 CIF/POSCAR/extended XYZ 先在本地解析，其余格式或本地无法确定的结构才调用接口。
+    失败的结果不缓存。
+    """
+
+    def __init__(self, maxsize: int, url_ttl: float, ttl: float, db_path: str = ''):
+        self._by_url = TTLCache(maxsize, url_ttl)
+        self._by_content = TTLCache(maxsize, ttl)
+        self._store = _SqliteStore(db_path, ttl) if db_path else None
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self.metrics = StructureInfoMetrics()
+
+    async def get(self, file_url: str, format: str) -> dict:
+        # 统一使用小写格式，避免后端对大小写敏感导致 format is invalid
+        url_key = (file_url, (format or '').lower())
+        self.metrics.lookups += 1
+        if (info := self._by_url.get(url_key)) is not None:
+            self.metrics.url_hits += 1
+            return info
+
+        task = self._inflight.get(url_key)
+        if task is None:
+            task = asyncio.create_task(self._load(*url_key))
+            self._inflight[url_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url_key, None))
+        else:
+            self.metrics.coalesced += 1
+        # shield：单个调用方被取消时不影响其它等待同一结果的调用方
+        return await asyncio.shield(task)
+
+    async def _load(self, file_url: str, format: str) -> dict:
+        file_content = await fetch_file_content(file_url)
+        if file_content is None:
+            self.metrics.remote_calls += 1
+            return await request_info_by_str(file_content, format)
+
+        digest = hashlib.sha256(file_content.encode()).hexdigest()
+        content_key = f'{format}:{digest}'
+        if (info := self._by_content.get(content_key)) is not None:
+            self.metrics.content_hits += 1
+        elif self._store and (info := await self._store.get(content_key)):
+            self.metrics.disk_hits += 1
+        elif data := parse_structure(file_content, format):
+            self.metrics.local_parses += 1
+            info = {'data': data}
+        else:
+            self.metrics.remote_calls += 1
+            info = await request_info_by_str(file_content, format)
+            if not _is_valid_info(info):
+                return info
+            if self._store:
+                await self._store.set(content_key, info)
+
+        self._by_content.set(content_key, info)
+        self._by_url.set((file_url, format), info)
+        return info
+
+    def invalidate(self):
+        self._by_url = TTLCache(self._by_url.maxsize, self._by_url.ttl)
+        self._by_content = TTLCache(self._by_content.maxsize, self._by_content.ttl)
+
+
+def _is_valid_info(info) -> bool:
+    return isinstance(info, dict) and bool(info.get('data'))
+
+
+structure_info_cache = StructureInfoCache(
+    maxsize=STRUCTURE_INFO_CACHE_SIZE,
+    url_ttl=STRUCTURE_INFO_URL_TTL,
+    ttl=STRUCTURE_INFO_CACHE_TTL,
+    db_path=STRUCTURE_INFO_CACHE_DB,
+)
+
+
+async def get_info_by_path(file_url, format) -> dict:
+    return await structure_info_cache.get(file_url, format)
@@ -0,0 +1,128 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Optional
+
+from google.adk.agents import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools import BaseTool, FunctionTool
+from google.adk.tools.base_toolset import BaseToolset
+
+from agents.matmaster_agent.config import TOOL_REGISTRY_TTL
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.utils.cache_utils import TTLCache
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+TOOL_REGISTRY_MAX_TOOLSETS = 256
+
+
+def toolset_key(tool_union) -> tuple:
+    """
+    toolset 的稳定标识：MCP 连接地址 + tool_filter 等影响声明的配置。
+    不能用 id(toolset)，对象被回收后 id 会被复用，新 toolset 会拿到旧 toolset 的声明。
+    """
+    if isinstance(tool_union, BaseToolset):
+        params = getattr(tool_union, '_connection_params', None)
+        endpoint = getattr(params, 'url', None) or repr(
+            getattr(params, 'server_params', params)
+        )
+        tool_filter = tool_union.tool_filter
+        if callable(tool_filter):
+            tool_filter = f'{tool_filter.__module__}.{tool_filter.__qualname__}'
+        elif tool_filter is not None:
+            tool_filter = tuple(sorted(tool_filter))
+        return (
+            type(tool_union).__qualname__,
+            endpoint,
+            tool_filter,
+            tool_union.tool_name_prefix,
+            getattr(tool_union, 'override', None),
+        )
+    if isinstance(tool_union, BaseTool):
+        return ('tool', type(tool_union).__qualname__, tool_union.name)
+    return ('function', tool_union.__module__, tool_union.__qualname__)
+
+
+class ToolDeclarationRegistry:
+    """
+    缓存每个 toolset 的函数声明（MCP list_tools 结果），按工具名 O(1) 查询，跨会话共享。
+    缓存按 TTL 过期；查询的工具不在缓存中时强制刷新一次，以感知 tool-server 的版本变化。
+    """
+
+    def __init__(self, ttl: float, maxsize: int = TOOL_REGISTRY_MAX_TOOLSETS):
+        self.ttl = ttl
+        # toolset_key -> (加载时间, {tool_name: declaration})
+        self._entries = TTLCache(maxsize, ttl)
+        self._locks = TTLCache(maxsize, ttl)
+
+    def _lock(self, key: tuple) -> asyncio.Lock:
+        if (lock := self._locks.get(key)) is None:
+            lock = asyncio.Lock()
+            self._locks.set(key, lock)
+        return lock
+
+    async def _list_declarations(
+        self, ctx: InvocationContext, tool_union
+    ) -> dict[str, dict]:
+        if isinstance(tool_union, BaseToolset):
+            tools = await tool_union.get_tools(ReadonlyContext(ctx))
+        elif isinstance(tool_union, BaseTool):
+            tools = [tool_union]
+        else:
+            tools = [FunctionTool(func=tool_union)]
+
+        declarations = {}
+        for tool in tools:
+            if (declaration := tool._get_declaration()) is not None:
+                declarations[tool.name] = declaration.to_json_dict()
+        return declarations
+
+    async def _load(
+        self, ctx: InvocationContext, tool_union, refresh: bool = False
+    ) -> dict[str, dict]:
+        key = toolset_key(tool_union)
+        requested_at = time.monotonic()
+        entry = self._entries.get(key)
+        if not refresh and entry:
+            return entry[1]
+
+        async with self._lock(key):
+            # 等锁期间其它协程可能已完成加载/刷新，直接复用
+            entry = self._entries.get(key)
+            if entry and (not refresh or entry[0] >= requested_at):
+                return entry[1]
+
+            start = time.perf_counter()
+            declarations = await self._list_declarations(ctx, tool_union)
+            self._entries.set(key, (time.monotonic(), declarations))
+            logger.info(
+                f'{ctx.session.id} loaded {len(declarations)} tool declarations '
+                f'in {time.perf_counter() - start:.2f}s'
+            )
+            return declarations
+
+    async def get(
+        self, ctx: InvocationContext, tools: list, tool_name: str
+    ) -> Optional[dict]:
+        """返回 tool_name 的函数声明（深拷贝，调用方可自由修改），找不到时返回 None"""
+        for refresh in (False, True):
+            for tool_union in tools:
+                declarations = await self._load(ctx, tool_union, refresh=refresh)
+                if tool_name in declarations:
+                    return copy.deepcopy(declarations[tool_name])
+            if not refresh:
+                logger.warning(
+                    f'{ctx.session.id} `{tool_name}` not in cached declarations, refreshing'
+                )
+        return None
+
+    def invalidate(self):
+        self._entries = TTLCache(self._entries.maxsize, self.ttl)
+
+
+tool_registry = ToolDeclarationRegistry(ttl=TOOL_REGISTRY_TTL)
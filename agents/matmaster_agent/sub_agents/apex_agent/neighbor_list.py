@@ -0,0 +1,169 @@
+"""
+基于 numpy 链表格子（linked-cell）的近邻搜索，支持周期性边界条件。
+
+周期性体系先把原子折回晶胞，再补上距晶胞不超过 cutoff 的周期像（halo），
+在笛卡尔坐标中按边长 cutoff 划分格子，只比较相邻 27 个格子中的原子，单次搜索约 O(N)。
+晶胞较小时同一对原子可能有多个周期像落在 cutoff 内，会逐个给出。
+"""
+
+from itertools import product
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+_NEIGHBOR_CELL_OFFSETS = np.array(list(product((-1, 0, 1), repeat=3)))
+
+
+def _as_lattice(lattice: Optional[Sequence[Sequence[float]]]) -> Optional[np.ndarray]:
+    if lattice is None:
+        return None
+    lattice = np.asarray(lattice, dtype=float)
+    if lattice.shape != (3, 3) or abs(np.linalg.det(lattice)) < 1e-8:
+        return None  # 退化晶胞按非周期体系处理
+    return lattice
+
+
+def _perpendicular_widths(lattice: np.ndarray) -> np.ndarray:
+    """晶胞在三个晶格方向上的厚度（相对两个面之间的距离）"""
+    volume = abs(np.linalg.det(lattice))
+    face_normals = np.cross(lattice[[1, 2, 0]], lattice[[2, 0, 1]])
+    return volume / np.linalg.norm(face_normals, axis=1)
+
+
+def fractional_coordinates(positions: np.ndarray, lattice: np.ndarray) -> np.ndarray:
+    """折回 [0, 1) 的分数坐标"""
+    frac = positions @ np.linalg.inv(lattice)
+    return frac - np.floor(frac)
+
+
+def _periodic_images(
+    positions: np.ndarray, lattice: np.ndarray, cutoff: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """折回晶胞的原子及其 halo 周期像：返回 (坐标, 对应的原子下标)，前 N 个为原子本身"""
+    frac = fractional_coordinates(positions, lattice)
+    reach = cutoff / _perpendicular_widths(lattice)
+    n_images = np.ceil(reach).astype(int)
+
+    points = [frac @ lattice]
+    atom_indices = [np.arange(len(positions))]
+    for shift in product(*(range(-n, n + 1) for n in n_images)):
+        if not any(shift):
+            continue
+        shifted = frac + shift
+        inside = np.all((shifted >= -reach) & (shifted < 1 + reach), axis=1)
+        if inside.any():
+            points.append(shifted[inside] @ lattice)
+            atom_indices.append(np.flatnonzero(inside))
+    return np.concatenate(points), np.concatenate(atom_indices)
+
+
+def neighbor_pairs(
+    positions: Sequence[Sequence[float]],
+    cutoff: float,
+    lattice: Optional[Sequence[Sequence[float]]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    距离不超过 cutoff 的原子对 (i, j, d)，i <= j。
+
+    给定 lattice 时按三维周期性边界计算（最小像及 cutoff 内的所有周期像），
+    i == j 表示原子与自身周期像的距离；未给定时按孤立体系计算。
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    n_atoms = len(positions)
+    empty = np.empty(0, dtype=int)
+    if n_atoms == 0 or cutoff <= 0:
+        return empty, empty, np.empty(0)
+
+    lattice = _as_lattice(lattice)
+    if lattice is not None:
+        points, atom_indices = _periodic_images(positions, lattice, cutoff)
+    else:
+        points, atom_indices = positions, np.arange(n_atoms)
+
+    cells = np.floor((points - points.min(axis=0)) / cutoff).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = np.ravel_multi_index(cells.T, dims)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    query_cells = cells[:n_atoms]
+    queries, candidates = [], []
+    for offset in _NEIGHBOR_CELL_OFFSETS:
+        neighbor_cells = query_cells + offset
+        valid = np.all((neighbor_cells >= 0) & (neighbor_cells < dims), axis=1)
+        neighbor_keys = np.ravel_multi_index(neighbor_cells[valid].T, dims)
+        starts = np.searchsorted(sorted_keys, neighbor_keys, side='left')
+        counts = np.searchsorted(sorted_keys, neighbor_keys, side='right') - starts
+        total = counts.sum()
+        if not total:
+            continue
+        # 把每个格子的 [start, start + count) 区间展开成候选下标
+        range_offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        queries.append(np.repeat(np.flatnonzero(valid), counts))
+        candidates.append(order[range_offsets + np.arange(total)])
+    if not queries:
+        return empty, empty, np.empty(0)
+
+    queries = np.concatenate(queries)
+    candidates = np.concatenate(candidates)
+    distances = np.linalg.norm(points[queries] - points[candidates], axis=1)
+    neighbors = atom_indices[candidates]
+    # 周期像之间的同一对原子只保留 i < j 的方向；i == j 为自身周期像
+    keep = (
+        (distances <= cutoff)
+        & (queries != candidates)
+        & ((queries < neighbors) | ((queries == neighbors) & (candidates >= n_atoms)))
+    )
+    return queries[keep], neighbors[keep], distances[keep]
+
+
+def connected_components(n_atoms: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """按边 (i, j) 计算连通分量，返回每个原子的分量标签（分量内最小的原子下标）"""
+    labels = np.arange(n_atoms)
+    while True:
+        li, lj = labels[i], labels[j]
+        hooked = labels.copy()
+        lower = np.minimum(li, lj)
+        np.minimum.at(hooked, li, lower)
+        np.minimum.at(hooked, lj, lower)
+        # 指针跳跃直到每个标签都指向分量的根
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def nearest_neighbor_distances(
+    positions: Sequence[Sequence[float]],
+    lattice: Optional[Sequence[Sequence[float]]] = None,
+    initial_cutoff: float = 3.0,
+) -> np.ndarray:
+    """每个原子到最近邻（含周期像）的距离，孤立体系中只有一个原子时为 inf"""
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    n_atoms = len(positions)
+    nearest = np.full(n_atoms, np.inf)
+    if n_atoms == 0:
+        return nearest
+
+    lattice_array = _as_lattice(lattice)
+    if lattice_array is not None:
+        # 沿晶格矢量平移得到的自身周期像给出上界
+        max_cutoff = float(np.linalg.norm(lattice_array, axis=1).min())
+    elif n_atoms > 1:
+        max_cutoff = float(np.linalg.norm(np.ptp(positions, axis=0)))
+    else:
+        return nearest
+
+    cutoff = min(initial_cutoff, max_cutoff)
+    while True:
+        i, j, d = neighbor_pairs(positions, cutoff, lattice_array)
+        nearest[:] = np.inf
+        np.minimum.at(nearest, i, d)
+        np.minimum.at(nearest, j, d)
+        if np.isfinite(nearest).all() or cutoff >= max_cutoff:
+            return nearest
+        cutoff = min(cutoff * 2, max_cutoff)
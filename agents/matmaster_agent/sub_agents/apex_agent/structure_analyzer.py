@@ -7,6 +7,15 @@ import logging
 import math
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
+from .neighbor_list import (
+    connected_components,
+    fractional_coordinates,
+    nearest_neighbor_distances,
+    neighbor_pairs,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -139,21 +148,6 @@ SURFACE_STRUCTURE_BLOCK_MESSAGE = (
 )
 
 
-def _vector_length(vector: List[float]) -> float:
-    return (vector[0] ** 2 + vector[1] ** 2 + vector[2] ** 2) ** 0.5
-
-
-def _unit_vector(vector: List[float]) -> List[float]:
-    length = _vector_length(vector)
-    if length == 0:
-        return [0.0, 0.0, 0.0]
-    return [component / length for component in vector]
-
-
-def _project(u: List[float], point: List[float]) -> float:
-    return point[0] * u[0] + point[1] * u[1] + point[2] * u[2]
-
-
 _ATOMIC_RADIUS: Dict[str, float] = {
     'H': 0.31,
     'C': 0.76,
@@ -214,63 +208,51 @@ def _normalize_symbol(symbol: str) -> str:
     return symbol[0].upper() + symbol[1:].lower()
 
 
-def _pair_bond_cut(sym_i: str, sym_j: str, default: float = 1.9) -> float:
-    si = _normalize_symbol(sym_i)
-    sj = _normalize_symbol(sym_j)
-    ri = _ATOMIC_RADIUS.get(si)
-    rj = _ATOMIC_RADIUS.get(sj)
-    if ri and rj:
-        return max(default, 1.1 * (ri + rj))
-    if ri and not rj:
-        return max(default, 1.1 * (ri + 1.0))
-    if rj and not ri:
-        return max(default, 1.1 * (rj + 1.0))
-    return default
+def _atomic_radii(species: Optional[List[str]], n_atoms: int) -> np.ndarray:
+    """每个原子的共价半径，未知元素为 nan"""
+    radii = np.full(n_atoms, np.nan)
+    for idx, symbol in enumerate((species or [])[:n_atoms]):
+        radii[idx] = _ATOMIC_RADIUS.get(_normalize_symbol(symbol), np.nan)
+    return radii
+
+
+def _pair_bond_cuts(
+    radii: np.ndarray, i: np.ndarray, j: np.ndarray, default: float = 1.9
+) -> np.ndarray:
+    """成键判据：两端半径已知取 1.1 * (ri + rj)，只知一端时另一端按 1.0 Å 计，均不低于 default"""
+    ri, rj = radii[i], radii[j]
+    known = ~np.isnan(ri) | ~np.isnan(rj)
+    cuts = 1.1 * (np.nan_to_num(ri, nan=1.0) + np.nan_to_num(rj, nan=1.0))
+    return np.where(known, np.maximum(default, cuts), default)
 
 
 def _build_components(
     positions: List[List[float]],
     species: Optional[List[str]] = None,
     bond_cut: float = 1.9,
+    lattice: Optional[List[List[float]]] = None,
 ) -> List[List[int]]:
     n_atoms = len(positions)
     if n_atoms == 0:
         return []
 
-    adjacency: List[List[int]] = [[] for _ in range(n_atoms)]
-    for i in range(n_atoms):
-        xi, yi, zi = positions[i]
-        sym_i = species[i] if species and i < len(species) else 'X'
-        for j in range(i + 1, n_atoms):
-            xj, yj, zj = positions[j]
-            dx = xi - xj
-            dy = yi - yj
-            dz = zi - zj
-            d2 = dx * dx + dy * dy + dz * dz
-            cutoff = bond_cut
-            if species:
-                sym_j = species[j] if j < len(species) else 'X'
-                cutoff = _pair_bond_cut(sym_i, sym_j, bond_cut)
-            if d2 <= cutoff * cutoff:
-                adjacency[i].append(j)
-                adjacency[j].append(i)
-
-    visited = [False] * n_atoms
-    components: List[List[int]] = []
-    for atom_idx in range(n_atoms):
-        if not visited[atom_idx]:
-            stack = [atom_idx]
-            visited[atom_idx] = True
-            component: List[int] = []
-            while stack:
-                node = stack.pop()
-                component.append(node)
-                for neighbor in adjacency[node]:
-                    if not visited[neighbor]:
-                        visited[neighbor] = True
-                        stack.append(neighbor)
-            components.append(sorted(component))
-    return components
+    if species:
+        radii = _atomic_radii(species, n_atoms)
+        max_radius = np.nanmax(radii) if not np.isnan(radii).all() else None
+        search_cut = (
+            max(bond_cut, 2.2 * max(max_radius, 1.0)) if max_radius else bond_cut
+        )
+        i, j, d = neighbor_pairs(positions, search_cut, lattice)
+        bonded = d <= _pair_bond_cuts(radii, i, j, bond_cut)
+        i, j = i[bonded], j[bonded]
+    else:
+        i, j, _ = neighbor_pairs(positions, bond_cut, lattice)
+
+    labels = connected_components(n_atoms, i, j)
+    # 标签为分量内最小原子下标，按标签排序即按首个原子的顺序输出
+    order = np.argsort(labels, kind='stable')
+    _, starts = np.unique(labels[order], return_index=True)
+    return [group.tolist() for group in np.split(order, starts[1:])]
 
 
 def _component_composition(species: List[str], component: List[int]) -> Dict[str, int]:
@@ -308,35 +290,48 @@ def _known_adsorbate_set() -> set:
     return set(known)
 
 
-def _nearest_neighbor_average_distance(points: List[List[float]]) -> float:
-    if not points or len(points) == 1:
+def _nearest_neighbor_average_distance(
+    points: List[List[float]], lattice: Optional[List[List[float]]] = None
+) -> float:
+    if len(points) == 0 or (len(points) == 1 and lattice is None):
         return 0.0
-    total = 0.0
-    for i, (xi, yi, zi) in enumerate(points):
-        nearest = None
-        for j, (xj, yj, zj) in enumerate(points):
-            if i == j:
-                continue
-            dx = xi - xj
-            dy = yi - yj
-            dz = zi - zj
-            d = (dx * dx + dy * dy + dz * dz) ** 0.5
-            if nearest is None or d < nearest:
-                nearest = d
-        total += nearest or 0.0
-    return total / float(len(points))
+    nearest = nearest_neighbor_distances(points, lattice)
+    return float(np.where(np.isfinite(nearest), nearest, 0.0).mean())
+
+
+def _atoms_near(
+    positions: np.ndarray,
+    targets: np.ndarray,
+    cutoff: float,
+    lattice: Optional[List[List[float]]] = None,
+) -> np.ndarray:
+    """与 targets 中任一原子距离不超过 cutoff 的原子（含周期像）"""
+    i, j, _ = neighbor_pairs(positions, cutoff, lattice)
+    near = np.zeros(len(positions), dtype=bool)
+    near[j[targets[i]]] = True
+    near[i[targets[j]]] = True
+    return near
+
+
+def _periodic_span_fraction(frac: np.ndarray) -> float:
+    """周期性方向上原子占据的比例：1 减去分数坐标间最大的环形空隙"""
+    if len(frac) < 2:
+        return 0.0
+    coords = np.sort(frac)
+    gaps = np.diff(coords, append=coords[0] + 1.0)
+    return float(1.0 - gaps.max())
 
 
 def _detect_vacuum_and_adsorbate(
     lattice: List[List[float]], cart_positions: List[List[float]], species: List[str]
 ) -> Dict[str, Any]:
-    components = _build_components(cart_positions, species, bond_cut=1.9)
+    components = _build_components(cart_positions, species, 1.9, lattice)
     if not components:
         return {'has_vacuum': False, 'has_adsorbate': False, 'num_adsorbate_atoms': 0}
 
+    positions = np.asarray(cart_positions, dtype=float).reshape(-1, 3)
     main_component = max(components, key=len)
-    main_positions = [cart_positions[idx] for idx in main_component]
-    d_avg_main = _nearest_neighbor_average_distance(main_positions)
+    d_avg_main = _nearest_neighbor_average_distance(positions[main_component], lattice)
 
     known_set = _known_adsorbate_set()
     drop_components: List[List[int]] = []
@@ -347,36 +342,28 @@ def _detect_vacuum_and_adsorbate(
         if _normalize_composition(composition) in known_set and len(comp) <= 15:
             drop_components.append(comp)
 
-    def min_distance_to_main(comp: List[int]) -> float:
-        min_dist = None
-        for idx in comp:
-            xi, yi, zi = cart_positions[idx]
-            for main_idx in main_component:
-                xj, yj, zj = cart_positions[main_idx]
-                dx = xi - xj
-                dy = yi - yj
-                dz = zi - zj
-                d = (dx * dx + dy * dy + dz * dz) ** 0.5
-                if min_dist is None or d < min_dist:
-                    min_dist = d
-        return min_dist or 0.0
-
-    for comp in components:
-        if comp is main_component or comp in drop_components:
-            continue
-        if d_avg_main > 0.0 and min_distance_to_main(comp) > d_avg_main:
-            drop_components.append(comp)
+    if d_avg_main > 0.0:
+        # 与主体最近距离超过主体平均近邻距离的分量视为吸附物
+        in_main = np.zeros(len(positions), dtype=bool)
+        in_main[main_component] = True
+        near_main = _atoms_near(positions, in_main, d_avg_main, lattice)
+        for comp in components:
+            if comp is main_component or comp in drop_components:
+                continue
+            if not near_main[comp].any():
+                drop_components.append(comp)
 
     dropped_indices = {idx for comp in drop_components for idx in comp}
     has_adsorbate = len(dropped_indices) > 0
 
-    remaining_positions = [
-        p for i, p in enumerate(cart_positions) if i not in dropped_indices
+    remaining_indices = [
+        i for i in range(len(cart_positions)) if i not in dropped_indices
     ]
+    remaining_positions = positions[remaining_indices]
     remaining_species = [
-        species[i] for i in range(len(cart_positions)) if i not in dropped_indices
+        species[i] if i < len(species) else 'X' for i in remaining_indices
     ]
-    if not remaining_positions:
+    if not remaining_indices:
         return {
             'has_vacuum': False,
             'has_adsorbate': has_adsorbate,
@@ -384,7 +371,7 @@ def _detect_vacuum_and_adsorbate(
         }
 
     components_after = _build_components(
-        remaining_positions, remaining_species, bond_cut=1.9
+        remaining_positions, remaining_species, 1.9, lattice
     )
     if not components_after:
         return {
@@ -393,18 +380,24 @@ def _detect_vacuum_and_adsorbate(
             'num_adsorbate_atoms': len(dropped_indices),
         }
     main_component_after = max(components_after, key=len)
-    slab_positions = [remaining_positions[idx] for idx in main_component_after]
-
-    spans_fraction: List[float] = []
-    for lattice_vector in lattice:
-        length = _vector_length(lattice_vector)
-        unit_vec = _unit_vector(lattice_vector)
-        projections = [_project(unit_vec, pos) for pos in slab_positions]
-        if length <= 1e-8:
-            spans_fraction.append(1.0)
-            continue
-        span = max(projections) - min(projections)
-        spans_fraction.append(span / length if length > 0 else 1.0)
+    slab_positions = remaining_positions[main_component_after]
+
+    lattice_array = np.asarray(lattice, dtype=float)
+    lengths = np.linalg.norm(lattice_array, axis=1)
+    if abs(np.linalg.det(lattice_array)) < 1e-8:
+        # 退化晶胞：沿晶格矢量方向投影
+        spans_fraction = [
+            (
+                float(np.ptp(slab_positions @ (vector / length)) / length)
+                if length > 1e-8
+                else 1.0
+            )
+            for vector, length in zip(lattice_array, lengths)
+        ]
+    else:
+        # 按分数坐标的环形空隙计算，跨越晶胞边界的 slab 不会被误判为填满晶胞
+        slab_frac = fractional_coordinates(slab_positions, lattice_array)
+        spans_fraction = [_periodic_span_fraction(slab_frac[:, k]) for k in range(3)]
 
     vacuum_threshold = 0.7
     has_vacuum = any(frac < vacuum_threshold for frac in spans_fraction)
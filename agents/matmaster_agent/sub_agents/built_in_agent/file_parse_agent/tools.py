@@ -7,6 +7,7 @@ import aiohttp
 from litellm import acompletion
 
 from agents.matmaster_agent.llm_config import MatMasterLlmConfig
+from agents.matmaster_agent.services.http_client import http_client
 from agents.matmaster_agent.sub_agents.built_in_agent.file_parse_agent.prompt import (
     FileParseAgentInstruction,
 )
@@ -65,50 +66,45 @@ async def _parse_text_content(content: bytes) -> str:
 
 async def file_parse(file_url: str) -> FileParseResponse:
     """Orchestrator: Downloads file and dispatches to appropriate parser."""
-    async with aiohttp.ClientSession() as session:
-        try:
-            # 1. Download & Validate
-            async with session.get(
-                file_url, timeout=aiohttp.ClientTimeout(total=60)
-            ) as resp:
-                # Determine the file type first to apply appropriate size limit
-                filename = await get_filename_from_url(file_url)
-                mime_type, _ = mimetypes.guess_type(filename)
-
-                max_size = (
-                    IMAGE_FILE_MAX_SIZE
-                    if mime_type and mime_type.startswith('image/')
-                    else TEXT_FILE_MAX_SIZE
-                )
-
-                if resp.content_length and resp.content_length > max_size:
-                    return FileParseResponse(
-                        msg=f'文件超出大小限制（>{max_size} 字节）'
-                    )
-
-                content = await resp.read()
-                if len(content) > max_size:
-                    return FileParseResponse(
-                        msg=f'文件超出大小限制（>{max_size} 字节）'
-                    )
-
-            # 2. Type Detection
-            # mime_type, _ = mimetypes.guess_type(filename)
-
-            # 3. Dispatch
-            if mime_type and mime_type.startswith('image/'):
-                result = await _parse_image_content(content, mime_type)
-            else:
-                # Parse text content directly from the bytes we already have
-                result = await _parse_text_content(content)
-
-            return FileParseResponse(msg=str(result))
-
-        except asyncio.TimeoutError:
-            return FileParseResponse(msg='请求超时，请检查网络或文件地址')
-        except Exception as e:
-            # 捕获 litellm 异常或其他网络异常
-            return FileParseResponse(msg=f'解析错误: {str(e)}')
+    try:
+        # 1. Download & Validate
+        async with http_client.get(
+            file_url, timeout=aiohttp.ClientTimeout(total=60)
+        ) as resp:
+            # Determine the file type first to apply appropriate size limit
+            filename = await get_filename_from_url(file_url)
+            mime_type, _ = mimetypes.guess_type(filename)
+
+            max_size = (
+                IMAGE_FILE_MAX_SIZE
+                if mime_type and mime_type.startswith('image/')
+                else TEXT_FILE_MAX_SIZE
+            )
+
+            if resp.content_length and resp.content_length > max_size:
+                return FileParseResponse(msg=f'文件超出大小限制（>{max_size} 字节）')
+
+            content = await resp.read()
+            if len(content) > max_size:
+                return FileParseResponse(msg=f'文件超出大小限制（>{max_size} 字节）')
+
+        # 2. Type Detection
+        # mime_type, _ = mimetypes.guess_type(filename)
+
+        # 3. Dispatch
+        if mime_type and mime_type.startswith('image/'):
+            result = await _parse_image_content(content, mime_type)
+        else:
+            # Parse text content directly from the bytes we already have
+            result = await _parse_text_content(content)
+
+        return FileParseResponse(msg=str(result))
+
+    except asyncio.TimeoutError:
+        return FileParseResponse(msg='请求超时，请检查网络或文件地址')
+    except Exception as e:
+        # 捕获 litellm 异常或其他网络异常
+        return FileParseResponse(msg=f'解析错误: {str(e)}')
 
 
 if __name__ == '__main__':
@@ -1,4 +1,3 @@
-import copy
 from typing import AsyncGenerator
 
 from google.adk.agents import InvocationContext
@@ -18,6 +17,11 @@ from agents.matmaster_agent.utils.event_utils import (
     context_function_event,
     update_state_event,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    get_plan_index,
+    step_state_key,
+    update_plan_step,
+)
 
 
 class LLMToolAgent(DisallowTransferAndContentLimitLlmAgent):
@@ -33,19 +37,20 @@ class LLMToolAgent(DisallowTransferAndContentLimitLlmAgent):
         async for event in super()._run_events(ctx):
             yield event
 
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
-        update_plan['steps'][ctx.session.state['plan_index']][
-            'status'
-        ] = PlanStepStatusEnum.SUCCESS
+        update_plan = update_plan_step(
+            ctx.session.state['plan'],
+            get_plan_index(ctx.session.state),
+            status=PlanStepStatusEnum.SUCCESS,
+        )
         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
         current_step = ctx.session.state['plan']['steps'][
-            ctx.session.state['plan_index']
+            get_plan_index(ctx.session.state)
         ]
         current_step_tool_name = current_step['tool_name']
-        step_title = ctx.session.state.get('step_title', {}).get(
+        step_title = ctx.session.state.get(step_state_key('step_title'), {}).get(
             'title',
-            f"{i18n.t(ctx.session.state['separate_card_info'])} {ctx.session.state['plan_index'] + 1}: {current_step_tool_name}",
+            f"{i18n.t(ctx.session.state.get(step_state_key('separate_card_info'), ''))} {get_plan_index(ctx.session.state) + 1}: {current_step_tool_name}",
         )
         for matmaster_flow_event in context_function_event(
             ctx,
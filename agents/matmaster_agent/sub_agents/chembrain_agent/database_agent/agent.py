@@ -9,7 +9,7 @@ from agents.matmaster_agent.core_agents.base_agents.subordinate_agent import (
 from agents.matmaster_agent.llm_config import MatMasterLlmConfig
 
 from ..constant import CHEMBRAIN_AGENT_NAME
-from ..tools.database import DatabaseManager
+from ..tools.database import get_polymer_db_manager
 from .prompt import instructions_cch_v1
 
 
@@ -33,7 +33,7 @@ def save_query_results(
 def init_database_agent(config):
     """Initialize the database agent with the given configuration."""
     selected_model = config.gpt_4o
-    db_manager = DatabaseManager('polymer_db')
+    db_manager = get_polymer_db_manager()
     get_table_field_info = db_manager.init_get_table_field_info()
     query_table = db_manager.init_query_table()
     get_table_field = db_manager.init_get_table_fields()
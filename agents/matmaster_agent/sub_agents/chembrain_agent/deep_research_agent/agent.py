@@ -1,28 +1,37 @@
-import secrets
+import logging
 from datetime import datetime
 
-from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.agents import BaseAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.events import Event, EventActions
 
+from agents.matmaster_agent.config import PAPER_AGENT_CONCURRENCY, PAPER_AGENT_TIMEOUT
 from agents.matmaster_agent.constant import (
     LOADING_DESC,
     LOADING_START,
     LOADING_STATE_KEY,
     LOADING_TITLE,
+    MATMASTER_AGENT_NAME,
     TMP_FRONTEND_STATE_KEY,
 )
 from agents.matmaster_agent.core_agents.base_agents.subordinate_agent import (
     SubordinateSequentialAgent,
 )
 from agents.matmaster_agent.llm_config import MatMasterLlmConfig
+from agents.matmaster_agent.logger import PrefixFilter
 from agents.matmaster_agent.sub_agents.chembrain_agent.constant import (
     CHEMBRAIN_AGENT_NAME,
 )
+from agents.matmaster_agent.utils.fanout_utils import run_agents_bounded
 
+from ..tools.database import get_database_manager
 from .paper_agent.agent import init_paper_agent
 from .report_agent.agent import init_report_agent
 
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
 
 def mock_paper_list_before_agent(callback_context: CallbackContext):
     # 获取相关文献列表
@@ -75,11 +84,15 @@ def paper_list_before_agent(callback_context: CallbackContext):
         for i, paper in enumerate(paper_list[: min(10, len(paper_list))])
     }
     print(f"paper_list: {len(callback_context.state['paper_list'])}")
+    # 检索结果一返回就批量预取全部论文内容
+    get_database_manager(callback_context.state['db_name']).prefetch_papers(
+        list(callback_context.state['paper_list'].values())
+    )
     return
 
 
 class GroupPaperAgent(BaseAgent):
-    """Distributes tasks and dynamically creates a ParallelAgent."""
+    """Reads the papers concurrently and merges the findings in paper order."""
 
     def __init__(self, name):
         super().__init__(name=name)
@@ -92,7 +105,6 @@ class GroupPaperAgent(BaseAgent):
             ctx._event_actions.escalate = True
             return
         POOL = list(paper_list.keys())
-        run_id = secrets.token_hex(2)
 
         print(datetime.now(), LOADING_START)
         loading_title_msg = f"Reading {len(POOL)} Papers..."
@@ -110,22 +122,39 @@ class GroupPaperAgent(BaseAgent):
                 }
             ),
         )
-        # yield Event(
-        #     author=self.name,
-        #     content=types.Content(role=self.name,
-        #                           parts=[types.Part(text=f"running tasks for {len(POOL)} paper readings")]),
-        #     actions=EventActions(state_delta={TMP_FRONTEND_STATE_KEY: {"job_state": "in_progress", **task_delta}})
-        # )
-        _ = ParallelAgent(
-            name=f"block_{run_id}",
-            sub_agents=[
-                init_paper_agent(MatMasterLlmConfig, name=n, run_id=run_id)
-                for n in POOL
-            ],
+        # 论文精读的文本事件不向前端输出，只把按论文顺序合并后的结果写入 state，由 report_agent 注入
+        paper_agents = [init_paper_agent(MatMasterLlmConfig, name=n) for n in POOL]
+        results = await run_agents_bounded(
+            ctx,
+            self.name,
+            paper_agents,
+            concurrency=PAPER_AGENT_CONCURRENCY,
+            timeout=PAPER_AGENT_TIMEOUT,
+        )
+        paper_findings = [
+            {
+                'paper': name,
+                'doi': paper_list[name],
+                'status': result.status,
+                'finding': result.text,
+            }
+            for name, result in zip(POOL, results)
+        ]
+        logger.info(
+            f"{ctx.session.id} paper findings: {[finding['status'] for finding in paper_findings]}"
         )
-        # comment this out to avoid returning the text message events from paper_agent
-        # async for ev in parallel.run_async(ctx):
-        #     yield ev
+        state_delta = {
+            'paper_findings': paper_findings,
+            'paper_response': {
+                finding['doi']: finding['finding']
+                for finding in paper_findings
+                if finding['finding']
+            },
+        }
+        for finding in paper_findings:
+            if finding['finding']:
+                state_delta[f"{finding['paper']}_finding"] = finding['finding']
+        yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
 
 
 def init_paper_group_agent():
@@ -2,14 +2,41 @@ from typing import Optional
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
 
 from agents.matmaster_agent.sub_agents.chembrain_agent.tools.io import save_llm_request
 
 
+def format_paper_findings(paper_findings: list) -> str:
+    """按论文顺序合并各篇论文的精读结果，未成功读取的论文只列出 DOI"""
+    sections = []
+    skipped = []
+    for finding in paper_findings:
+        if finding['finding']:
+            sections.append(
+                f"## {finding['paper']} (DOI: {finding['doi']})\n{finding['finding']}"
+            )
+        else:
+            skipped.append(f"{finding['doi']} ({finding['status']})")
+    text = 'paper findings:\n\n' + '\n\n'.join(sections)
+    if skipped:
+        text += '\n\nThe following papers could not be read: ' + ', '.join(skipped)
+    return text
+
+
 def update_invoke_message(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> Optional[LlmResponse]:
-    """save llm request to file"""
+    """inject the merged paper findings and save llm request to file"""
+    paper_findings = callback_context.state.get('paper_findings')
+    if paper_findings:
+        llm_request.contents.append(
+            types.Content(
+                role='user',
+                parts=[types.Part(text=format_paper_findings(paper_findings))],
+            )
+        )
+
     output_file = 'llm_contents_report.json'
     save_llm_request(llm_request, output_file)
 
@@ -1,15 +1,21 @@
 import asyncio
-import base64
+import logging
 import shutil
 import tarfile
 import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
 import aiofiles
-import aiohttp
 
-from ..tools.io import upload_base64_to_oss
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.utils.io_oss import upload_to_oss
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
 
 
 async def extract_convert_and_upload(tgz_url: str, temp_dir: str = './tmp') -> dict:
@@ -24,17 +30,14 @@ async def extract_convert_and_upload(tgz_url: str, temp_dir: str = './tmp') -> d
     temp_path.mkdir(exist_ok=True, parents=True)
 
     try:
-        # 获取所有JPG文件的Base64编码
         jpg_files = await extract_jpg_from_tgz_url(tgz_url, temp_path)
-        conversion_tasks = [jpg_to_base64(jpg) for jpg in jpg_files]
-        base64_results = await asyncio.gather(*conversion_tasks)
 
-        # 准备上传任务
+        # 准备上传任务（直接上传本地文件，不经过 base64）
         upload_tasks = []
-        for jpg_path, b64_data in base64_results:
+        for jpg_path in jpg_files:
             filename = jpg_path.name
             oss_path = f"retrosyn/image_{filename}_{int(time.time())}.jpg"
-            upload_tasks.append(upload_to_oss_wrapper(b64_data, oss_path, filename))
+            upload_tasks.append(upload_to_oss_wrapper(jpg_path, oss_path, filename))
 
         return {
             filename: result
@@ -47,35 +50,34 @@ async def extract_convert_and_upload(tgz_url: str, temp_dir: str = './tmp') -> d
 
 
 async def upload_to_oss_wrapper(
-    b64_data: str, oss_path: str, filename: str
+    jpg_path: Path, oss_path: str, filename: str
 ) -> Dict[str, dict]:
     """上传包装器，保留原始文件名信息"""
-    result = await upload_base64_to_oss(b64_data, oss_path)
+    try:
+        result = {
+            'status': 'success',
+            'oss_path': await upload_to_oss(jpg_path, oss_path),
+        }
+    except Exception as e:
+        logger.exception(f"OSS 上传失败: oss_path={oss_path} error={str(e)}")
+        result = {'status': 'failed', 'reason': str(e)}
 
     return {filename: result}
 
 
-async def jpg_to_base64(jpg_path: Path) -> Tuple[Path, str]:
-    """异步将JPG文件转换为Base64编码"""
-    async with aiofiles.open(jpg_path, 'rb') as f:
-        content = await f.read()
-        return (jpg_path, base64.b64encode(content).decode('utf-8'))
-
-
 async def extract_jpg_from_tgz_url(tgz_url: str, temp_path: Path) -> List[Path]:
     """使用指定临时目录处理文件"""
-    async with aiohttp.ClientSession() as session:
-        tgz_path = temp_path / 'downloaded.tgz'
+    tgz_path = temp_path / 'downloaded.tgz'
 
-        await download_file(session, tgz_url, tgz_path)
-        await extract_tarfile(tgz_path, temp_path)
+    await download_file(tgz_url, tgz_path)
+    await extract_tarfile(tgz_path, temp_path)
 
-        return await find_jpg_files(temp_path)
+    return await find_jpg_files(temp_path)
 
 
-async def download_file(session: aiohttp.ClientSession, url: str, dest: Path) -> None:
+async def download_file(url: str, dest: Path) -> None:
     """异步下载文件"""
-    async with session.get(url) as response:
+    async with http_client.get(url) as response:
         response.raise_for_status()
         async with aiofiles.open(dest, 'wb') as f:
             async for chunk in response.content.iter_chunked(8192):
@@ -5,6 +5,20 @@ TABLE_FILED_INFO_NAME = '690hd14'
 TABLE_PAPER_MONOMER_INFO_NAME = '690hd16'
 TABLE_MONOMER_INFO_NAME = '690hd17'
 
+# query_table 工具说明中 filters_json 的示例
+QUERY_FILTERS_EXAMPLE = """                The dictionary structure of the filters_json is as follows:
+                {
+                    'type': 2,
+                    'groupOperator': 'and',
+                    'sub': [
+                        {'type': 1, 'field': 'polymer_type', 'operator': 'like', 'value': 'polyimide'},
+                        {'type': 2, 'groupOperator': 'or', 'sub': [
+                            {'type': 1, 'field': 'glass_transition_temperature', 'operator': 'lt', 'value': 400},
+                        ]}
+                    ]
+                }
+"""
+
 POLYMER_DB_TABLES = {
     'tables': [
         {
@@ -31,4 +45,5 @@ POLYMER_DB_TABLES = {
     'paper_text_table': PAPER_TEXT_TABLE_NAME,
     'paper_figure_table': None,
     'field_info_table': TABLE_FILED_INFO_NAME,
+    'query_filters_example': QUERY_FILTERS_EXAMPLE,
 }
@@ -7,7 +7,7 @@ from google.genai import types
 
 from agents.matmaster_agent.constant import FRONTEND_STATE_KEY
 
-from .tools.database import DatabaseManager
+from .tools.database import get_sse_db_manager
 
 
 def combine_after_model_callbacks(*callbacks) -> Callable:
@@ -58,8 +58,8 @@ def init_ssebrain_before_agent(llm_config):
         callback_context.state['db_name'] = (
             'solid_state_electrolyte_db'  # 使用默认数据库
         )
-        db_manager = DatabaseManager('solid_state_electrolyte_db')
-        await db_manager.async_init()  # Call the async init method
+        db_manager = get_sse_db_manager()
+        await db_manager.async_init()  # 表结构走进程级缓存
         callback_context.state['available_tables'] = db_manager.table_schema
 
         prompt = ''
@@ -4,7 +4,7 @@ from google.adk.agents import LlmAgent
 from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.tool_context import ToolContext
 
-from ..tools.database import DatabaseManager
+from ..tools.database import get_sse_db_manager
 from .prompt import instructions_v1_zh
 
 
@@ -28,7 +28,7 @@ def save_query_results(
 def init_database_agent(config):
     """Initialize the database agent with the given configuration."""
     selected_model = config.gpt_4o
-    db_manager = DatabaseManager('solid_state_electrolyte_db')
+    db_manager = get_sse_db_manager()
     get_table_field_info = db_manager.init_get_table_field_info()
     query_table = db_manager.init_query_table()
     get_table_field = db_manager.init_get_table_fields()
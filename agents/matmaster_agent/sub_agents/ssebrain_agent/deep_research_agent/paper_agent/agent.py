@@ -7,7 +7,9 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest, LlmResponse
 from google.genai import types
 
-from ...tools.database import DatabaseManager
+from agents.matmaster_agent.config import PAPER_AGENT_MAX_OUTPUT_TOKENS
+
+from ...tools.database import get_database_manager
 from ...tools.io import save_llm_request
 from .prompt import instructions_v2_en
 
@@ -70,20 +72,24 @@ def create_update_invoke_message_with_agent_name(agent_name: str):
         # mock get paper content and picture
         # message, picture_mapping = mock_get_paper_content_and_picture(paper_url)
 
-        # query paper content and picture from database
-        db_manager = DatabaseManager(callback_context.state['db_name'])
-        await db_manager.async_init()  # Initialize DatabaseManager asynchronously
-        fetch_paper_content = db_manager.init_fetch_paper_content()
-        print(f"Fetching paper content from database... : {paper_url}")
-        paper_content = await fetch_paper_content(paper_url)
-        message = paper_content.get('main_txt', '')
-        picture_mapping = paper_content.get('figures', [])
+        last_parts = llm_request.contents[-1].parts if llm_request.contents else None
+        inject_paper = bool(
+            last_parts
+            and last_parts[0].text == 'For context:'
+            and last_parts[0].function_response is None
+        )
+        if inject_paper:
+            # query paper content and picture from database
+            # 只在需要注入论文内容时读取；group 开始时已批量预取，通常直接命中缓存
+            db_manager = get_database_manager(callback_context.state['db_name'])
+            fetch_paper_content = db_manager.init_fetch_paper_content()
+            paper_content = await fetch_paper_content(paper_url)
+            message = paper_content.get('main_txt', '')
+            picture_mapping = paper_content.get('figures', [])
 
         contents = []
         try:
-            text = llm_request.contents[-1].parts[0].text
-            function_response = llm_request.contents[-1].parts[0].function_response
-            if text == 'For context:' and function_response is None:
+            if inject_paper:
                 contents.append(
                     types.Content(
                         role='user',
@@ -110,7 +116,7 @@ def create_update_invoke_message_with_agent_name(agent_name: str):
     return update_invoke_message_with_agent_name
 
 
-def init_paper_agent(config, name, run_id):
+def init_paper_agent(config, name):
     """Initialize the researcher agent with the given configuration."""
     # Select the model based on the configuration
     selected_model = config.gemini_2_5_pro
@@ -122,6 +128,10 @@ def init_paper_agent(config, name, run_id):
         model=selected_model,
         description="Paper agent that read one particular paper to extract information about user's query",
         tools=[],
+        # 每篇论文独立的输出 token 预算
+        generate_content_config=types.GenerateContentConfig(
+            max_output_tokens=PAPER_AGENT_MAX_OUTPUT_TOKENS
+        ),
         output_key=f"{name}_finding",
         before_model_callback=create_update_invoke_message_with_agent_name(name),
         after_model_callback=create_save_response(name),
@@ -1,18 +1,19 @@
 import logging
 
-import requests
+import aiohttp
 
 from agents.matmaster_agent.constant import (
     BOHRIUM_API_URL,
     MATMASTER_AGENT_NAME,
     OPENAPI_HOST,
 )
+from agents.matmaster_agent.services.http_client import http_client
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def ak_to_username(access_key: str) -> str:
+async def ak_to_username(access_key: str) -> str:
     url = f"{OPENAPI_HOST}/openapi/v1/account/info"
     headers = {
         'AccessKey': access_key,
@@ -22,10 +23,12 @@ def ak_to_username(access_key: str) -> str:
     }
     try:
         logger.info(f"[{MATMASTER_AGENT_NAME}]:[ak_to_username] headers = {headers}")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # 抛出HTTP错误异常
+        async with http_client.get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            response.raise_for_status()  # 抛出HTTP错误异常
+            data = await response.json()
 
-        data = response.json()
         if data.get('code') == 0:
             user_data = data.get('data', {})
             email = user_data.get('email', '')
@@ -38,13 +41,13 @@ def ak_to_username(access_key: str) -> str:
             return username
         else:
             raise Exception(f"API error: {data}")
-    except requests.RequestException as e:
+    except aiohttp.ClientError as e:
         raise Exception(f"HTTP request failed: {e}")
     except Exception as e:
         raise Exception(f"Failed to get user info: {e}")
 
 
-def ak_to_ticket(access_key: str, expiration: int = 48) -> str:  # 48 hours
+async def ak_to_ticket(access_key: str, expiration: int = 48) -> str:  # 48 hours
     url = (
         f"{BOHRIUM_API_URL}/bohrapi/v1/ticket/get?expiration={expiration}&preOrderId=0"
     )
@@ -53,12 +56,14 @@ def ak_to_ticket(access_key: str, expiration: int = 48) -> str:  # 48 hours
         'User-Agent': 'Apifox/1.0.0 (https://apifox.com)',
         'Accept': '*/*',
         'Host': f"{BOHRIUM_API_URL.split('//')[1]}",
-        'Connection': 'keep-alive',
     }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        async with http_client.get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+
         if data.get('code') == 0:
             ticket = data.get('data', {}).get('ticket', '')
             if not ticket:
@@ -66,7 +71,7 @@ def ak_to_ticket(access_key: str, expiration: int = 48) -> str:  # 48 hours
             return ticket
         else:
             raise Exception(f"API error: {data}")
-    except requests.RequestException as e:
+    except aiohttp.ClientError as e:
         raise Exception(f"HTTP request failed: {e}")
     except Exception as e:
         raise Exception(f"Failed to get ticket: {e}")
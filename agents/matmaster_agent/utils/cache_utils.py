@@ -0,0 +1,81 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Awaitable, Callable
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存，仅用于单进程内的协程共享（非线程安全）"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, value = item
+        if expire_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def __len__(self):
+        return len(self._data)
+
+
+class AsyncLoadingCache:
+    """
+    TTLCache + 并发合并：同一 key 同时只有一个 loader 在执行，其余调用方等待同一结果；
+    loader 抛出异常时不缓存。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+        self._inflight: dict = {}
+
+    async def get(self, key, loader: Callable[[], Awaitable]):
+        if (cached := self._cache.get(key)) is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(loader())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._on_done, key))
+        # shield：单个调用方被取消时不影响其它等待同一结果的调用方
+        return await asyncio.shield(task)
+
+    def peek(self, key):
+        """仅查询已缓存的值，不触发加载"""
+        return self._cache.get(key)
+
+    def _on_done(self, key, task: asyncio.Task):
+        # 加载期间被 invalidate 的结果不再写入缓存
+        if self._inflight.get(key) is not task:
+            return
+        del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._cache.set(key, task.result())
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._cache = TTLCache(self._cache.maxsize, self._cache.ttl)
+            self._inflight.clear()
+        else:
+            self._cache.pop(key)
+            self._inflight.pop(key, None)
@@ -14,7 +14,7 @@ from agents.matmaster_agent.constant import (
     MATMASTER_AGENT_NAME,
 )
 from agents.matmaster_agent.logger import PrefixFilter
-from agents.matmaster_agent.services.project import get_project_list
+from agents.matmaster_agent.services.identity import identity_resolver
 from agents.matmaster_agent.utils.helper_func import (
     check_None_wrapper,
     get_session_state,
@@ -29,17 +29,9 @@ logger.setLevel(logging.INFO)
 async def _get_projectId(ctx: Union[InvocationContext, ToolContext]):
     if USER_DIRECT_CONSUME:
         session_state = get_session_state(ctx)
-        project_id = session_state[FRONTEND_STATE_KEY]['biz'].get(
-            'projectId'
-        ) or os.getenv('BOHRIUM_PROJECT_ID')
-        project_list = await get_project_list(access_key=_get_ak(ctx))
-        if project_id in project_list:
-            return project_id
-        else:
-            logger.warning(
-                f'{ctx.session.id} project_id <{project_id}> is not exist, use project_list[0] <{project_list[0]}>'
-            )
-            return project_list[0]
+        return await identity_resolver.get_project_id(
+            _get_ak(ctx), session_state[FRONTEND_STATE_KEY]['biz'].get('projectId')
+        )
     else:
         return MATERIALS_PROJECT_ID
 
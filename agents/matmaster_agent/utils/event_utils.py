@@ -1,8 +1,7 @@
-import copy
-import inspect
 import json
 import logging
 import os
+import sys
 import traceback
 import uuid
 from typing import Iterable, Optional
@@ -10,30 +9,24 @@ from typing import Iterable, Optional
 from deepmerge import always_merger
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
-from google.adk.models.lite_llm import LiteLlm
 from google.adk.tools import BaseTool
 from google.genai.types import Content, FunctionCall, FunctionResponse, Part
-from opik.integrations.adk import track_adk_agent_recursive
 
 from agents.matmaster_agent.base_callbacks.private_callback import _get_userId
-from agents.matmaster_agent.config import USE_PHOTON
+from agents.matmaster_agent.config import STATE_DEBUG, USE_PHOTON
 from agents.matmaster_agent.constant import (
     CURRENT_ENV,
     JOB_RESULT_KEY,
     MATMASTER_AGENT_NAME,
     ModelRole,
 )
-from agents.matmaster_agent.core_agents.base_agents.climit_agent import (
-    ContentLimitLlmAgent,
-)
 from agents.matmaster_agent.flow_agents.model import PlanStepStatusEnum
 from agents.matmaster_agent.flow_agents.style import separate_card
-from agents.matmaster_agent.llm_config import DEFAULT_MODEL, MatMasterLlmConfig
 from agents.matmaster_agent.locales import i18n
 from agents.matmaster_agent.model import RenderTypeEnum
-from agents.matmaster_agent.prompt import GLOBAL_INSTRUCTION
-from agents.matmaster_agent.services.session_files import insert_session_files
-from agents.matmaster_agent.state import ERROR_DETAIL, PLAN, UPLOAD_FILE
+from agents.matmaster_agent.services.error_explainer import error_explainer
+from agents.matmaster_agent.services.session_files import session_file_writer
+from agents.matmaster_agent.state import ERROR_DETAIL, ERROR_OCCURRED, PLAN, UPLOAD_FILE
 from agents.matmaster_agent.style import (
     no_found_structure_card,
     photon_consume_free_card,
@@ -54,35 +47,65 @@ from agents.matmaster_agent.utils.result_parse_utils import (
     get_markdown_code_result,
     get_markdown_image_result,
 )
+from agents.matmaster_agent.utils.state_utils import (
+    get_plan_index,
+    step_state_key,
+    update_plan_step,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+_MISSING = object()
+
+
+def _changed_state_delta(state: dict, state_delta: dict) -> dict:
+    """只保留与当前 state 不同的 key"""
+    changed = {}
+    for key, value in state_delta.items():
+        current = state.get(key, _MISSING)
+        # 同一对象可能已被原地修改，无法比较，必须写入
+        if current is value or current != value:
+            changed[key] = value
+    return changed
+
 
 def update_state_event(
-    ctx: InvocationContext, state_delta: dict, event: Optional[Event] = None
+    ctx: InvocationContext,
+    state_delta: dict,
+    event: Optional[Event] = None,
+    tag: Optional[str] = None,
 ):
-    stack = inspect.stack()
-    frame = stack[1]  # stack[1] 表示调用当前函数的上一层调用
-    filename = os.path.basename(frame.filename)
-    lineno = frame.lineno
+    """
+    生成只携带 state_delta 的事件；tag 缺省时用调用方的 文件名:行号 标识来源。
+    STATE_DEBUG 打开时额外记录完整调用栈与 delta 取值。
+    """
+    if tag is None:
+        frame = sys._getframe(1)
+        tag = f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}'
 
-    origin_event_state_delta = {}
     if event and event.actions and event.actions.state_delta:
         origin_event_state_delta = event.actions.state_delta
         logger.warning(
             f'[{MATMASTER_AGENT_NAME}] {ctx.session.id} origin_event_state_delta = {origin_event_state_delta}'
         )
-
-    final_state_delta = always_merger.merge(state_delta, origin_event_state_delta)
-    logger.info(
-        f'[{MATMASTER_AGENT_NAME}] {ctx.session.id} {filename}:{lineno} final_state_delta = {final_state_delta}'
-    )
-    actions_with_update = EventActions(state_delta=final_state_delta)
+        state_delta = always_merger.merge(state_delta, origin_event_state_delta)
+
+    final_state_delta = _changed_state_delta(ctx.session.state, state_delta)
+    if STATE_DEBUG:
+        logger.info(
+            f'[{MATMASTER_AGENT_NAME}] {ctx.session.id} {tag} final_state_delta = {final_state_delta}, '
+            f'unchanged_keys = {[k for k in state_delta if k not in final_state_delta]}\n'
+            f"{''.join(traceback.format_stack(sys._getframe(1)))}"
+        )
+    else:
+        logger.info(
+            f'[{MATMASTER_AGENT_NAME}] {ctx.session.id} {tag} state_delta keys = {list(final_state_delta)}'
+        )
     return Event(
         invocation_id=ctx.invocation_id,
-        author=f"{filename}:{lineno}",
-        actions=actions_with_update,
+        author=tag,
+        actions=EventActions(state_delta=final_state_delta),
     )
 
 
@@ -345,14 +368,16 @@ async def send_error_event(err, ctx: InvocationContext, author):
         yield error_card_event
 
     # 更新 plan 为失败
-    update_plan = copy.deepcopy(ctx.session.state[PLAN])
+    update_plan = ctx.session.state[PLAN]
     if update_plan.get('steps'):
-        update_plan['steps'][ctx.session.state['plan_index']][
-            'status'
-        ] = PlanStepStatusEnum.FAILED
+        update_plan = update_plan_step(
+            update_plan,
+            get_plan_index(ctx.session.state),
+            status=PlanStepStatusEnum.FAILED,
+        )
 
     yield update_state_event(
-        ctx, state_delta={PLAN: update_plan, 'error_occurred': True}
+        ctx, state_delta={PLAN: update_plan, step_state_key(ERROR_OCCURRED): True}
     )
 
     # 判断是否是异常组
@@ -374,9 +399,14 @@ async def send_error_event(err, ctx: InvocationContext, author):
             ''.join(traceback.format_tb(err.__traceback__)),
         ]
         exceptions = None  # 单一异常时不再循环子异常
-        if not ctx.session.state.get(ERROR_DETAIL):  # 仅记录第一条 Error
+        if not ctx.session.state.get(
+            step_state_key(ERROR_DETAIL)
+        ):  # 仅记录第一条 Error
             yield update_state_event(
-                ctx, state_delta={ERROR_DETAIL: f'{error_type}: {error_message}'}
+                ctx,
+                state_delta={
+                    step_state_key(ERROR_DETAIL): f'{error_type}: {error_message}'
+                },
             )
 
     # 如果是异常组，逐个子异常处理
@@ -390,9 +420,14 @@ async def send_error_event(err, ctx: InvocationContext, author):
             error_details.append(
                 f"Traceback: {''.join(traceback.format_tb(exc.__traceback__))}"
             )
-            if not ctx.session.state.get(ERROR_DETAIL):  # 仅记录第一条 Error
+            if not ctx.session.state.get(
+                step_state_key(ERROR_DETAIL)
+            ):  # 仅记录第一条 Error
                 yield update_state_event(
-                    ctx, state_delta={ERROR_DETAIL: f'{error_type}: {error_message}'}
+                    ctx,
+                    state_delta={
+                        step_state_key(ERROR_DETAIL): f'{error_type}: {error_message}'
+                    },
                 )
 
     # 合并错误信息
@@ -404,19 +439,38 @@ async def send_error_event(err, ctx: InvocationContext, author):
     ):
         yield event
 
-    # Agent 分析错误原因
-    error_handel_agent = ContentLimitLlmAgent(
-        name='error_handel_agent',
-        description='仅分析错误原因',
-        global_instruction=GLOBAL_INSTRUCTION,
-        model=LiteLlm(model=DEFAULT_MODEL),
-    )
-
-    track_adk_agent_recursive(error_handel_agent, MatMasterLlmConfig.opik_tracer)
-
-    # 调用错误处理 Agent
-    async for error_handel_event in error_handel_agent.run_async(ctx):
-        yield error_handel_event
+    # Agent 分析错误原因：同类错误复用已有解释，限流时降级为模板说明
+    if exceptions:
+        first_error = next(iter(err.exceptions))
+        error_type, error_message = type(first_error).__name__, str(first_error)
+    key = error_explainer.key(error_type, error_message)
+    explanation = await error_explainer.lookup(key)
+    if explanation is None and error_explainer.try_begin(key):
+        explanation_texts = []
+        completed = False
+        try:
+            async for error_handel_event in error_explainer.run(ctx, key):
+                if (
+                    text := is_text(error_handel_event)
+                ) and not error_handel_event.partial:
+                    explanation_texts.append(text)
+                yield error_handel_event
+            completed = True
+        except Exception as explain_err:
+            logger.warning(f'{ctx.session.id} explain error failed: {explain_err!r}')
+        finally:
+            # 被取消或中途关闭时只唤醒等待方，不缓存不完整的解释
+            generated = ''.join(explanation_texts) if completed else ''
+            error_explainer.finish(key, generated or None)
+        if explanation_texts:
+            return
+
+    if explanation is None:
+        explanation = error_explainer.fallback(error_type, error_message)
+    for explanation_event in all_text_event(
+        ctx, error_explainer.agent.name, explanation, ModelRole
+    ):
+        yield explanation_event
 
 
 async def photon_consume_event(ctx, event, author):
@@ -474,10 +528,11 @@ def handle_tool_error(ctx, author, error_message, error_type):
     )
 
     # 更新 plan 状态为失败
-    update_plan = copy.deepcopy(ctx.session.state['plan'])
-    update_plan['steps'][ctx.session.state['plan_index']][
-        'status'
-    ] = PlanStepStatusEnum.FAILED
+    update_plan = update_plan_step(
+        ctx.session.state['plan'],
+        get_plan_index(ctx.session.state),
+        status=PlanStepStatusEnum.FAILED,
+    )
     yield update_state_event(ctx, state_delta={'plan': update_plan})
 
     # 抛出相应的异常
@@ -507,12 +562,13 @@ async def display_failed_result_or_consume(
             yield event
     else:
         # 更新 plan 为成功
-        update_plan = copy.deepcopy(ctx.session.state['plan'])
         if not dict_result.get('job_id'):
             status = PlanStepStatusEnum.SUCCESS  # real-time
         else:
             status = PlanStepStatusEnum.SUBMITTED  # job-type
-        update_plan['steps'][ctx.session.state['plan_index']]['status'] = status
+        update_plan = update_plan_step(
+            ctx.session.state['plan'], get_plan_index(ctx.session.state), status=status
+        )
         yield update_state_event(ctx, state_delta={'plan': update_plan})
 
         if USE_PHOTON:
@@ -531,10 +587,8 @@ async def handle_upload_file_event(ctx: InvocationContext, author):
             elif part.file_data:
                 prompt += f", file_url = {part.file_data.file_uri}"
 
-                # 写入数据库
-                await insert_session_files(
-                    session_id=ctx.session.id, files=[part.file_data.file_uri]
-                )
+                # 写入数据库（后台批量写入）
+                session_file_writer.add(ctx.session.id, [part.file_data.file_uri])
 
                 # 包装成function_call，来避免在历史记录中展示
                 for event in context_function_event(
@@ -547,6 +601,7 @@ async def handle_upload_file_event(ctx: InvocationContext, author):
                     yield event
 
                 yield update_state_event(ctx, state_delta={UPLOAD_FILE: True})
+        session_file_writer.flush(ctx.session.id)
 
 
 def frontend_render_event(ctx, event, author, parsed_tool_result, render_tool_response):
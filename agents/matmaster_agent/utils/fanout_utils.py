@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from google.adk.agents import BaseAgent, InvocationContext
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+
+@dataclass(slots=True)
+class FanoutResult:
+    name: str
+    status: str  # success / empty / failed / timeout
+    text: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass(slots=True)
+class FanoutMetrics:
+    runs: int = 0
+    agents: int = 0
+    succeeded: int = 0
+    empty: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    wall_seconds: float = 0.0
+    agent_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            'runs': self.runs,
+            'agents': self.agents,
+            'succeeded': self.succeeded,
+            'empty': self.empty,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'wall_seconds': round(self.wall_seconds, 1),
+            'agent_seconds': round(self.agent_seconds, 1),
+            # 与逐个串行执行相比的加速比
+            'speedup': round(self.agent_seconds / max(self.wall_seconds, 1e-9), 2),
+        }
+
+
+fanout_metrics = FanoutMetrics()
+
+
+def branch_ctx(ctx: InvocationContext, parent_name: str, agent: BaseAgent):
+    """子 agent 使用独立 branch，彼此的 LLM 上下文互不可见（与 ParallelAgent 相同）"""
+    sub_ctx = ctx.model_copy()
+    branch_suffix = f'{parent_name}.{agent.name}'
+    sub_ctx.branch = f'{ctx.branch}.{branch_suffix}' if ctx.branch else branch_suffix
+    return sub_ctx
+
+
+async def _final_text(agent: BaseAgent, ctx: InvocationContext) -> Optional[str]:
+    text = None
+    # 超时取消时显式关闭 agent 的事件流，使其 finally / 上下文管理器随之执行
+    async with contextlib.aclosing(agent.run_async(ctx)) as events:
+        async for event in events:
+            if event.author != agent.name or not event.is_final_response():
+                continue
+            if event.content and event.content.parts:
+                parts = [
+                    part.text
+                    for part in event.content.parts
+                    if part.text and not part.thought
+                ]
+                if parts:
+                    text = ''.join(parts)
+    return text
+
+
+async def run_agents_bounded(
+    ctx: InvocationContext,
+    parent_name: str,
+    agents: List[BaseAgent],
+    concurrency: int,
+    timeout: float,
+) -> List[FanoutResult]:
+    """
+    在各自的 branch 中并发运行 agents（最多 concurrency 个同时运行，每个最多 timeout 秒），
+    只收集每个 agent 的最终文本回复，按 agents 的顺序返回。
+
+    子 agent 的事件不向上游输出，state_delta 也不会生效，需要的结果由调用方合并后写入 state；
+    单个 agent 失败或超时只影响自身的结果。
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(agent: BaseAgent) -> FanoutResult:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                async with asyncio.timeout(timeout):
+                    text = await _final_text(agent, branch_ctx(ctx, parent_name, agent))
+                status = 'success' if text else 'empty'
+            except TimeoutError:
+                logger.warning(
+                    f'{ctx.session.id} {agent.name} timed out after {timeout}s'
+                )
+                text, status = None, 'timeout'
+            except Exception as err:
+                logger.warning(f'{ctx.session.id} {agent.name} failed: {err!r}')
+                text, status = None, 'failed'
+            return FanoutResult(agent.name, status, text, time.monotonic() - start)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(run(agent) for agent in agents))
+
+    fanout_metrics.runs += 1
+    fanout_metrics.agents += len(results)
+    fanout_metrics.wall_seconds += time.monotonic() - start
+    for result in results:
+        fanout_metrics.agent_seconds += result.elapsed
+        if result.status == 'success':
+            fanout_metrics.succeeded += 1
+        elif result.status == 'empty':
+            fanout_metrics.empty += 1
+        elif result.status == 'failed':
+            fanout_metrics.failed += 1
+        else:
+            fanout_metrics.timed_out += 1
+    return results
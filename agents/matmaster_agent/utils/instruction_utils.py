@@ -0,0 +1,72 @@
+"""
+按调用渲染 agent 的 instruction / output_schema。
+
+agent 实例在会话之间共享，运行前改写 agent.instruction 会在并发会话间互相覆盖。
+instruction 改为 provider，调用 LLM 时从 ReadonlyContext（state）渲染；state 之外的输入
+（ICL 示例、工具文档等）由调用方通过 invocation_args 在本次调用内传入，动态 output_schema 同理。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.llm_agent import InstructionProvider
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.utils.instructions_utils import inject_session_state
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True, slots=True)
+class InvocationArgs:
+    kwargs: dict = field(default_factory=dict)
+    output_schema: Optional[type[BaseModel]] = None
+
+
+_EMPTY_ARGS = InvocationArgs()
+
+# agent_name -> 本次调用的渲染参数；ContextVar 随 task 复制，并发会话/步骤互不可见
+_invocation_args: ContextVar[dict[str, InvocationArgs]] = ContextVar(
+    'invocation_args', default={}
+)
+
+
+@contextmanager
+def invocation_args(
+    agent_name: str, output_schema: Optional[type[BaseModel]] = None, **kwargs
+) -> Iterator[None]:
+    previous = _invocation_args.get()
+    _invocation_args.set(
+        {**previous, agent_name: InvocationArgs(kwargs, output_schema)}
+    )
+    try:
+        yield
+    finally:
+        # 不使用 token.reset：异步生成器可能在其它 Context 中被关闭
+        _invocation_args.set(previous)
+
+
+def get_invocation_args(agent_name: str) -> InvocationArgs:
+    return _invocation_args.get().get(agent_name, _EMPTY_ARGS)
+
+
+def instruction_provider(render: Callable[..., str]) -> InstructionProvider:
+    """
+    render(ctx, **kwargs) 返回 instruction 模板，kwargs 来自 invocation_args；
+    与字符串 instruction 一致，渲染结果仍做 {state_key} 注入。
+    """
+
+    async def provider(ctx: ReadonlyContext) -> str:
+        args = get_invocation_args(ctx.agent_name)
+        return await inject_session_state(render(ctx, **args.kwargs), ctx)
+
+    return provider
+
+
+async def apply_invocation_output_schema(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    if output_schema := get_invocation_args(callback_context.agent_name).output_schema:
+        llm_request.set_output_schema(output_schema)
@@ -1,25 +1,31 @@
 import asyncio
-import base64
+import hashlib
 import logging
+import mimetypes
 import os
 import re
 import shutil
 import tarfile
+import tempfile
 import time
 import zipfile
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Union
 from urllib.parse import unquote
 
 import aiofiles
-import aiohttp
 import oss2
 from oss2.credentials import EnvironmentVariableCredentialsProvider
+from oss2.models import PartInfo
 
+from agents.matmaster_agent.config import OSS_UPLOAD_CONCURRENCY
 from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
 from agents.matmaster_agent.logger import PrefixFilter
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.utils.cache_utils import TTLCache
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -47,9 +53,9 @@ class ReportUploadResult:
 
 @asynccontextmanager
 async def temp_dir(path: str = './tmp'):
-    """异步上下文管理器创建/清理临时目录"""
-    temp_path = Path(path)
-    temp_path.mkdir(parents=True, exist_ok=True)
+    """异步上下文管理器创建/清理临时目录（在 path 下创建独立子目录，并发调用互不干扰）"""
+    Path(path).mkdir(parents=True, exist_ok=True)
+    temp_path = Path(tempfile.mkdtemp(dir=path))
     try:
         yield temp_path
     finally:
@@ -63,21 +69,20 @@ async def get_filename_from_url(url: str) -> str:
     2. fallback：从 URL 路径推断
     """
     FILENAME_RE = re.compile(r'filename\*?=(?:"?)([^";]+)')
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, allow_redirects=True) as resp:
-            cd = resp.headers.get('Content-Disposition')
-            if cd:
-                match = FILENAME_RE.search(cd)
-                if match:
-                    return unquote(match.group(1))
+    async with http_client.get(url, allow_redirects=True) as resp:
+        cd = resp.headers.get('Content-Disposition')
+        if cd:
+            match = FILENAME_RE.search(cd)
+            if match:
+                return unquote(match.group(1))
 
     return 'unknown'
 
 
 # Step1: download tgz -> unzip -> find jpg_files
-async def _download_file(session: aiohttp.ClientSession, url: str, dest: Path) -> None:
+async def _download_file(url: str, dest: Path) -> None:
     """异步下载文件"""
-    async with session.get(url) as response:
+    async with http_client.get(url) as response:
         response.raise_for_status()
         async with aiofiles.open(dest, 'wb') as f:
             async for chunk in response.content.iter_chunked(8192):
@@ -123,20 +128,17 @@ async def extract_files_from_compressed_file_url(
     compressed_file_url: str, temp_path: Path
 ) -> List[Path]:
     """使用指定临时目录处理文件"""
-    async with aiohttp.ClientSession() as session:
-        temp_compressed_file = (
-            'downloaded.tgz'
-            if compressed_file_url.endswith('.tgz')
-            else 'downloaded.zip'
-        )
-        compressed_path = temp_path / temp_compressed_file
+    temp_compressed_file = (
+        'downloaded.tgz' if compressed_file_url.endswith('.tgz') else 'downloaded.zip'
+    )
+    compressed_path = temp_path / temp_compressed_file
 
-        await _download_file(session, compressed_file_url, compressed_path)
-        await _extract_compressed_file(
-            compressed_path=compressed_path, extract_to=temp_path
-        )
+    await _download_file(compressed_file_url, compressed_path)
+    await _extract_compressed_file(
+        compressed_path=compressed_path, extract_to=temp_path
+    )
 
-        return await _find_all_files(temp_path)
+    return await _find_all_files(temp_path)
 
 
 async def read_file_bytes(file_path: Path) -> bytes:
@@ -145,55 +147,201 @@ async def read_file_bytes(file_path: Path) -> bytes:
         return await f.read()
 
 
-def bytes_to_base64(data: bytes) -> str:
-    """将字节数据转为 Base64 字符串"""
-    return base64.b64encode(data).decode('utf-8')
+@lru_cache(maxsize=1)
+def get_oss_bucket() -> oss2.Bucket:
+    """进程内复用同一个 Bucket（及其底层 HTTP 连接池）"""
+    auth = oss2.ProviderAuth(EnvironmentVariableCredentialsProvider())
+    return oss2.Bucket(auth, os.environ['OSS_ENDPOINT'], os.environ['OSS_BUCKET_NAME'])
 
 
-# Step2: jpg -> base64
-async def file_to_base64(file_path: Path) -> Tuple[Path, str]:
-    """组合调用：读取文件 + 转 Base64"""
-    content = await read_file_bytes(file_path)
-    return file_path, bytes_to_base64(content)
+def get_oss_url(oss_path: str) -> str:
+    return f"https://{os.environ['OSS_BUCKET_NAME']}.oss-cn-zhangjiakou.aliyuncs.com/{oss_path}"
 
 
-# Step3: Upload to OSS
-async def upload_to_oss_wrapper(
-    b64_data: str,
-    oss_path: str,
-    filename: str,
-    *,
-    with_download_headers: bool = False,
-) -> Dict[str, dict]:
-    def _sync_upload_base64_to_oss(data: str, oss_path: str) -> str:
-        try:
-            auth = oss2.ProviderAuth(EnvironmentVariableCredentialsProvider())
-            endpoint = os.environ['OSS_ENDPOINT']
-            bucket_name = os.environ['OSS_BUCKET_NAME']
-            bucket = oss2.Bucket(auth, endpoint, bucket_name)
-            headers = None
-            if with_download_headers:
-                headers = {
-                    'Content-Disposition': f'attachment; filename="{filename}"',
-                    'Content-Type': 'text/markdown',
-                }
-            bucket.put_object(oss_path, base64.b64decode(data), headers=headers)
-            return f"https://{bucket_name}.oss-cn-zhangjiakou.aliyuncs.com/{oss_path}"
-        except Exception as e:
-            return str(e)
+OSS_PART_SIZE = 8 * 1024 * 1024  # 分片大小，OSS 要求除最后一片外不小于 100KB
+OSS_MULTIPART_THRESHOLD = 32 * 1024 * 1024  # 超过该大小的本地文件走断点续传分片上传
+OSS_RESUMABLE_DIR = os.path.join(tempfile.gettempdir(), 'matmaster_oss_checkpoints')
 
-    async def upload_base64_to_oss(data: str, oss_path: str) -> dict:
-        return await asyncio.to_thread(_sync_upload_base64_to_oss, data, oss_path)
+OSS_COPY_MAX_SIZE = 1024 * 1024 * 1024  # CopyObject 支持的最大对象大小
 
-    """上传包装器，保留原始文件名信息"""
-    result = await upload_base64_to_oss(b64_data, oss_path)
+_upload_semaphore = asyncio.Semaphore(OSS_UPLOAD_CONCURRENCY)
+# 内容 sha256 -> (已上传的 oss_path, headers)。oss_path 通常带时间戳与用户/会话前缀，
+# 相同内容上传到新路径时在 OSS 服务端 copy 到目标路径，不重复传输数据，
+# 也不会把其它路径（文件名、Content-Disposition 或其它用户的前缀）的 URL 返回给调用方
+_uploaded = TTLCache(maxsize=4096, ttl=24 * 3600)
 
-    return {filename: result}
+
+async def upload_stream_to_oss(
+    chunks: AsyncIterator[bytes], oss_path: str, headers: Optional[dict] = None
+) -> int:
+    """
+    将异步字节流直接上传到 OSS，返回上传的字节数。
+    数据不落盘、不做 base64；不足一个分片时使用 put_object，否则走分片上传，
+    且上一个分片上传的同时继续读取下一个分片。
+    """
+    bucket = get_oss_bucket()
+    buffer = bytearray()
+    total = 0
+    upload_id = None
+    parts: List[PartInfo] = []
+    uploading: Optional[asyncio.Task] = None
+
+    async def upload_part(part_number: int, data: bytes) -> PartInfo:
+        result = await asyncio.to_thread(
+            bucket.upload_part, oss_path, upload_id, part_number, data
+        )
+        return PartInfo(part_number, result.etag)
+
+    async def flush():
+        nonlocal upload_id, uploading
+        if upload_id is None:
+            upload_id = (
+                await asyncio.to_thread(
+                    bucket.init_multipart_upload, oss_path, headers=headers
+                )
+            ).upload_id
+        if uploading is not None:
+            parts.append(await uploading)
+        uploading = asyncio.create_task(upload_part(len(parts) + 1, bytes(buffer)))
+        buffer.clear()
+
+    try:
+        async for chunk in chunks:
+            buffer += chunk
+            total += len(chunk)
+            if len(buffer) >= OSS_PART_SIZE:
+                await flush()
+
+        if upload_id is None:
+            await asyncio.to_thread(
+                bucket.put_object, oss_path, bytes(buffer), headers=headers
+            )
+            return total
+
+        if buffer:
+            await flush()
+        parts.append(await uploading)
+        await asyncio.to_thread(
+            bucket.complete_multipart_upload, oss_path, upload_id, parts
+        )
+        return total
+    except BaseException:
+        if uploading is not None:
+            uploading.cancel()
+        if upload_id is not None:
+            await asyncio.to_thread(bucket.abort_multipart_upload, oss_path, upload_id)
+        raise
+
+
+def _sha256_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_headers(oss_path: str, headers: Optional[dict]) -> dict:
+    """copy 时替换为本次上传的元数据，而不是沿用源对象的 Content-Type/Content-Disposition"""
+    copy_headers = {'x-oss-metadata-directive': 'REPLACE'}
+    if not any(key.lower() == 'content-type' for key in headers or {}):
+        copy_headers['Content-Type'] = (
+            mimetypes.guess_type(oss_path)[0] or 'application/octet-stream'
+        )
+    return {**copy_headers, **(headers or {})}
+
+
+async def _reuse_uploaded(
+    digest: str, size: int, oss_path: str, headers: Optional[dict]
+) -> bool:
+    """相同内容已上传过时，把已有对象 copy 到 oss_path；返回是否不再需要上传"""
+    uploaded = _uploaded.get(digest)
+    if uploaded is None:
+        return False
+    source_path, source_headers = uploaded
+    if source_path == oss_path and source_headers == (headers or None):
+        logger.info(f"{oss_path} dedup hit, already uploaded")
+        return True
+    if size > OSS_COPY_MAX_SIZE:
+        return False
+
+    bucket = get_oss_bucket()
+    try:
+        await asyncio.to_thread(
+            bucket.copy_object,
+            bucket.bucket_name,
+            source_path,
+            oss_path,
+            headers=_copy_headers(oss_path, headers),
+        )
+    except oss2.exceptions.OssError as err:
+        # 源对象可能已被生命周期规则删除，回退为正常上传
+        logger.warning(f"{oss_path} copy from {source_path} failed: {err!r}")
+        _uploaded.pop(digest)
+        return False
+    logger.info(f"{oss_path} dedup hit, copied from {source_path}")
+    return True
+
+
+def _sync_upload_file(file_path: Path, oss_path: str, headers: Optional[dict]):
+    bucket = get_oss_bucket()
+    if file_path.stat().st_size < OSS_MULTIPART_THRESHOLD:
+        bucket.put_object_from_file(oss_path, str(file_path), headers=headers)
+        return
+    oss2.resumable_upload(
+        bucket,
+        oss_path,
+        str(file_path),
+        store=oss2.ResumableStore(root=OSS_RESUMABLE_DIR),
+        headers=headers,
+        multipart_threshold=OSS_MULTIPART_THRESHOLD,
+        part_size=OSS_PART_SIZE,
+        num_threads=4,
+    )
+
+
+async def upload_to_oss(
+    data: Union[Path, bytes, AsyncIterator[bytes]],
+    oss_path: str,
+    *,
+    headers: Optional[dict] = None,
+) -> str:
+    """
+    上传本地文件、内存字节或异步字节流到 OSS，返回文件 URL。
+    - 本地文件：小文件直接上传，大文件走断点续传分片上传
+    - 字节流：边读边分片上传
+    - 文件/字节按内容哈希去重：相同内容上传到新路径时在服务端 copy，不重复传输数据
+    进程内并发上传数受 OSS_UPLOAD_CONCURRENCY 限制。
+    """
+    if isinstance(data, (Path, bytes)):
+        if isinstance(data, Path):
+            digest = await asyncio.to_thread(_sha256_file, data)
+            size = data.stat().st_size
+        else:
+            digest = hashlib.sha256(data).hexdigest()
+            size = len(data)
+        if await _reuse_uploaded(digest, size, oss_path, headers):
+            return get_oss_url(oss_path)
+    else:
+        digest = None
+
+    async with _upload_semaphore:
+        if isinstance(data, Path):
+            await asyncio.to_thread(_sync_upload_file, data, oss_path, headers)
+        elif isinstance(data, bytes):
+            await asyncio.to_thread(
+                get_oss_bucket().put_object, oss_path, data, headers=headers
+            )
+        else:
+            await upload_stream_to_oss(data, oss_path, headers=headers)
+
+    if digest is not None:
+        _uploaded.set(digest, (oss_path, dict(headers) if headers else None))
+    return get_oss_url(oss_path)
 
 
 async def upload_report_md_to_oss(
     params: ReportUploadParams,
-    temp_dir_path: str = './tmp',
 ) -> Optional[ReportUploadResult]:
     """Upload markdown report content to OSS and return its URL."""
 
@@ -201,49 +349,49 @@ async def upload_report_md_to_oss(
     if not report_markdown:
         return None
 
-    async with temp_dir(temp_dir_path) as tdir:
-        filename = f'matmaster_report_{params.invocation_id}.md'
-        md_file_path = tdir / filename
-        md_file_path.write_text(report_markdown, encoding='utf-8')
-
-        _, b64_data = await file_to_base64(md_file_path)
-        oss_path = f"agent/{int(time.time())}_{filename}"
-        oss_result = await upload_to_oss_wrapper(
-            b64_data, oss_path, filename, with_download_headers=True
-        )
-        oss_url = list(oss_result.values())[0]
-        return ReportUploadResult(
-            oss_url=oss_url,
-            oss_path=oss_path,
-            filename=filename,
+    filename = f'matmaster_report_{params.invocation_id}.md'
+    oss_path = f"agent/{int(time.time())}_{filename}"
+    try:
+        oss_url = await upload_to_oss(
+            report_markdown.encode('utf-8'),
+            oss_path,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Content-Type': 'text/markdown',
+            },
         )
+    except Exception as e:
+        logger.exception(f"{params.session_id} upload report failed")
+        oss_url = str(e)
+    return ReportUploadResult(
+        oss_url=oss_url,
+        oss_path=oss_path,
+        filename=filename,
+    )
 
 
 async def extract_convert_and_upload(
     compressed_url: str, temp_dir_path: str = './tmp', session_id: str = ''
 ) -> dict:
     """
-    下载 TGZ → 解压 → JPG 转 Base64 → 上传 OSS → 自动清理
+    下载 TGZ → 解压 → 直接按文件上传 OSS → 自动清理
     """
+
+    async def upload(file_path: Path):
+        try:
+            return await upload_to_oss(
+                file_path, f"agent/{int(time.time())}_{file_path.name}"
+            )
+        except Exception as e:
+            logger.exception(f"{session_id} upload {file_path.name} failed")
+            return str(e)
+
     async with temp_dir(temp_dir_path) as temp_path:
-        # 获取所有JPG文件的Base64编码
         logger.info(f"{session_id} compressed_url = {compressed_url}")
         files = await extract_files_from_compressed_file_url(compressed_url, temp_path)
-        conversion_tasks = [file_to_base64(file) for file in files]
-        base64_results = await asyncio.gather(*conversion_tasks)
-
-        # 准备上传任务
-        upload_tasks = []
-        for file_path, b64_data in base64_results:
-            filename = file_path.name
-            oss_path = f"agent/{int(time.time())}_{filename}"
-            upload_tasks.append(upload_to_oss_wrapper(b64_data, oss_path, filename))
+        urls = await asyncio.gather(*(upload(file) for file in files))
 
-        return {
-            filename: result
-            for item in await asyncio.gather(*upload_tasks)
-            for filename, result in item.items()
-        }
+        return {file.name: url for file, url in zip(files, urls)}
 
 
 async def update_tgz_dict(tool_result: dict, session_id: str = ''):
@@ -265,8 +413,7 @@ async def extract_file_content(file_url: str, temp_dir_path: str = './tmp') -> d
         file_name = await get_filename_from_url(file_url)
         temp_file_path = tdir / file_name
 
-        async with aiohttp.ClientSession() as session:
-            await _download_file(session, file_url, temp_file_path)
+        await _download_file(file_url, temp_file_path)
 
         content = await read_file_bytes(temp_file_path)
         return {'file_content': content}
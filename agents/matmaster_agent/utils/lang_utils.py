@@ -0,0 +1,65 @@
+import re
+from typing import Optional
+
+# 与 get_user_content_lang 的候选标签保持一致
+CHINESE = 'Chinese'
+ENGLISH = 'English'
+JAPANESE = 'Japanese'
+KOREAN = 'Korean'
+RUSSIAN = 'Russian'
+ARABIC = 'Arabic'
+
+ZH_LANGUAGES = [CHINESE, 'zh-CN', '简体中文', 'Chinese (Simplified)']
+
+_URL_RE = re.compile(r'(https?://|www\.)\S+', re.IGNORECASE)
+_HAN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+_KANA_RE = re.compile(r'[぀-ヿ]')
+_HANGUL_RE = re.compile(r'[가-힯ᄀ-ᇿ]')
+_CYRILLIC_RE = re.compile(r'[Ѐ-ӿ]')
+_ARABIC_RE = re.compile(r'[؀-ۿ]')
+_LATIN_WORD_RE = re.compile(r'[A-Za-zÀ-ɏ]{2,}')
+
+_ENGLISH_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'by', 'can', 'do', 'for', 'from', 'help', 'how',
+    'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'please', 'the', 'this',
+    'to', 'use', 'what', 'with', 'you',
+}  # fmt: skip
+
+
+def detect_language(text: Optional[str]) -> Optional[str]:
+    """
+    按字符集判断用户输入的主要语言，无法明确判断时返回 None（交给 LLM 兜底）。
+    材料领域的输入常夹带化学式、URL、工具名等拉丁字符，因此汉字按“字”、拉丁按“词”比较。
+    """
+    if not text:
+        return None
+    text = _URL_RE.sub(' ', text)
+
+    if len(_KANA_RE.findall(text)) >= 2:
+        return JAPANESE
+    if len(_HANGUL_RE.findall(text)) >= 2:
+        return KOREAN
+
+    han_count = len(_HAN_RE.findall(text))
+    latin_words = _LATIN_WORD_RE.findall(text)
+    others = {
+        RUSSIAN: len(_CYRILLIC_RE.findall(text)),
+        ARABIC: len(_ARABIC_RE.findall(text)),
+    }
+
+    if han_count and han_count >= 2 * len(latin_words):
+        return CHINESE
+    if not han_count and latin_words:
+        if any(others.values()):
+            return None
+        lower_words = {w.lower() for w in latin_words}
+        if lower_words & _ENGLISH_STOPWORDS:
+            return ENGLISH
+        # 无英文功能词：可能只是化学式/工具名，或西/法/德等语言
+        return None
+    if not han_count and not latin_words:
+        script, count = max(others.items(), key=lambda item: item[1])
+        return script if count >= 2 else None
+
+    # 中英混合且没有明显主导
+    return None
@@ -3,7 +3,6 @@ import io
 import logging
 from typing import List, Union
 
-import aiohttp
 from pydantic import BaseModel
 
 from agents.matmaster_agent.constant import JOB_RESULT_KEY, MATMASTER_AGENT_NAME
@@ -16,7 +15,8 @@ from agents.matmaster_agent.model import (
     RenderTypeEnum,
     WebSearchItem,
 )
-from agents.matmaster_agent.services.session_files import insert_session_files
+from agents.matmaster_agent.services.http_client import http_client
+from agents.matmaster_agent.services.session_files import session_file_writer
 
 logger = logging.getLogger(__name__)
 logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
@@ -158,6 +158,7 @@ async def parse_result(
         >>> ]
     """
     parsed_result = []
+    session_files = []
     new_result = {}
     for k, v in result.items():
         if type(v) is dict:
@@ -180,8 +181,7 @@ async def parse_result(
                     ).model_dump(mode='json')
                 )
             elif v.startswith('http'):
-                # 写入数据库
-                await insert_session_files(session_id=ctx.session.id, files=[v])
+                session_files.append(v)
 
                 # 按文件类型解析
                 filename = v.split('/')[-1]
@@ -255,6 +255,10 @@ async def parse_result(
                     'msg': f"{k}({type(v)}) is not supported parse, v={v}",
                 }
             )
+
+    # 写入数据库（后台批量写入，不阻塞结果解析）
+    session_file_writer.add(ctx.session.id, session_files)
+    session_file_writer.flush(ctx.session.id)
     return parsed_result
 
 
@@ -367,21 +371,20 @@ async def csv_to_markdown_table(csv_url, title=None):
     """
     MAX_SIZE_BYTES = 1 * 1024 * 1024  # 1M
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(csv_url) as resp:
-            resp.raise_for_status()
+    async with http_client.get(csv_url) as resp:
+        resp.raise_for_status()
 
-            # 检查 Content-Length 头部
-            content_length = resp.content_length
+        # 检查 Content-Length 头部
+        content_length = resp.content_length
 
-            # 如果有 Content-Length 且超过限制，直接返回空字符串
-            if content_length and content_length > MAX_SIZE_BYTES:
-                logger.warning(
-                    f"CSV 文件过大: {content_length} 字节 > {MAX_SIZE_BYTES} 字节"
-                )
-                return ''
+        # 如果有 Content-Length 且超过限制，直接返回空字符串
+        if content_length and content_length > MAX_SIZE_BYTES:
+            logger.warning(
+                f"CSV 文件过大: {content_length} 字节 > {MAX_SIZE_BYTES} 字节"
+            )
+            return ''
 
-            content = await resp.text()
+        content = await resp.text()
 
     # 解析 CSV
     reader = csv.reader(io.StringIO(content))
@@ -0,0 +1,115 @@
+"""
+plan / long_running_jobs 的写时复制（copy-on-write）更新。
+
+session.state 中的 plan、long_running_jobs 视为不可变值：更新时只复制从根到被修改节点的路径，
+其余步骤/任务与旧值共享，单次状态变更的开销与被修改的步骤大小相关，而与整个计划大小无关。
+因此任何代码都不能原地修改 state 中的这两个值，只能通过这里的函数生成新值再写入 state_delta。
+"""
+
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from agents.matmaster_agent.state import ERROR_DETAIL, ERROR_OCCURRED, RECOMMEND_PARAMS
+
+_MISSING = object()
+
+# 步骤执行过程中的中间状态：每个步骤各自读写，并发步骤之间不能共享
+STEP_SCOPED_KEYS = frozenset(
+    {
+        'tool_call_info',
+        RECOMMEND_PARAMS,
+        'tool_hallucination',
+        'step_title',
+        'separate_card_info',
+        'tools_count',
+        'tools_count_ori',
+        'long_running_jobs_count',
+        'long_running_jobs_count_ori',
+        ERROR_OCCURRED,
+        ERROR_DETAIL,
+        'step_validation',
+    }
+)
+
+# 并发执行步骤时，每个步骤在自己的 task 中运行，当前步骤下标以此为准（state['plan_index'] 只记录最后启动的步骤）
+current_plan_index: ContextVar[Optional[int]] = ContextVar(
+    'current_plan_index', default=None
+)
+
+
+def get_plan_index(state) -> int:
+    index = current_plan_index.get()
+    return state['plan_index'] if index is None else index
+
+
+def step_state_key(key: str) -> str:
+    """当前步骤私有的 state key（按步骤下标区分）；不在计划步骤中执行或 key 无需区分时返回原 key"""
+    index = current_plan_index.get()
+    if index is None or key not in STEP_SCOPED_KEYS:
+        return key
+    return f'{key}_step_{index + 1}'
+
+
+def clear_step_state(state) -> dict:
+    """计划结束后清理各步骤私有的 state；state_delta 无法删除 key，只能置为 None"""
+    state_delta = {}
+    for key, value in state.items():
+        scoped_key, _, step = key.rpartition('_step_')
+        if value is not None and scoped_key in STEP_SCOPED_KEYS and step.isdigit():
+            state_delta[key] = None
+    return state_delta
+
+
+def update_plan_step(plan: dict, index: int, **changes) -> dict:
+    """返回第 index 步合并 changes 后的新 plan"""
+    steps = list(plan['steps'])
+    steps[index] = {**steps[index], **changes}
+    return {**plan, 'steps': steps}
+
+
+def update_plan_steps(plan: dict, field: str, values: Iterable) -> dict:
+    """按顺序把 values 写入各步骤的 field（values 较短时只更新前若干步）"""
+    steps = list(plan['steps'])
+    for index, value in zip(range(len(steps)), values):
+        steps[index] = {**steps[index], field: value}
+    return {**plan, 'steps': steps}
+
+
+def update_job(long_running_jobs: dict, job_id: str, **changes) -> dict:
+    """返回 job_id 合并 changes 后的新 long_running_jobs"""
+    return {**long_running_jobs, job_id: {**long_running_jobs[job_id], **changes}}
+
+
+def set_job(long_running_jobs: dict, job_id: str, job: dict) -> dict:
+    return {**long_running_jobs, job_id: job}
+
+
+def rebase_state_value(base, ours, theirs):
+    """
+    三方合并：ours 是基于 base 计算出的新值，theirs 是其间已被其它步骤写入的值。
+    依赖写时复制保证未修改的节点与 base 是同一对象，只把 ours 相对 base 的改动叠加到 theirs 上；
+    双方改动同一叶子节点时以 ours 为准。
+    """
+    if ours is base:
+        return theirs
+    if theirs is base:
+        return ours
+    if isinstance(ours, dict) and isinstance(base, dict) and isinstance(theirs, dict):
+        merged = dict(theirs)
+        for key, value in ours.items():
+            value = rebase_state_value(
+                base.get(key, _MISSING), value, theirs.get(key, _MISSING)
+            )
+            if value is _MISSING:
+                merged.pop(key, None)  # 其它步骤已删除、本步骤未修改
+            else:
+                merged[key] = value
+        return merged
+    if (
+        isinstance(ours, list)
+        and isinstance(base, list)
+        and isinstance(theirs, list)
+        and len(ours) == len(base) == len(theirs)
+    ):
+        return [rebase_state_value(*values) for values in zip(base, ours, theirs)]
+    return ours
@@ -0,0 +1,348 @@
+"""
+常见结构文件（CIF / POSCAR / XYZ）的本地解析，输出与 info_by_str 接口 data 字段相同的结构，
+用于在不访问网络的情况下获取化学式、原子数与晶胞。
+
+只处理能确定解析正确的情况：带部分占位的 CIF、缺少对称操作的非 P1 CIF、
+不带晶胞的普通 XYZ 等返回 None，由调用方回退到远程接口。
+"""
+
+import logging
+import math
+import re
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+# 对称操作生成的等价位点，笛卡尔距离小于该值（Å）视为同一位点
+SITE_MERGE_TOLERANCE = 0.05
+
+_ELEMENT_RE = re.compile(r'[A-Z][a-z]?')
+_UNCERTAINTY_RE = re.compile(r'\(\d+\)$')
+_CIF_TOKEN_RE = re.compile(r"'[^']*'|\"[^\"]*\"|\S+")
+_XYZ_LATTICE_RE = re.compile(r'Lattice="([^"]+)"', re.I)
+
+
+def _element(symbol: str) -> str:
+    """'Cu1' / 'Cu2+' / 'Cu_pv' -> 'Cu'"""
+    symbol = symbol.strip()
+    match = _ELEMENT_RE.match(symbol[:1].upper() + symbol[1:])
+    if not match:
+        raise ValueError(f'invalid element symbol: {symbol}')
+    return match.group()
+
+
+def _structure_data(
+    symbols: List[str], frac_coords: np.ndarray, lattice: np.ndarray
+) -> dict:
+    cart_coords = frac_coords @ lattice
+    element_count: Dict[str, int] = {}
+    for symbol in symbols:
+        element_count[symbol] = element_count.get(symbol, 0) + 1
+
+    lengths = np.linalg.norm(lattice, axis=1)
+    angles = [
+        math.degrees(
+            math.acos(
+                np.clip(
+                    np.dot(lattice[j], lattice[k]) / (lengths[j] * lengths[k]), -1, 1
+                )
+            )
+        )
+        for j, k in ((1, 2), (0, 2), (0, 1))
+    ]
+    return {
+        'formula': ''.join(
+            f'{element}{count if count > 1 else ""}'
+            for element, count in element_count.items()
+        ),
+        'elements': list(element_count),
+        'elementCount': element_count,
+        'atomCount': len(symbols),
+        'length': lengths.tolist(),
+        'angle': angles,
+        'matrix': lattice.tolist(),
+        'volume': float(abs(np.linalg.det(lattice))),
+        'atoms': [
+            {'formula': symbol, 'frac_coord': frac, 'cart_coord': cart}
+            for symbol, frac, cart in zip(
+                symbols, frac_coords.tolist(), cart_coords.tolist()
+            )
+        ],
+    }
+
+
+def _cif_float(value: str) -> float:
+    return float(_UNCERTAINTY_RE.sub('', value))
+
+
+def _cif_tokens(content: str) -> List[str]:
+    tokens: List[str] = []
+    lines = iter(content.splitlines())
+    for line in lines:
+        if line.startswith(';'):
+            # 多行文本字段作为一个 token
+            text = [line[1:]]
+            for text_line in lines:
+                if text_line.startswith(';'):
+                    break
+                text.append(text_line)
+            tokens.append('\n'.join(text))
+            continue
+        for token in _CIF_TOKEN_RE.findall(line):
+            if token.startswith('#'):
+                break
+            if token[0] in '\'"':
+                token = token[1:-1]
+            tokens.append(token)
+    return tokens
+
+
+def _cif_block(content: str) -> tuple[Dict[str, str], Dict[str, List[str]]]:
+    """第一个 data_ 块中的单值标签与 loop 列（标签均为小写）"""
+    items: Dict[str, str] = {}
+    columns: Dict[str, List[str]] = {}
+    tokens = _cif_tokens(content)
+    pos, n_tokens = 0, len(tokens)
+    seen_block = False
+    while pos < n_tokens:
+        token = tokens[pos]
+        lowered = token.lower()
+        if lowered.startswith('data_'):
+            if seen_block:
+                break
+            seen_block = True
+            pos += 1
+        elif lowered == 'loop_':
+            pos += 1
+            tags = []
+            while pos < n_tokens and tokens[pos].startswith('_'):
+                tags.append(tokens[pos].lower())
+                pos += 1
+            values = []
+            while pos < n_tokens and not (
+                tokens[pos].startswith('_')
+                or tokens[pos].lower() == 'loop_'
+                or tokens[pos].lower().startswith('data_')
+            ):
+                values.append(tokens[pos])
+                pos += 1
+            for offset, tag in enumerate(tags):
+                columns[tag] = values[offset :: len(tags)]
+        elif token.startswith('_') and pos + 1 < n_tokens:
+            items[lowered] = tokens[pos + 1]
+            pos += 2
+        else:
+            pos += 1
+    return items, columns
+
+
+def _parse_symop(operation: str) -> tuple[np.ndarray, np.ndarray]:
+    """'-x+1/2, y, z' -> (旋转矩阵, 平移)"""
+    rotation = np.zeros((3, 3))
+    translation = np.zeros(3)
+    components = operation.lower().replace(' ', '').split(',')
+    if len(components) != 3:
+        raise ValueError(f'invalid symmetry operation: {operation}')
+    for row, component in enumerate(components):
+        for term in re.findall(r'[+-]?[^+-]+', component):
+            sign = -1 if term.startswith('-') else 1
+            body = term.lstrip('+-')
+            if body[-1] in 'xyz':
+                coefficient = body[:-1].rstrip('*')
+                rotation[row, 'xyz'.index(body[-1])] += sign * float(
+                    Fraction(coefficient) if coefficient else 1
+                )
+            else:
+                translation[row] += sign * float(Fraction(body))
+    return rotation, translation
+
+
+def _cell_matrix(a, b, c, alpha, beta, gamma) -> np.ndarray:
+    """晶胞参数 -> 晶格矩阵（a 沿 x 轴，b 在 xy 平面内）"""
+    cos_alpha, cos_beta, cos_gamma = (
+        math.cos(math.radians(angle)) for angle in (alpha, beta, gamma)
+    )
+    sin_gamma = math.sin(math.radians(gamma))
+    cy = (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+    cz = math.sqrt(1 - cos_beta**2 - cy**2)
+    return np.array(
+        [
+            [a, 0.0, 0.0],
+            [b * cos_gamma, b * sin_gamma, 0.0],
+            [c * cos_beta, c * cy, c * cz],
+        ]
+    )
+
+
+def _merge_sites(
+    symbols: List[str], frac_coords: np.ndarray, lattice: np.ndarray
+) -> tuple[List[str], np.ndarray]:
+    """去掉对称操作生成的重复位点（考虑周期性）"""
+    kept_symbols: List[str] = []
+    kept: List[np.ndarray] = []
+    for symbol, frac in zip(symbols, frac_coords):
+        if kept:
+            delta = np.asarray(kept) - frac
+            delta -= np.round(delta)
+            if (np.linalg.norm(delta @ lattice, axis=1) < SITE_MERGE_TOLERANCE).any():
+                continue
+        kept_symbols.append(symbol)
+        kept.append(frac)
+    return kept_symbols, np.asarray(kept)
+
+
+def parse_cif(content: str) -> Optional[dict]:
+    items, columns = _cif_block(content)
+    lattice = _cell_matrix(
+        *(
+            _cif_float(items[f'_cell_{name}'])
+            for name in (
+                'length_a',
+                'length_b',
+                'length_c',
+                'angle_alpha',
+                'angle_beta',
+                'angle_gamma',
+            )
+        )
+    )
+
+    if any(_cif_float(value) < 1 for value in columns.get('_atom_site_occupancy', [])):
+        return None  # 无序结构需要接口按占位处理
+    labels = columns.get('_atom_site_type_symbol') or columns.get('_atom_site_label')
+    if not labels:
+        return None
+    if '_atom_site_fract_x' in columns:
+        frac_coords = np.array(
+            [
+                [_cif_float(value) for value in columns[f'_atom_site_fract_{axis}']]
+                for axis in 'xyz'
+            ]
+        ).T
+    elif '_atom_site_cartn_x' in columns:
+        cart_coords = np.array(
+            [
+                [_cif_float(value) for value in columns[f'_atom_site_cartn_{axis}']]
+                for axis in 'xyz'
+            ]
+        ).T
+        frac_coords = cart_coords @ np.linalg.inv(lattice)
+    else:
+        return None
+
+    operations = columns.get('_space_group_symop_operation_xyz') or columns.get(
+        '_symmetry_equiv_pos_as_xyz'
+    )
+    if not operations:
+        space_group = items.get('_symmetry_space_group_name_h-m') or items.get(
+            '_space_group_name_h-m_alt', 'P1'
+        )
+        if space_group.replace(' ', '').upper() not in ('P1', '?', '.'):
+            return None
+        operations = ['x,y,z']
+
+    symbols = [_element(label) for label in labels]
+    all_symbols: List[str] = []
+    all_coords: List[np.ndarray] = []
+    # 按位点展开，保持与文件中位点顺序一致
+    symops = [_parse_symop(operation) for operation in operations]
+    for symbol, frac in zip(symbols, frac_coords):
+        for rotation, translation in symops:
+            all_symbols.append(symbol)
+            all_coords.append(rotation @ frac + translation)
+    all_coords = np.asarray(all_coords)
+    all_coords -= np.floor(all_coords)
+    symbols, frac_coords = _merge_sites(all_symbols, all_coords, lattice)
+    return _structure_data(symbols, frac_coords, lattice)
+
+
+def parse_poscar(content: str) -> Optional[dict]:
+    lines = content.splitlines()
+    scale = float(lines[1].split()[0])
+    lattice = np.array([[float(x) for x in lines[i].split()[:3]] for i in range(2, 5)])
+    if scale < 0:
+        # 负数表示晶胞体积
+        scale = (-scale / abs(np.linalg.det(lattice))) ** (1 / 3)
+    lattice *= scale
+
+    index = 5
+    tokens = lines[index].split()
+    if tokens[0].lstrip('+-').isdigit():
+        # VASP 4 格式没有元素行，沿用注释行中的元素
+        species = lines[0].split()
+    else:
+        species = tokens
+        index += 1
+    counts = [int(x) for x in lines[index].split()]
+    if len(species) < len(counts):
+        return None
+    index += 1
+    if lines[index].strip()[:1] in 'sS':
+        index += 1  # Selective dynamics
+    cartesian = lines[index].strip()[:1] in 'cCkK'
+    index += 1
+
+    n_atoms = sum(counts)
+    coords = np.array(
+        [
+            [float(x) for x in line.split()[:3]]
+            for line in lines[index : index + n_atoms]
+        ]
+    )
+    if len(coords) != n_atoms:
+        return None
+    frac_coords = coords * scale @ np.linalg.inv(lattice) if cartesian else coords
+    symbols = [
+        _element(symbol) for symbol, count in zip(species, counts) for _ in range(count)
+    ]
+    return _structure_data(symbols, frac_coords, lattice)
+
+
+def parse_xyz(content: str) -> Optional[dict]:
+    lines = content.splitlines()
+    n_atoms = int(lines[0].split()[0])
+    # 普通 XYZ 不含晶胞，只处理带 Lattice 的 extended XYZ
+    match = _XYZ_LATTICE_RE.search(lines[1])
+    if not match:
+        return None
+    lattice = np.array([float(x) for x in match.group(1).split()]).reshape(3, 3)
+
+    rows = [line.split() for line in lines[2 : 2 + n_atoms]]
+    if len(rows) != n_atoms:
+        return None
+    symbols = [_element(row[0]) for row in rows]
+    cart_coords = np.array([[float(x) for x in row[1:4]] for row in rows])
+    return _structure_data(symbols, cart_coords @ np.linalg.inv(lattice), lattice)
+
+
+STRUCTURE_PARSERS = {
+    'cif': parse_cif,
+    'poscar': parse_poscar,
+    'vasp': parse_poscar,
+    'contcar': parse_poscar,
+    'xyz': parse_xyz,
+    'extxyz': parse_xyz,
+}
+
+
+def parse_structure(content: str, format: str) -> Optional[dict]:
+    """本地解析结构文件，不支持的格式或解析失败时返回 None"""
+    parser = STRUCTURE_PARSERS.get((format or '').lower())
+    if parser is None or not content:
+        return None
+    try:
+        data = parser(content)
+    except Exception as err:
+        logger.info(f'local {format} parse failed, fallback to remote: {err!r}')
+        return None
+    if data is None or not data['atomCount'] or data['volume'] < 1e-8:
+        return None
+    return data
@@ -0,0 +1,105 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+
+import tiktoken
+from google.genai.types import Content, Part
+
+from agents.matmaster_agent.config import MAX_PART_BYTES
+from agents.matmaster_agent.constant import MATMASTER_AGENT_NAME
+from agents.matmaster_agent.logger import PrefixFilter
+
+logger = logging.getLogger(__name__)
+logger.addFilter(PrefixFilter(MATMASTER_AGENT_NAME))
+logger.setLevel(logging.INFO)
+
+TOKEN_CACHE_SIZE = 8192
+TRUNCATED_SUFFIX = '\n...[truncated: tool response too large]'
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    """进程内只加载一次编码器"""
+    return tiktoken.encoding_for_model('gpt-4')
+
+
+class _TokenCache:
+    """按内容摘要缓存 token 数；ADK 每次构造请求都会 deepcopy 事件内容，无法按对象复用"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[bytes, int] = OrderedDict()
+
+    def count(self, text: str, raw: bytes) -> int:
+        key = hashlib.blake2b(raw, digest_size=16).digest()
+        tokens = self._data.get(key)
+        if tokens is not None:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return tokens
+
+        self.misses += 1
+        tokens = len(get_encoding().encode(text))
+        self._data[key] = tokens
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return tokens
+
+
+_token_cache = _TokenCache(TOKEN_CACHE_SIZE)
+
+
+def _part_payload(part: Part) -> str:
+    if part.text:
+        return part.text
+    elif part.function_call:
+        return str(part.function_call.args)
+    elif part.function_response:
+        return str(part.function_response.response)
+    return ''
+
+
+def _truncate_part(part: Part, payload: str, raw: bytes) -> tuple[str, bytes]:
+    """超大的工具返回在分词前截断（按字节，先于 tiktoken）"""
+    if len(raw) <= MAX_PART_BYTES or not part.function_response:
+        return payload, raw
+
+    payload = (
+        raw[: MAX_PART_BYTES - len(TRUNCATED_SUFFIX)].decode('utf-8', errors='ignore')
+        + TRUNCATED_SUFFIX
+    )
+    logger.warning(
+        f'{part.function_response.name} response truncated, {len(raw)} -> {MAX_PART_BYTES} bytes'
+    )
+    part.function_response.response = {'result': payload}
+    return payload, payload.encode('utf-8')
+
+
+def prepare_content(content: Content) -> list[tuple[str, bytes]]:
+    """返回 content 中每个 part 的文本与 utf-8 字节，必要时截断工具返回"""
+    payloads = []
+    for part in content.parts or []:
+        payload = _part_payload(part)
+        raw = payload.encode('utf-8')
+        payloads.append(_truncate_part(part, payload, raw))
+    return payloads
+
+
+def count_payload_tokens(payloads: list[tuple[str, bytes]]) -> int:
+    return sum(_token_cache.count(text, raw) for text, raw in payloads if raw)
+
+
+def payload_bytes(payloads: list[tuple[str, bytes]]) -> int:
+    # gpt-4 编码下每个 token 至少对应 1 个字节，字节数即 token 数上界
+    return sum(len(raw) for _, raw in payloads)
+
+
+def token_cache_stats() -> dict:
+    return {
+        'hits': _token_cache.hits,
+        'misses': _token_cache.misses,
+        'size': len(_token_cache._data),
+    }
@@ -0,0 +1,108 @@
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Type
+
+# 明确的立即转移表述（中英文），需与目标 agent 出现在同一句中
+_TRANSFER_PHRASE_RE = re.compile(
+    r'transfer(?:ring)?\s+(?:you\s+|the\s+\w+\s+|it\s+)?to'
+    r'|connect(?:ing)?\s+you\s+(?:with|to)'
+    r'|redirect(?:ing)?\s+(?:you\s+)?to'
+    r'|hand(?:ing)?\s+(?:it\s+|you\s+)?over\s+to'
+    r'|switching\s+to'
+    r'|i\s+will\s+now\s+use'
+    r'|now\s+using'
+    r'|activating'
+    r'|正在转移|转移到|转交给|移交给|切换到|正在使用|正在调用',
+    re.IGNORECASE,
+)
+# 需要用户确认后才继续的表述（此时不是立即转移）
+_CONFIRM_PHRASE_RE = re.compile(
+    r'shall\s+i|should\s+i|do\s+you\s+want|would\s+you\s+like|please\s+confirm'
+    r'|是否|请确认|确认后|需要我',
+    re.IGNORECASE,
+)
+_JSON_AGENT_RE = re.compile(r'\{\s*"agent_name"\s*:\s*"([^"]+)"\s*\}')
+_SENTENCE_SPLIT_RE = re.compile(r'[。！？!?\n]|\.(?:\s|$)')
+
+
+@dataclass(slots=True)
+class TransferCheckMetrics:
+    checks: int = 0
+    cache_hits: int = 0
+    rule_decisions: int = 0
+    llm_calls: int = 0
+    llm_errors: int = 0
+    llm_latency_sum: float = 0.0
+
+    def snapshot(self) -> dict:
+        skipped = self.cache_hits + self.rule_decisions
+        llm_latency_avg = self.llm_latency_sum / max(self.llm_calls, 1)
+        return {
+            'checks': self.checks,
+            'cache_hits': self.cache_hits,
+            'rule_decisions': self.rule_decisions,
+            'llm_calls': self.llm_calls,
+            'llm_errors': self.llm_errors,
+            'cache_hit_rate': round(self.cache_hits / max(self.checks, 1), 3),
+            'llm_skip_rate': round(skipped / max(self.checks, 1), 3),
+            'llm_latency_avg': round(llm_latency_avg, 4),
+            # 按已发生 LLM 调用的平均耗时估算
+            'saved_latency': round(skipped * llm_latency_avg, 2),
+        }
+
+
+transfer_check_metrics = TransferCheckMetrics()
+
+
+def _decision(is_transfer: bool, target_agent: Optional[str], reason: str) -> dict:
+    return {'is_transfer': is_transfer, 'target_agent': target_agent, 'reason': reason}
+
+
+def _name_pattern(name: str) -> re.Pattern:
+    return re.compile(rf'(?<![A-Za-z0-9_]){re.escape(name)}(?![A-Za-z0-9_])', re.I)
+
+
+def agent_name_patterns(target_agent_enum: Type[Enum]) -> dict[str, re.Pattern]:
+    return {
+        str(member.value): _name_pattern(str(member.value))
+        for member in target_agent_enum
+    }
+
+
+def _needs_confirmation(text: str) -> bool:
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if not lines:
+        return False
+    last_line = lines[-1]
+    return last_line.endswith(('?', '？')) or bool(_CONFIRM_PHRASE_RE.search(last_line))
+
+
+def classify_transfer(text: str, patterns: dict[str, re.Pattern]) -> Optional[dict]:
+    """
+    规则预判是否需要转移，结论明确时返回与 LLM 相同结构的判定，否则返回 None 交给 LLM：
+    - 未点名任何目标 agent：一定不是转移；
+    - 以提问/请求确认收尾：不是立即转移；
+    - 唯一点名的 agent 以 JSON `{"agent_name": ...}` 给出，或与转移表述出现在同一句中：转移。
+    """
+    mentioned = [name for name, pattern in patterns.items() if pattern.search(text)]
+    if not mentioned:
+        return _decision(False, None, 'rule: no target agent is named')
+    if _needs_confirmation(text):
+        return _decision(False, None, 'rule: response asks for user confirmation')
+    if len(mentioned) > 1:
+        return None
+
+    target_agent = mentioned[0]
+    if any(
+        match.group(1).lower() == target_agent.lower()
+        for match in _JSON_AGENT_RE.finditer(text)
+    ):
+        return _decision(True, target_agent, 'rule: explicit JSON transfer object')
+    for sentence in _SENTENCE_SPLIT_RE.split(text):
+        phrase = _TRANSFER_PHRASE_RE.search(sentence)
+        if phrase and patterns[target_agent].search(sentence, phrase.end()):
+            return _decision(
+                True, target_agent, f'rule: transfer phrase `{phrase.group(0)}`'
+            )
+    return None
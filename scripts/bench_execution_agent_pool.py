@@ -0,0 +1,42 @@
+"""
+对比每轮重新构建执行 agent 树与从 ExecutionAgentPool 获取共享实例的单轮开销。
+
+    python -m scripts.bench_execution_agent_pool
+"""
+
+import time
+
+from agents.matmaster_agent.flow_agents.agent import build_execution_agent
+from agents.matmaster_agent.flow_agents.execution_agent.pool import (
+    ExecutionAgentPool,
+)
+from agents.matmaster_agent.sub_agents.mapping import AGENT_CLASS_MAPPING
+
+N = 20
+# 典型多步计划涉及的子 agent 数
+AGENT_NAMES = tuple(list(AGENT_CLASS_MAPPING)[:4])
+
+
+def bench_build() -> float:
+    start = time.perf_counter()
+    for _ in range(N):
+        build_execution_agent(AGENT_NAMES)
+    return (time.perf_counter() - start) / N * 1e3
+
+
+def bench_pool() -> float:
+    pool = ExecutionAgentPool(build_execution_agent, max_keys=1)
+    start = time.perf_counter()
+    for _ in range(N):
+        pool.get(AGENT_NAMES)
+    elapsed = (time.perf_counter() - start) / N * 1e3
+    print(f'pool metrics: {pool.metrics.snapshot()}')
+    return elapsed
+
+
+if __name__ == '__main__':
+    print(f'agents: {list(AGENT_NAMES)}')
+    build = bench_build()
+    pooled = bench_pool()
+    print(f'build per turn:    {build:8.2f} ms')
+    print(f'pooled per turn:   {pooled:8.2f} ms')
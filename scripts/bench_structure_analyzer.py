@@ -0,0 +1,116 @@
+"""
+对比表面结构分析中近邻相关计算的旧实现（纯 Python 两两比较）与 neighbor_list 实现的耗时，
+合成结构为带真空层和 CO 吸附物的 Cu(100) slab 超胞。
+
+    python -m scripts.bench_structure_analyzer
+"""
+
+import math
+import time
+
+import numpy as np
+
+from agents.matmaster_agent.sub_agents.apex_agent.structure_analyzer import (
+    _ATOMIC_RADIUS,
+    _build_components,
+    _nearest_neighbor_average_distance,
+    should_block_surface_structure,
+)
+
+SIZES = (100, 1000, 5000, 20000)
+# 旧实现为 O(N²)，超过该原子数不再测量
+LEGACY_MAX_ATOMS = 6000
+FCC_A = 3.61
+VACUUM = 15.0
+
+
+def slab_structure(n_atoms: int) -> dict:
+    """约 n_atoms 个原子的 fcc Cu slab，顶部放一个 CO"""
+    layers = 4
+    n_cells = max(1, round((n_atoms / (4 * layers)) ** 0.5))
+    basis = np.array([[0, 0, 0], [0.5, 0.5, 0], [0.5, 0, 0.5], [0, 0.5, 0.5]])
+    grid = np.array(
+        [
+            (x, y, z)
+            for x in range(n_cells)
+            for y in range(n_cells)
+            for z in range(layers)
+        ]
+    )
+    positions = ((grid[:, None, :] + basis[None, :, :]).reshape(-1, 3)) * FCC_A
+    top = positions[:, 2].max()
+    adsorbate = np.array([[0.0, 0.0, top + 3.0], [0.0, 0.0, top + 4.13]])
+    lattice = np.diag([n_cells * FCC_A, n_cells * FCC_A, layers * FCC_A + VACUUM])
+    return {
+        'lattice_matrix': lattice.tolist(),
+        'cart_positions': np.vstack([positions, adsorbate]).tolist(),
+        'species_per_atom': ['Cu'] * len(positions) + ['C', 'O'],
+    }
+
+
+def legacy_pair_bond_cut(sym_i: str, sym_j: str, default: float = 1.9) -> float:
+    ri = _ATOMIC_RADIUS.get(sym_i)
+    rj = _ATOMIC_RADIUS.get(sym_j)
+    if ri and rj:
+        return max(default, 1.1 * (ri + rj))
+    if ri or rj:
+        return max(default, 1.1 * ((ri or rj) + 1.0))
+    return default
+
+
+def legacy_kernels(positions: list, species: list):
+    """旧实现：逐对计算成键判据的成键图、主体平均近邻距离、其余原子到主体的最近距离"""
+    n_atoms = len(positions)
+    adjacency = [[] for _ in range(n_atoms)]
+    for i in range(n_atoms):
+        xi, yi, zi = positions[i]
+        for j in range(i + 1, n_atoms):
+            xj, yj, zj = positions[j]
+            d2 = (xi - xj) ** 2 + (yi - yj) ** 2 + (zi - zj) ** 2
+            cutoff = legacy_pair_bond_cut(species[i], species[j])
+            if d2 <= cutoff * cutoff:
+                adjacency[i].append(j)
+                adjacency[j].append(i)
+
+    main = [idx for idx in range(n_atoms) if species[idx] == 'Cu']
+    others = [idx for idx in range(n_atoms) if species[idx] != 'Cu']
+    total = 0.0
+    for i in main:
+        total += min(math.dist(positions[i], positions[j]) for j in main if j != i)
+    min_dist = min(math.dist(positions[i], positions[j]) for i in others for j in main)
+    return adjacency, total / len(main), min_dist
+
+
+def bench(n_atoms: int):
+    structure = slab_structure(n_atoms)
+    positions = structure['cart_positions']
+    species = structure['species_per_atom']
+    lattice = structure['lattice_matrix']
+
+    legacy = None
+    if len(positions) <= LEGACY_MAX_ATOMS:
+        start = time.perf_counter()
+        legacy_kernels(positions, species)
+        legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    components = _build_components(positions, species, 1.9, lattice)
+    main = max(components, key=len)
+    _nearest_neighbor_average_distance(np.asarray(positions)[main], lattice)
+    kernels = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocked, analysis = should_block_surface_structure(structure)
+    full = time.perf_counter() - start
+
+    legacy_text = f'{legacy * 1e3:10.1f} ms' if legacy is not None else f'{"-":>13}'
+    print(
+        f'{len(positions):>6} atoms  legacy {legacy_text}  '
+        f'neighbor_list {kernels * 1e3:8.1f} ms  '
+        f'should_block {full * 1e3:8.1f} ms  -> {blocked}, {analysis}'
+    )
+
+
+if __name__ == '__main__':
+    for size in SIZES:
+        bench(size)
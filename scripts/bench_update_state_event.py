@@ -0,0 +1,81 @@
+"""
+对比 update_state_event 旧实现（inspect.stack + deep merge + 全量日志）与当前实现的单事件开销。
+
+    python -m scripts.bench_update_state_event
+"""
+
+import copy
+import inspect
+import io
+import logging
+import os
+import time
+from types import SimpleNamespace
+
+from deepmerge import always_merger
+from google.adk.events import Event, EventActions
+
+from agents.matmaster_agent.utils.event_utils import update_state_event
+
+N = 2000
+
+logger = logging.getLogger('bench_update_state_event')
+
+
+def legacy_update_state_event(ctx, state_delta: dict, event=None):
+    stack = inspect.stack()
+    frame = stack[1]
+    filename = os.path.basename(frame.filename)
+    lineno = frame.lineno
+
+    origin_event_state_delta = {}
+    if event and event.actions and event.actions.state_delta:
+        origin_event_state_delta = event.actions.state_delta
+
+    final_state_delta = always_merger.merge(state_delta, origin_event_state_delta)
+    logger.info(
+        f'{ctx.session.id} {filename}:{lineno} final_state_delta = {final_state_delta}'
+    )
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=f"{filename}:{lineno}",
+        actions=EventActions(state_delta=final_state_delta),
+    )
+
+
+def make_ctx():
+    plan = {
+        'steps': [
+            {
+                'tool_name': f'tool_{i}',
+                'description': 'x' * 200,
+                'status': 'plan',
+                'step_title': f'step {i}',
+            }
+            for i in range(8)
+        ]
+    }
+    state = {'plan': plan, 'plan_index': 0, 'matmaster_flow_active': None}
+    session = SimpleNamespace(id='bench-session', state=state)
+    return SimpleNamespace(session=session, invocation_id='bench-invocation')
+
+
+def bench(func, ctx) -> float:
+    start = time.perf_counter()
+    for i in range(N):
+        update_plan = copy.deepcopy(ctx.session.state['plan'])
+        update_plan['steps'][i % 8]['status'] = 'process'
+        func(ctx, state_delta={'plan': update_plan, 'plan_index': 0})
+    return (time.perf_counter() - start) / N * 1e6
+
+
+if __name__ == '__main__':
+    # 日志写入内存，计入格式化开销但不受终端输出影响
+    logging.basicConfig(stream=io.StringIO(), level=logging.INFO, force=True)
+    ctx = make_ctx()
+    baseline = bench(lambda c, state_delta: None, ctx)
+    legacy = bench(legacy_update_state_event, ctx)
+    current = bench(update_state_event, ctx)
+    print(f'loop baseline:     {baseline:8.1f} us/event')
+    print(f'legacy:            {legacy - baseline:8.1f} us/event')
+    print(f'current:           {current - baseline:8.1f} us/event')
@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import requests
@@ -14,8 +15,8 @@ from agents.matmaster_agent.constant import (
     OpenAPIJobAPI,
 )
 from agents.matmaster_agent.services.job import (
-    get_token_and_download_file,
     parse_and_prepare_results,
+    read_job_file,
 )
 
 logger = init_colored_logger(__name__)
@@ -95,5 +96,8 @@ if __name__ == '__main__':
     # get_job_detail(job_id, use_ticket=True, authorization=authorization)
     # get_token()
     file_path = '20251204072612.abacus_cal_elastic.d53401f9'
-    get_token_and_download_file(file_path, job_id)
+    content = asyncio.run(read_job_file(file_path, job_id, MATERIALS_ACCESS_KEY))
+    if content is not None:
+        with open(file_path, 'wb') as f:
+            f.write(content)
     result = parse_and_prepare_results(job_id=job_id)
@@ -5,6 +5,7 @@ import os
 import sys
 import time
 from datetime import datetime
+from pathlib import Path
 
 import aiohttp
 import jsonpickle
@@ -13,10 +14,7 @@ from dotenv import find_dotenv, load_dotenv
 from toolsy.logger import init_colored_logger
 
 from agents.matmaster_agent.constant import OpenAPIJobAPI
-from agents.matmaster_agent.services.job import (
-    check_status_and_download_file,
-    get_token_and_download_file,
-)
+from agents.matmaster_agent.services.job import open_job_file
 from agents.matmaster_agent.utils.job_utils import mapping_status
 from scripts.sandbox_api import (
     kill_job,
@@ -27,6 +25,32 @@ load_dotenv(find_dotenv())
 logger = init_colored_logger(__name__)
 
 
+async def save_response(response: aiohttp.ClientResponse, output_path: str):
+    """把下载响应写入本地文件并打印进度"""
+    if response.status != 200:
+        logger.error(f'`{output_path}` url returned status code: {response.status}')
+        return
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    total_size = int(response.headers.get('content-length', 0))
+    downloaded_size = 0
+    with open(output_path, 'wb') as f:
+        async for chunk in response.content.iter_chunked(8192):
+            f.write(chunk)
+            downloaded_size += len(chunk)
+            if total_size > 0:
+                progress = (downloaded_size / total_size) * 100
+                print(f"\rDownload progress: {progress:.1f}%", end='', flush=True)
+    print()
+    logger.info(f"Download `{output_path}` completed, {downloaded_size} bytes")
+
+
+async def download_job_file(file_path, job_id, access_key, download_dir='.'):
+    async with open_job_file(file_path, job_id, access_key) as response:
+        if response is not None:
+            await save_response(response, str(Path(download_dir) / file_path))
+
+
 def get_duration(create_time, update_time):
     """
     计算两个时间戳之间的时间差，格式化为时-分-秒
@@ -81,7 +105,9 @@ def poll_job_status(job_id, interval=10):
             logger.info(f"{job_name}[{job_status}] -- {duration}")
 
             # 下载日志
-            get_token_and_download_file('log', job_id)
+            asyncio.run(
+                download_job_file('log', job_id, os.getenv('MATERIALS_ACCESS_KEY'))
+            )
 
             # 如果作业已结束，则退出轮询
             if job_status in ['Finished', 'Failed', 'Killed']:
@@ -183,14 +209,14 @@ async def main():
         logger.info(f"{job_name}[{job_status}] -- {duration}")
 
         # download log
-        await get_token_and_download_file('log', args.job_id, access_key)
+        await download_job_file('log', args.job_id, access_key)
 
         if job_status in ['Running']:
             return
         elif job_status == 'Finished':
             # download result.txt
             results_txt = 'results.txt'
-            await get_token_and_download_file(results_txt, args.job_id, access_key)
+            await download_job_file(results_txt, args.job_id, access_key)
             with open(results_txt) as f:
                 logger.info(jsonpickle.loads(f.read()))
             os.remove(results_txt)
@@ -200,9 +226,7 @@ async def main():
                 if result_url and result_url != 'null':
                     async with aiohttp.ClientSession() as session:
                         async with session.get(result_url) as result_response:
-                            await check_status_and_download_file(
-                                result_response, args.output
-                            )
+                            await save_response(result_response, args.output)
                 else:
                     logger.error('No resultUrl found or resultUrl is empty')
     elif args.command == 'kill':
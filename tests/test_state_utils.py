@@ -0,0 +1,213 @@
+import copy
+import random
+
+import pytest
+
+from agents.matmaster_agent.state import ERROR_OCCURRED
+from agents.matmaster_agent.utils.state_utils import (
+    clear_step_state,
+    current_plan_index,
+    rebase_state_value,
+    set_job,
+    step_state_key,
+    update_job,
+    update_plan_step,
+    update_plan_steps,
+)
+
+STATUSES = ['plan', 'process', 'success', 'failed', 'submitted']
+
+
+def _random_plan(rng: random.Random) -> dict:
+    return {
+        'intro': 'intro',
+        'overall': 'overall',
+        'steps': [
+            {
+                'tool_name': f'tool_{i}',
+                'description': f'step {i}',
+                'status': rng.choice(STATUSES),
+                'retry_count': rng.randint(0, 3),
+                'alternatives': [f'alt_{i}_{j}' for j in range(rng.randint(0, 3))],
+            }
+            for i in range(rng.randint(1, 8))
+        ],
+    }
+
+
+def _random_jobs(rng: random.Random) -> dict:
+    return {
+        f'job_{i}': {
+            'job_id': f'job_{i}',
+            'status': rng.choice(['Running', 'Finished', 'Failed']),
+            'agent_name': f'agent_{i}',
+            'frontend': {'job_id': f'job_{i}', 'status': 'Running'},
+        }
+        for i in range(rng.randint(1, 6))
+    }
+
+
+def _random_changes(rng: random.Random) -> dict:
+    fields = ['status', 'retry_count', 'description', 'tool_name', 'title']
+    return {
+        field: rng.choice([rng.choice(STATUSES), rng.randint(0, 5), f'new {field}'])
+        for field in rng.sample(fields, rng.randint(1, len(fields)))
+    }
+
+
+# 以下为改为写时复制之前的实现：深拷贝整个值后原地修改
+
+
+def _old_update_plan_step(plan, index, **changes):
+    update_plan = copy.deepcopy(plan)
+    for field, value in changes.items():
+        update_plan['steps'][index][field] = value
+    return update_plan
+
+
+def _old_update_plan_steps(plan, field, values):
+    update_plan = copy.deepcopy(plan)
+    for step, value in zip(update_plan['steps'], values):
+        step[field] = value
+    return update_plan
+
+
+def _old_update_job(long_running_jobs, job_id, **changes):
+    update_jobs = copy.deepcopy(long_running_jobs)
+    for field, value in changes.items():
+        update_jobs[job_id][field] = value
+    return update_jobs
+
+
+def _old_set_job(long_running_jobs, job_id, job):
+    update_jobs = copy.deepcopy(long_running_jobs)
+    update_jobs[job_id] = job
+    return update_jobs
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_update_plan_step_matches_deepcopy(seed):
+    rng = random.Random(seed)
+    plan = _random_plan(rng)
+    snapshot = copy.deepcopy(plan)
+    index = rng.randrange(len(plan['steps']))
+    changes = _random_changes(rng)
+
+    update_plan = update_plan_step(plan, index, **changes)
+
+    assert update_plan == _old_update_plan_step(snapshot, index, **changes)
+    assert plan == snapshot  # 旧值不变
+    for i, step in enumerate(plan['steps']):
+        # 未修改的步骤与旧值共享
+        assert (update_plan['steps'][i] is step) == (i != index)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_update_plan_steps_matches_deepcopy(seed):
+    rng = random.Random(seed)
+    plan = _random_plan(rng)
+    snapshot = copy.deepcopy(plan)
+    values = [f'title {i}' for i in range(rng.randint(0, len(plan['steps']) + 2))]
+
+    update_plan = update_plan_steps(plan, 'title', values)
+
+    assert update_plan == _old_update_plan_steps(snapshot, 'title', values)
+    assert plan == snapshot
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_update_job_matches_deepcopy(seed):
+    rng = random.Random(seed)
+    jobs = _random_jobs(rng)
+    snapshot = copy.deepcopy(jobs)
+    job_id = rng.choice(list(jobs))
+    changes = {'status': 'Finished', 'result': {'output': [seed]}}
+
+    update_jobs = update_job(jobs, job_id, **changes)
+
+    assert update_jobs == _old_update_job(snapshot, job_id, **changes)
+    assert jobs == snapshot
+    for key, job in jobs.items():
+        assert (update_jobs[key] is job) == (key != job_id)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_set_job_matches_deepcopy(seed):
+    rng = random.Random(seed)
+    jobs = _random_jobs(rng)
+    snapshot = copy.deepcopy(jobs)
+    job_id = rng.choice([*jobs, 'job_new'])
+    job = {'job_id': job_id, 'status': 'Running'}
+
+    assert set_job(jobs, job_id, job) == _old_set_job(snapshot, job_id, job)
+    assert jobs == snapshot
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_sequential_transitions_match_deepcopy(seed):
+    rng = random.Random(seed)
+    new_plan = _random_plan(rng)
+    old_plan = copy.deepcopy(new_plan)
+    for _ in range(20):
+        index = rng.randrange(len(new_plan['steps']))
+        changes = _random_changes(rng)
+        new_plan = update_plan_step(new_plan, index, **changes)
+        old_plan = _old_update_plan_step(old_plan, index, **changes)
+        assert new_plan == old_plan
+
+
+def test_rebase_keeps_changes_of_both_steps():
+    base = {
+        'steps': [
+            {'status': 'plan', 'tool_name': 'a'},
+            {'status': 'plan', 'tool_name': 'b'},
+        ]
+    }
+    ours = update_plan_step(base, 0, status='success')
+    theirs = update_plan_step(base, 1, status='failed', retry_count=1)
+
+    assert rebase_state_value(base, ours, theirs) == {
+        'steps': [
+            {'status': 'success', 'tool_name': 'a'},
+            {'status': 'failed', 'tool_name': 'b', 'retry_count': 1},
+        ]
+    }
+
+
+def test_rebase_unchanged_value_keeps_theirs():
+    base = {'job_1': {'status': 'Running'}}
+    theirs = update_job(base, 'job_1', status='Finished')
+
+    assert rebase_state_value(base, base, theirs) is theirs
+
+
+def test_step_state_key_is_scoped_by_plan_index():
+    assert step_state_key('tool_call_info') == 'tool_call_info'
+
+    token = current_plan_index.set(1)
+    try:
+        assert step_state_key('tool_call_info') == 'tool_call_info_step_2'
+        assert step_state_key('recommend_params') == 'recommend_params_step_2'
+        assert step_state_key(ERROR_OCCURRED) == 'error_occurred_step_2'
+        assert step_state_key('plan') == 'plan'  # 共享状态不区分步骤
+    finally:
+        current_plan_index.reset(token)
+
+
+def test_clear_step_state_only_clears_scoped_keys():
+    state = {
+        'plan': {'steps': []},
+        'tool_call_info': {'tool_name': 'a'},
+        'tool_call_info_step_1': {'tool_name': 'a'},
+        'step_validation_step_12': {'is_valid': True},
+        'error_occurred_step_2': False,
+        'tools_count_step_3': None,
+        'unknown_step_1': 1,
+        'tool_call_info_step_x': 1,
+    }
+
+    assert clear_step_state(state) == {
+        'tool_call_info_step_1': None,
+        'step_validation_step_12': None,
+        'error_occurred_step_2': None,
+    }